@@ -0,0 +1,112 @@
+# Peak RSS and run time of the ledger rollups (per item, supplier, category,
+# and category per week and month) on a synthetic processed_inventory.csv-style
+# ledger of --rows rows:
+#   in_memory  pd.read_csv of the whole file, then rollup_frame
+#   chunked    ledger_rollups, --chunk-rows at a time in this process
+#   pool       ledger_rollups with a process pool of --workers
+# Each mode runs in a fresh interpreter; the rollups are pickled to a temporary
+# directory and compared with the in-memory result. The pool's peak RSS is the
+# parent's; each worker holds about one chunk on top of its interpreter.
+#
+#   python benchmarks/bench_aggregate.py --rows 5000000 --chunk-rows 250000 --workers 2
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CATEGORIES = ['Medical Supply', 'Medication', 'Equipment', 'Vaccines']
+SUPPLIERS = [f'Supplier {letter}' for letter in 'ABCDEFGH']
+
+
+def make_ledger(path, n_rows, items=20_000, seed=42, block=500_000):
+    rng = np.random.default_rng(seed)
+    item_category = rng.integers(0, len(CATEGORIES), size=items)
+    item_supplier = rng.integers(0, len(SUPPLIERS), size=items)
+    with open(path, 'w') as f:
+        f.write('Date,Item ID,Item Name,Category,Units Received,Units Used,Units in Stock,Supplier\n')
+        for start in range(0, n_rows, block):
+            n = min(block, n_rows - start)
+            item = rng.integers(0, items, size=n)
+            used = rng.poisson(40, size=n)
+            frame = pd.DataFrame({
+                'Date': pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, 3 * 365, size=n), unit='D'),
+                'Item ID': item + 1000,
+                'Item Name': 'Item',
+                'Category': np.asarray(CATEGORIES)[item_category[item]],
+                'Units Received': used + rng.integers(0, 20, size=n),
+                'Units Used': used,
+                'Units in Stock': rng.integers(0, 2000, size=n),
+                'Supplier': np.asarray(SUPPLIERS)[item_supplier[item]],
+            })
+            frame.to_csv(f, header=False, index=False, date_format='%Y-%m-%d')
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(mode, csv_path, chunk_rows, workers, result_path):
+    from demandcast.aggregate import DEFAULT_ROLLUPS, ledger_rollups, rollup_frame
+
+    baseline_mb = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == 'in_memory':
+        ledger = pd.read_csv(csv_path, parse_dates=['Date'])
+        rollups = {name: rollup_frame(ledger, by, freq) for name, (by, freq) in DEFAULT_ROLLUPS.items()}
+    else:
+        rollups = ledger_rollups(csv_path, chunk_rows=chunk_rows, max_workers=workers if mode == 'pool' else 1)
+    seconds = time.perf_counter() - started
+    pd.to_pickle(rollups, result_path)
+    print(json.dumps({'seconds': seconds, 'peak_mb': peak_rss_mb() - baseline_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=250_000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--child', nargs=5, metavar=('MODE', 'CSV', 'CHUNK_ROWS', 'WORKERS', 'RESULT'))
+    args = parser.parse_args()
+
+    if args.child:
+        mode, csv_path, chunk_rows, workers, result_path = args.child
+        child(mode, csv_path, int(chunk_rows), int(workers), result_path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(Path(tmp) / 'ledger.csv')
+        make_ledger(csv_path, args.rows)
+        size_mb = Path(csv_path).stat().st_size / 1e6
+        print(f'{args.rows:,} rows, {size_mb:.0f} MB CSV, chunks of {args.chunk_rows:,} rows')
+
+        results = {}
+        for mode in ['in_memory', 'chunked', 'pool']:
+            result_path = str(Path(tmp) / f'{mode}.pkl')
+            out = subprocess.run([sys.executable, __file__, '--child', mode, csv_path, str(args.chunk_rows),
+                                  str(args.workers), result_path], check=True, capture_output=True, text=True)
+            stats = json.loads(out.stdout.strip().splitlines()[-1])
+            results[mode] = pd.read_pickle(result_path)
+            label = f'pool ({args.workers} workers)' if mode == 'pool' else mode
+            line = f"{label:<18} {stats['seconds']:7.2f} s  peak +{stats['peak_mb']:6.0f} MB RSS"
+            if mode != 'in_memory':
+                same = all(np.allclose(results[mode][name].to_numpy(dtype=np.float64), frame.to_numpy(dtype=np.float64),
+                                       rtol=1e-9, equal_nan=True) and results[mode][name].index.equals(frame.index)
+                           for name, frame in results['in_memory'].items())
+                line += f"  {'matches' if same else 'DIFFERS FROM'} in-memory result"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Forecasting regression suite: rolling-origin backtest of every engine on the
+# inventory ledger, written as a Parquet report and checked against a baseline.
+#
+#   python benchmarks/bench_backtest.py --write-baseline benchmarks/backtest_baseline.json
+#   python benchmarks/bench_backtest.py --baseline benchmarks/backtest_baseline.json
+#
+# The check fails when an engine's mean sMAPE rises by more than --accuracy-tolerance
+# points, or its fit time grows by more than --time-tolerance times.
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from demandcast.backtest import backtest_ledger, summarize, write_report
+
+ENGINES = {
+    'arima': {'order': (1, 1, 1)},
+    'seasonal_naive': {'season_length': 6},
+    'moving_average': {'window': 3},
+    'ses': {'alpha': 0.3},
+    'holt': {'alpha': 0.3, 'beta': 0.1},
+    'croston': {'alpha': 0.1},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', default=str(ROOT / 'processed_inventory.csv'))
+    parser.add_argument('--report', default=str(ROOT / 'backtest_report.parquet'))
+    parser.add_argument('--horizon', type=int, default=6)
+    parser.add_argument('--min-train', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--baseline')
+    parser.add_argument('--write-baseline')
+    parser.add_argument('--accuracy-tolerance', type=float, default=1.0)
+    parser.add_argument('--time-tolerance', type=float, default=3.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = backtest_ledger(pd.read_csv(args.input), ENGINES, horizon=args.horizon,
+                             min_train=args.min_train, max_workers=args.workers)
+    wall = time.perf_counter() - started
+    write_report(report, args.report)
+    summary = summarize(report)
+    print(summary.to_string(float_format=lambda v: f'{v:.3f}'))
+    print(f'{len(report):,} rows in {wall:.2f}s, written to {args.report}')
+
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(json.dumps(summary[['smape', 'seconds']].to_dict('index'), indent=2))
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = []
+        for engine, expected in baseline.items():
+            if engine not in summary.index:
+                regressions.append(f'{engine}: missing from this run')
+                continue
+            current = summary.loc[engine]
+            if current['smape'] > expected['smape'] + args.accuracy_tolerance:
+                regressions.append(f"{engine}: sMAPE {current['smape']:.2f} > baseline {expected['smape']:.2f}")
+            if current['seconds'] > expected['seconds'] * args.time_tolerance:
+                regressions.append(f"{engine}: {current['seconds']:.4f}s > {args.time_tolerance}x baseline {expected['seconds']:.4f}s")
+        if regressions:
+            raise SystemExit('Regressions against baseline:\n  ' + '\n  '.join(regressions))
+        print('No regressions against baseline.')
+
+
+if __name__ == '__main__':
+    main()
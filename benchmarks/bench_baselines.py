@@ -0,0 +1,64 @@
+# Accuracy and speed of every forecasting engine on the processed_inventory.csv items.
+# The last --holdout observations of each item are held out and forecast from the
+# rest; --replicate repeats the items (with noise) to time the engines at catalogue scale.
+#
+#   python benchmarks/bench_baselines.py --holdout 6 --replicate 1000
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from demandcast.baselines import ENGINES, get_forecaster, ledger_matrix
+
+
+def smape(actual, forecast):
+    denominator = np.abs(actual) + np.abs(forecast)
+    ratio = np.divide(2 * np.abs(forecast - actual), denominator, out=np.zeros_like(denominator), where=denominator > 0)
+    return ratio.mean() * 100
+
+
+def mae(actual, forecast):
+    return np.abs(forecast - actual).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', default=str(ROOT / 'processed_inventory.csv'))
+    parser.add_argument('--value-col', default='Units Used')
+    parser.add_argument('--holdout', type=int, default=6)
+    parser.add_argument('--season-length', type=int, default=6)
+    parser.add_argument('--replicate', type=int, default=1000,
+                        help='copies of the items used for the timing run (ARIMA is timed on the originals only)')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    _, _, values = ledger_matrix(pd.read_csv(args.input), args.value_col)
+    train, actual = values[:, :-args.holdout], values[:, -args.holdout:]
+    rng = np.random.default_rng(42)
+    scaled = np.tile(train, (args.replicate, 1)) * rng.normal(1, 0.05, size=(len(train) * args.replicate, 1))
+
+    print(f'{len(values)} items x {values.shape[1]} observations, holdout {args.holdout}')
+    print(f"{'engine':<16} {'sMAPE %':>8} {'MAE':>9} {'ms/series':>10} {'series/s':>11}")
+    for name in ENGINES:
+        params = {'season_length': args.season_length} if name == 'seasonal_naive' else {}
+        forecaster = get_forecaster(name, **params)
+        forecast = forecaster.forecast(train, args.holdout)
+
+        timing_input = train if name == 'arima' else scaled
+        started = time.perf_counter()
+        forecaster.forecast(timing_input, args.holdout)
+        seconds = time.perf_counter() - started
+        per_series = seconds / len(timing_input)
+        print(f'{name:<16} {smape(actual, forecast):>8.1f} {mae(actual, forecast):>9.1f} '
+              f'{per_series * 1000:>10.4f} {1 / per_series:>11,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# Catalogue compliance audit of --products synthetic products (a mix of BSON
+# date and string expiry dates, about 2% missing fields), documents shaped as
+# the historical collections' cursor returns them:
+#   per-product  the old check_compliance logic, one document at a time
+#                (without the find_one round trip it paid per product)
+#   vectorized   records -> DataFrame, then audit_frame over all of them
+# Both must classify every product the same way.
+#
+# With --uri, the products are also written to a scratch database on that
+# MongoDB server (dropped afterwards) and audited end to end with
+# audit_catalogue, projection and batched cursors included.
+#
+#   python benchmarks/bench_compliance.py --products 500000
+#   python benchmarks/bench_compliance.py --products 500000 --uri mongodb://localhost:27017/
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CATEGORIES = ['Medication', 'Medical Supplies', 'Medical Equipment', 'Vaccines']
+TEMPERATURES = ['Room Temperature', 'Cool Storage', 'Frozen', 'None']
+SCRATCH_DATABASE = 'demandcast_bench_compliance'
+
+
+def make_products(n, seed=42):
+    rng = np.random.default_rng(seed)
+    start = datetime(2022, 1, 1)
+    days = rng.integers(0, 6 * 365, size=n)
+    products = []
+    for i in range(n):
+        expiry = start + timedelta(days=int(days[i]))
+        product = {
+            'Category': CATEGORIES[i % len(CATEGORIES)],
+            'Product_ID': f'P{i:08d}',
+            'Product_Name': f'Product {i % 5000}',
+            'Date_Updated': start,
+            'Expiry_Date': expiry if i % 2 else expiry.strftime('%Y-%m-%d'),
+            'Temperature_Requirement': TEMPERATURES[i % len(TEMPERATURES)],
+        }
+        if i % 50 == 0:
+            del product['Temperature_Requirement' if i % 100 else 'Expiry_Date']
+        products.append(product)
+    return products
+
+
+# check_compliance's rules as they were, made to survive missing fields
+def per_product(products, as_of):
+    results = []
+    current_date = as_of.date()
+    for product in products:
+        expiry = product.get('Expiry_Date')
+        if isinstance(expiry, datetime):
+            expiry_date = expiry.date()
+        else:
+            expiry_date = datetime.strptime(expiry, '%Y-%m-%d').date() if expiry else None
+        expiry_ok = expiry_date is not None and expiry_date > current_date
+        temperature_ok = product.get('Temperature_Requirement') in ['Room Temperature', 'Cool Storage']
+        results.append((expiry_ok, temperature_ok))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=500_000)
+    parser.add_argument('--as-of', default='2025-01-01')
+    parser.add_argument('--uri', help='MongoDB server for the end-to-end audit')
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from demandcast.compliance import COMPLIANT, audit_catalogue, audit_frame
+
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d')
+    products = make_products(args.products)
+    print(f'{args.products:,} products, audited as of {args.as_of}')
+
+    started = time.perf_counter()
+    expected = per_product(products, as_of)
+    loop_seconds = time.perf_counter() - started
+    print(f'per-product  {loop_seconds:7.2f} s  {args.products / loop_seconds:>12,.0f} products/s')
+
+    started = time.perf_counter()
+    frame = pd.DataFrame.from_records(products)
+    built = time.perf_counter()
+    report = audit_frame(frame, as_of=as_of)
+    finished = time.perf_counter()
+    frame_seconds = finished - started
+    print(f'vectorized   {frame_seconds:7.2f} s  {args.products / frame_seconds:>12,.0f} products/s  '
+          f'({loop_seconds / frame_seconds:.1f}x; frame {built - started:.2f} s, rules {finished - built:.2f} s)')
+    same = (np.array(expected) == np.column_stack([report['Expiry Date'] == COMPLIANT,
+                                                    report['Storage Temperature'] == COMPLIANT])).all()
+    print(f"  same classification: {bool(same)}, {int(report['Compliant'].sum()):,} compliant")
+
+    if args.uri:
+        from demandcast.mongo_client import get_client
+
+        client = get_client(args.uri)
+        client.drop_database(SCRATCH_DATABASE)
+        history_db = client[SCRATCH_DATABASE]
+        try:
+            for category in CATEGORIES:
+                documents = [dict(p) for p in products if p['Category'] == category]
+                for document in documents:
+                    del document['Category']
+                history_db[category].insert_many(documents, ordered=False)
+            audit = audit_catalogue(history_db, as_of=as_of)
+            print(f'end to end   {audit.seconds:7.2f} s  {audit.products_per_second:>12,.0f} products/s '
+                  f'(MongoDB read and audit)')
+            print(audit.counts.to_string(index=False))
+        finally:
+            client.drop_database(SCRATCH_DATABASE)
+
+
+if __name__ == '__main__':
+    main()
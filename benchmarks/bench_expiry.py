@@ -0,0 +1,107 @@
+# Expired-product queries over --products synthetic products, half with BSON
+# date and half with legacy 'YYYY-MM-DD' string expiry dates, plus yesterday,
+# today and tomorrow in both forms:
+#   union        find_expired_products with one $unionWith aggregation
+#   concurrent   one projected query per category collection
+#   index        the change-stream watcher's in-memory ExpiryIndex
+# All three must return exactly the products whose expiry day has passed,
+# whatever the storage form, both at midday and at midnight.
+#
+# Runs against mongomock unless --uri names a MongoDB server, where a scratch
+# database is written and dropped afterwards.
+#
+#   python benchmarks/bench_expiry.py --products 100000
+#   python benchmarks/bench_expiry.py --products 1000000 --uri mongodb://localhost:27017/
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CATEGORIES = ['Medication', 'Medical Supplies', 'Medical Equipment', 'Vaccines']
+SCRATCH_DATABASE = 'demandcast_bench_expiry'
+
+
+def make_products(n, today, seed=42):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(-365, 365, size=n)
+    products = []
+    for i in range(n):
+        expiry = today + timedelta(days=int(days[i]))
+        products.append((CATEGORIES[i % len(CATEGORIES)], f'P{i:08d}', expiry if i % 2 else expiry.strftime('%Y-%m-%d')))
+    for offset in (-1, 0, 1):
+        expiry = today + timedelta(days=offset)
+        products.append((CATEGORIES[0], f'D{offset + 1}', expiry))
+        products.append((CATEGORIES[0], f'S{offset + 1}', expiry.strftime('%Y-%m-%d')))
+    return products
+
+
+def reference(products, now):
+    from demandcast.inventory_db import format_expiry_date, to_expiry_date
+
+    expired = [(category, product_id, format_expiry_date(expiry)) for category, product_id, expiry in products
+               if to_expiry_date(expiry) < now]
+    return sorted(expired, key=lambda row: (row[0], row[2], str(row[1])))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--uri', help='MongoDB server, instead of mongomock')
+    args = parser.parse_args()
+
+    from demandcast.change_streams import ExpiryIndex
+    from demandcast.inventory_db import ensure_indexes, find_expired_products, product_collection
+
+    if args.uri:
+        from demandcast.mongo_client import get_client
+
+        client = get_client(args.uri)
+    else:
+        import mongomock
+
+        client = mongomock.MongoClient()
+    client.drop_database(SCRATCH_DATABASE)
+    db = client[SCRATCH_DATABASE]
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    products = make_products(args.products, today)
+    try:
+        for category in CATEGORIES:
+            product_collection(db, category).insert_many(
+                [{'Product_ID': product_id, 'Expiry_Date': expiry} for c, product_id, expiry in products if c == category],
+                ordered=False)
+        ensure_indexes(db, CATEGORIES)
+        index = ExpiryIndex()
+        for i, (category, product_id, expiry) in enumerate(products):
+            index.upsert((category, i), category, product_id, expiry)
+
+        print(f'{len(products):,} products, {"MongoDB" if args.uri else "mongomock"}')
+        for label, now in [('midday', today + timedelta(hours=12)), ('midnight', today)]:
+            expected = reference(products, now)
+            today_rows = sorted(row[1] for row in expected if row[1][0] in 'DS')
+            print(f'{label:<9} {len(expected):,} expired; of yesterday/today/tomorrow: {", ".join(today_rows)}')
+            for method, run in [('union', lambda: find_expired_products(db, CATEGORIES, now, method='union')),
+                                ('concurrent', lambda: find_expired_products(db, CATEGORIES, now, method='concurrent')),
+                                ('index', lambda: index.expired(now))]:
+                seconds, found = timed(run)
+                if found != expected:
+                    missing, extra = set(expected) - set(found), set(found) - set(expected)
+                    raise SystemExit(f'{label} {method}: {len(missing)} missing {sorted(missing)[:5]}, '
+                                     f'{len(extra)} extra {sorted(extra)[:5]}')
+                print(f'  {method:<11} {seconds * 1000:9.1f} ms')
+    finally:
+        client.drop_database(SCRATCH_DATABASE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Batch ARIMA forecasting throughput (series per second) against worker count.
+#
+#   python benchmarks/bench_forecast.py --series 400 --length 36 --workers 1 2 4 8
+#   python benchmarks/bench_forecast.py --auto-order   # include the per-series order search
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import demandcast.order_search as order_search
+from demandcast.forecast import batch_forecast
+
+
+# Synthetic monthly ledger with one trending, noisy Units Used series per item
+def make_ledger(n_series, length, seed=42):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=length, freq='MS')
+    level = rng.uniform(100, 1000, size=(n_series, 1))
+    trend = rng.normal(0, 5, size=(n_series, 1))
+    used = level + trend * np.arange(length) + rng.normal(0, 30, size=(n_series, length))
+    return pd.DataFrame({
+        'Date': np.tile(dates, n_series),
+        'Item ID': np.repeat(np.arange(n_series), length),
+        'Units Used': used.ravel(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--series', type=int, default=400)
+    parser.add_argument('--length', type=int, default=36)
+    parser.add_argument('--steps', type=int, default=12)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--auto-order', action='store_true')
+    args = parser.parse_args()
+
+    ledger = make_ledger(args.series, args.length)
+    print(f"{'workers':>8} {'wall s':>8} {'series/s':>9} {'speedup':>8} {'failures':>9} {'fit p50 ms':>11} "
+          f"{'search s':>9} {'pruned':>7}")
+    baseline = None
+    for workers in args.workers:
+        # Searched orders are memoized on disk; give every run an empty memo
+        os.environ['DEMANDCAST_ORDER_MEMO'] = tempfile.mkdtemp(prefix='demandcast-orders-')
+        order_search.default_memo = order_search.OrderMemo(os.environ['DEMANDCAST_ORDER_MEMO'])
+
+        result = batch_forecast(ledger, steps=args.steps, max_workers=workers, chunk_size=args.chunk_size,
+                                order='auto' if args.auto_order else (1, 1, 1))
+        baseline = baseline or result.series_per_second
+        fit_p50 = result.timings['Seconds'].median() * 1000
+        print(f'{workers:>8} {result.wall_seconds:>8.2f} {result.series_per_second:>9.1f} '
+              f'{result.series_per_second / baseline:>7.1f}x {len(result.failures):>9} {fit_p50:>11.1f} '
+              f'{result.search_seconds:>9.1f} {result.candidates_pruned:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Cold-start import budget of the Streamlit pages. For every page, a fresh
+# interpreter imports streamlit (already loaded in a running server) and then
+# executes only the page's top-level import statements under -X importtime.
+# Imports deferred into functions or sections are not counted, which is the
+# point: they are paid when that section is first rendered, not on page load.
+#
+# The same interpreters time `import streamlit` first, and the fastest of those
+# is the run's reference. Budgets in import_budget.json are multiples of it, so
+# they hold on faster and slower machines alike. Exits with status 1 when a
+# page exceeds its budget.
+#
+#   python benchmarks/bench_import_time.py             # check against the budget
+#   python benchmarks/bench_import_time.py --update    # rewrite the budget
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET_PATH = Path(__file__).with_name('import_budget.json')
+PAGES = ['Home.py'] + sorted(str(p.relative_to(ROOT)) for p in (ROOT / 'pages').glob('*.py'))
+MARKER = '--- page imports ---'
+
+CHILD = '''
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import streamlit
+print(time.perf_counter() - started)
+sys.stderr.write({marker!r} + "\\n")
+started = time.perf_counter()
+exec(compile({source!r}, {page!r}, "exec"), {{"__name__": "page_imports"}})
+print(time.perf_counter() - started)
+'''
+
+
+# Source of the page's module-level import statements
+def top_level_imports(page):
+    tree = ast.parse((ROOT / page).read_text(encoding='utf-8'))
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.unparse(node) for node in nodes)
+
+
+# (seconds, streamlit seconds, [(cumulative seconds, module)]) of one cold
+# import of the page, after that of streamlit itself
+def measure(page):
+    code = CHILD.format(root=str(ROOT), marker=MARKER, source=top_level_imports(page), page=page)
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, check=True,
+                         capture_output=True, text=True)
+    streamlit_seconds, seconds = (float(line) for line in out.stdout.strip().splitlines()[-2:])
+    modules = []
+    after_marker = False
+    for line in out.stderr.splitlines():
+        if line.strip() == MARKER:
+            after_marker = True
+        elif after_marker and line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit() and not name.startswith('  '):
+                modules.append((int(cumulative) / 1e6, name.strip()))
+    return seconds, streamlit_seconds, sorted(modules, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3, help='runs per page; the fastest counts')
+    parser.add_argument('--update', action='store_true',
+                        help='write the measured multiples of import streamlit plus headroom as the budget')
+    parser.add_argument('--headroom', type=float, default=1.2)
+    parser.add_argument('--top', type=int, default=5, help='slowest top-level modules shown per page')
+    args = parser.parse_args()
+
+    budget = json.loads(BUDGET_PATH.read_text()) if BUDGET_PATH.exists() else {}
+    runs = {page: [measure(page) for _ in range(args.repeat)] for page in PAGES}
+    reference = min(streamlit_seconds for page_runs in runs.values() for _, streamlit_seconds, _ in page_runs)
+    measured = {}
+    over = []
+    print(f'import streamlit {reference * 1000:.0f} ms')
+    print(f"{'page':<26} {'ms':>8} {'x st':>8} {'budget':>8}")
+    for page in PAGES:
+        seconds, _, modules = min(runs[page], key=lambda run: run[0])
+        measured[page] = seconds / reference
+        limit = budget.get(page)
+        status = '' if limit is None else ('  OVER' if measured[page] > limit else '')
+        print(f"{page:<26} {seconds * 1000:>8.0f} {measured[page]:>8.2f} "
+              f"{limit if limit is not None else '-':>8}{status}")
+        for cumulative, name in modules[:args.top]:
+            print(f'    {cumulative * 1000:>7.0f} ms  {name}')
+        if status:
+            over.append(page)
+
+    if args.update:
+        BUDGET_PATH.write_text(json.dumps({page: round(ratio * args.headroom, 2) for page, ratio in measured.items()},
+                                          indent=2) + '\n')
+        print(f'budget written to {BUDGET_PATH.name}')
+    elif over:
+        print(f"import budget exceeded: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Peak RSS and throughput of the chunked historical-data ingestion against
+# reading the whole export with pd.read_csv. Each run is a fresh interpreter;
+# the sink discards rows (optionally sleeping per chunk to stand in for a slow
+# database), so only parsing, coercion and back-pressure are measured.
+#
+#   python benchmarks/bench_ingest.py --rows 2000000 --chunk-rows 50000
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+CATEGORIES = ['Medication', 'Medical Supplies', 'Medical Equipment', 'Vaccines']
+
+
+# Synthetic export in the layout of daily.csv, with about 1% unparseable stock levels
+def make_export(path, n_rows, seed=42, block=200_000):
+    rng = np.random.default_rng(seed)
+    with open(path, 'w') as f:
+        f.write('Product_ID,Product_Name,Category,Stock_Level,Max_Capacity,Date_Updated,Expiry_Date\n')
+        for start in range(0, n_rows, block):
+            n = min(block, n_rows - start)
+            ids = np.arange(start, start + n)
+            stock = rng.integers(0, 500, size=n).astype(str).astype(object)
+            stock[rng.random(n) < 0.01] = 'n/a'
+            frame = pd.DataFrame({
+                'Product_ID': [f'P{i:08d}' for i in ids],
+                'Product_Name': [f'Product {i % 5000}' for i in ids],
+                'Category': np.asarray(CATEGORIES)[ids % len(CATEGORIES)],
+                'Stock_Level': stock,
+                'Max_Capacity': 500,
+                'Date_Updated': pd.Timestamp('2023-01-01') + pd.to_timedelta(ids % 365, unit='D'),
+                'Expiry_Date': pd.Timestamp('2025-01-01') + pd.to_timedelta(ids % 730, unit='D'),
+            })
+            frame.to_csv(f, header=False, index=False, date_format='%Y-%m-%d')
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(mode, csv_path, chunk_rows, sink_delay):
+    from demandcast.ingest import coerce_chunk, ingest_csv
+
+    baseline_mb = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == 'read_csv':
+        frame, rejected = coerce_chunk(pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=['']))
+        rows = len(frame)
+    else:
+        def sink(frame):
+            if sink_delay:
+                time.sleep(sink_delay)
+
+        with open(csv_path, 'rb') as source:
+            progress = ingest_csv(source, sink, chunk_rows=chunk_rows)
+        rows, rejected = progress.rows_written, progress.rows_rejected
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'rows': rows, 'rejected': rejected, 'seconds': elapsed,
+                      'peak_rss_mb': peak_rss_mb() - baseline_mb}))
+
+
+def run_child(*args):
+    out = subprocess.run([sys.executable, __file__, '--child', *map(str, args)], check=True, capture_output=True,
+                         text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=50_000)
+    parser.add_argument('--sink-delay', type=float, default=0.05, help='seconds the sink sleeps per chunk')
+    parser.add_argument('--child', nargs=4, metavar=('MODE', 'CSV', 'CHUNK_ROWS', 'SINK_DELAY'))
+    args = parser.parse_args()
+
+    if args.child:
+        mode, csv_path, chunk_rows, sink_delay = args.child
+        child(mode, csv_path, int(chunk_rows), float(sink_delay))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(Path(tmp) / 'history.csv')
+        make_export(csv_path, args.rows)
+        print(f'{args.rows:,} rows, CSV {Path(csv_path).stat().st_size / 1e6:.1f} MB')
+
+        print(f"{'mode':<10} {'rows':>12} {'rejected':>9} {'seconds':>9} {'rows/s':>10} {'peak RSS +MB':>12}")
+        for mode in ['read_csv', 'chunked']:
+            result = run_child(mode, csv_path, args.chunk_rows, args.sink_delay)
+            print(f"{mode:<10} {result['rows']:>12,} {result['rejected']:>9,} {result['seconds']:>9.2f} "
+                  f"{result['rows'] / result['seconds']:>10,.0f} {result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Per-call cost of demandcast.instrument around a trivial function, with
+# instrumentation off (the default) and on:
+#   bare       the function alone
+#   timed      decorated with @timed
+#   span       called inside `with span(...)`
+# Also times one instrumented rerun of --spans spans. Fails when the overhead
+# with instrumentation off exceeds --max-overhead-ns per call. Off, @timed
+# returns the function itself, and a span costs the with statement around a
+# shared no-op: well under a microsecond, against page reruns of tens of
+# milliseconds with a dozen spans.
+#
+#   python benchmarks/bench_instrument.py --calls 1000000
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demandcast import instrument
+
+
+def work(x):
+    return x + 1
+
+
+def per_call_ns(loop, calls, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        loop(calls)
+        best = min(best, time.perf_counter_ns() - started)
+    return best / calls
+
+
+def bare_loop(calls):
+    for i in range(calls):
+        work(i)
+
+
+def timed_loop(function):
+    def loop(calls):
+        for i in range(calls):
+            function(i)
+
+    return loop
+
+
+def span_loop(calls):
+    for i in range(calls):
+        with instrument.span('work'):
+            work(i)
+
+
+def measure(enabled, calls, repeat):
+    instrument.set_enabled(enabled)
+    instrument.recorder.reset()
+    decorated = instrument.timed()(work)
+    bare = per_call_ns(bare_loop, calls, repeat)
+    return {
+        'bare': bare,
+        'timed': per_call_ns(timed_loop(decorated), calls, repeat) - bare,
+        'span': per_call_ns(span_loop, calls, repeat) - bare,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--spans', type=int, default=50)
+    parser.add_argument('--max-overhead-ns', type=float, default=1000.0)
+    args = parser.parse_args()
+
+    print(f'{args.calls:,} calls, best of {args.repeat}')
+    results = {}
+    for enabled in (False, True):
+        results[enabled] = measure(enabled, args.calls, args.repeat)
+        label = 'on' if enabled else 'off'
+        print(f"instrumentation {label:<3}  bare {results[enabled]['bare']:6.1f} ns/call  "
+              f"overhead: timed {results[enabled]['timed']:+7.1f} ns, span {results[enabled]['span']:+7.1f} ns")
+
+    instrument.set_enabled(True)
+    started = time.perf_counter()
+    instrument.start_rerun('bench')
+    for i in range(args.spans):
+        with instrument.span(f'span {i}'):
+            work(i)
+    instrument.finish_rerun()
+    print(f'one rerun of {args.spans} spans recorded in {(time.perf_counter() - started) * 1e6:.0f} us')
+
+    overhead = max(results[False]['timed'], results[False]['span'])
+    if overhead > args.max_overhead_ns:
+        raise SystemExit(f'Overhead with instrumentation off is {overhead:.0f} ns per call '
+                         f'(limit {args.max_overhead_ns:.0f} ns)')
+
+
+if __name__ == '__main__':
+    main()
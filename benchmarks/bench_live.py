@@ -0,0 +1,78 @@
+# Cost of bringing the stock status counts of a daily.csv-style file of --rows
+# rows up to date after --append rows are appended to it:
+#   recompute  pd.read_csv of the whole file, then classify_inventory (what a
+#              Home rerun did per update)
+#   watcher    CsvStatusWatcher.poll, which reads and classifies only the
+#              appended bytes
+# Both must give the same counts.
+#
+#   python benchmarks/bench_live.py --rows 2000000 --append 100
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+COLUMNS = ['Product_ID', 'Product_Name', 'Category', 'Stock_Level', 'Max_Capacity', 'Date_Updated']
+
+
+def make_rows(n, seed):
+    rng = np.random.default_rng(seed)
+    capacity = rng.integers(50, 500, size=n)
+    return pd.DataFrame({
+        'Product_ID': [f'P{i:07d}' for i in range(n)],
+        'Product_Name': 'Product',
+        'Category': 'Medication',
+        'Stock_Level': (capacity * rng.random(n)).astype(np.int64) * (rng.random(n) > 0.05),
+        'Max_Capacity': capacity,
+        'Date_Updated': '2024-01-01',
+    }, columns=COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--append', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    from demandcast.live import CsvStatusWatcher
+    from demandcast.status import classify_inventory
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'daily.csv')
+        make_rows(args.rows, seed=0).to_csv(path, index=False)
+        watcher = CsvStatusWatcher(path)
+        started = time.perf_counter()
+        watcher.poll()
+        print(f'{args.rows:,} rows; first read {time.perf_counter() - started:.2f} s; '
+              f'{args.rounds} rounds of {args.append:,} appended rows')
+
+        recompute_seconds = watcher_seconds = 0.0
+        same = True
+        for round_ in range(args.rounds):
+            make_rows(args.append, seed=round_ + 1).to_csv(path, mode='a', header=False, index=False)
+
+            started = time.perf_counter()
+            watcher.poll()
+            watcher_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            _, summary = classify_inventory(pd.read_csv(path))
+            recompute_seconds += time.perf_counter() - started
+            same = same and summary['counts'] == watcher.summary()['counts']
+
+        recompute_ms = recompute_seconds * 1000 / args.rounds
+        watcher_ms = watcher_seconds * 1000 / args.rounds
+        print(f'recompute  {recompute_ms:9.2f} ms per update')
+        print(f'watcher    {watcher_ms:9.2f} ms per update  ({recompute_ms / watcher_ms:,.0f}x)')
+        print(f'  same counts: {same}, {watcher.appends} appends, {watcher.rebuilds} full read(s)')
+
+
+if __name__ == '__main__':
+    main()
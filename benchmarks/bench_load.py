@@ -0,0 +1,379 @@
+# Concurrent-session load test of the Streamlit pages. --sessions sessions
+# (spread over --pages) run at once on their own threads, as a Streamlit
+# server runs them, each through Streamlit's AppTest. Every session loads its
+# page and then goes through the page's widget interactions --iterations
+# times, timing each rerun. The pages read synthetic daily.csv and
+# processed_inventory.csv files of --products and --items x --periods rows in
+# a temporary directory, and a mongomock client stands in for MongoDB.
+#
+# Reports rerun latency percentiles (p50/p95/p99) per page and overall, runs
+# (loads and reruns) per second, and peak RSS above the warmed-up process per
+# session. Every page is run once before the sessions start, so imports and
+# caches are warm.
+#
+# Latency and throughput are also expressed in units of a fixed reference
+# workload timed in the same run, which is what load_baseline.json records and
+# the gate compares, so a baseline from one machine holds on another. Exits with
+# status 1 on a failed rerun, or when one of these is worse than the baseline
+# (recorded with the same settings) by more than --tolerance times: p50 and
+# p95 over all reruns, throughput and memory per session. p99 rests on too few
+# reruns to gate, and each page's percentiles mix its fast and slow actions, so
+# those are only reported.
+#
+#   python benchmarks/bench_load.py                       # check against the baseline
+#   python benchmarks/bench_load.py --update              # rewrite the baseline
+#   python benchmarks/bench_load.py --sessions 32 --products 100000 --items 2000
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).with_name('load_baseline.json')
+PAGES = ['Home.py', 'pages/predict.py', 'pages/EmergencyStock.py', 'pages/Track.py', 'pages/inventory.py']
+CATEGORIES = ['Medication', 'Medical Supplies', 'Medical Equipment']
+SUPPLIERS = [f'Supplier {letter}' for letter in 'ABCDEFGH']
+TEMPERATURES = ['Room Temperature', 'Cool Storage', 'Frozen', 'None']
+FAST_ENGINES = ['ses', 'holt', 'moving_average', 'croston', 'seasonal_naive']
+
+
+def make_daily(path, n_products, rng):
+    capacity = rng.integers(50, 500, size=n_products)
+    today = pd.Timestamp.today().normalize()
+    pd.DataFrame({
+        'Product_ID': [f'P{i:07d}' for i in range(n_products)],
+        'Product_Name': [f'Product {i % 500}' for i in range(n_products)],
+        'Category': np.asarray(CATEGORIES)[rng.integers(0, len(CATEGORIES), n_products)],
+        'Stock_Level': (capacity * rng.uniform(0, 1.1, n_products)).astype(np.int64) * (rng.random(n_products) > 0.05),
+        'Max_Capacity': capacity,
+        'Date_Updated': today.strftime('%Y-%m-%d'),
+        # a few percent expired, the rest over the next three years
+        'Expiry_Date': (today + pd.to_timedelta(rng.integers(-30, 1095, n_products), unit='D')).strftime('%Y-%m-%d'),
+        'Forecasted_Demand': rng.integers(10, 200, n_products),
+        'Emergency_Stock_Level': rng.integers(5, 50, n_products),
+        'Temperature_Requirement': np.asarray(TEMPERATURES)[rng.integers(0, len(TEMPERATURES), n_products)],
+        'Compliance_Status': 'Compliant',
+    }).to_csv(path, index=False)
+
+
+def make_ledger(path, n_items, n_periods, rng):
+    dates = pd.date_range('2020-01-01', periods=n_periods, freq='MS')
+    item_category = rng.integers(0, len(CATEGORIES), n_items)
+    item_supplier = rng.integers(0, len(SUPPLIERS), n_items)
+    items = np.tile(np.arange(n_items), n_periods)
+    used = rng.poisson(40, size=len(items))
+    pd.DataFrame({
+        'Date': np.repeat(dates, n_items).strftime('%Y-%m-%d'),
+        'Item ID': items + 1000,
+        'Item Name': [f'Item {item}' for item in items],
+        'Category': np.asarray(CATEGORIES)[item_category[items]],
+        'Units Received': used + rng.integers(0, 20, len(items)),
+        'Units Used': used,
+        'Units in Stock': rng.integers(0, 2000, len(items)),
+        'Supplier': np.asarray(SUPPLIERS)[item_supplier[items]],
+    }).to_csv(path, index=False)
+
+
+# mongomock client with the inventory and historical databases of the daily
+# snapshot's products, patched in as the shared MongoDB client. Stock figures
+# are numbers in the inventory database, as the stock report form writes them;
+# the historical one keeps the strings of an uploaded CSV.
+def mongo_stand_in(daily_path):
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit('The load test needs mongomock as its MongoDB stand-in: pip install mongomock') from None
+    import demandcast.mongo_client as mongo_client
+
+    client = mongomock.MongoClient()
+    products = pd.read_csv(daily_path, dtype=str)
+    inventory, history = client['inventory_database'], client['historical_inventory_database']
+    inventory['categories'].insert_many([{'Category': category} for category in CATEGORIES])
+    for category, group in products.groupby('Category'):
+        records = group.drop(columns='Category').to_dict('records')
+        inventory[f'{category}_collection'].insert_many([
+            dict(record, Stock_Level=int(record['Stock_Level']), Max_Capacity=int(record['Max_Capacity']))
+            for record in records])
+        history[category].insert_many([dict(record) for record in records])
+    mongo_client.MongoClient = lambda *args, **kwargs: client
+    os.environ[mongo_client.URI_ENV] = 'mongodb://localhost:27017/'
+    return client
+
+
+# AppTest is written for one session at a time: every run compiles the page
+# again, installs its own Runtime and clears it when done, resets the
+# process-wide "app has a pages/ directory" flag, and patches config.get_option
+# to report global.appTest only while it runs, all under the feet of the other
+# sessions' runs. Share what the server shares between sessions instead: one
+# script cache (reruns reuse the bytecode, and sessions never compile at once,
+# which can fail on Python 3.11), one Runtime (the first one AppTest installs),
+# the flag, left as the first run sets it (AppTest's reset lands on a
+# subclass), and global.appTest, set for the whole run (a session whose widgets
+# ran while another session's patch was undone cannot be driven afterwards).
+def share_runtime():
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+    config.get_option = build_mock_config_get_option({'global.appTest': True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+    app_test.PagesManager = type('SessionPagesManager', (PagesManager,), {})
+    shared = []
+
+    def instance(cls):
+        if not shared and cls._instance is not None:
+            shared.append(cls._instance)
+        if not shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: bool(shared) or cls._instance is not None)
+
+
+# A session of the multipage app opened on page: Home.py is the main script,
+# as under `streamlit run Home.py`, so every session sees the same pages
+def open_page(app_test, page):
+    at = app_test.from_file(str(ROOT / PAGES[0]), default_timeout=600)
+    return at if page == PAGES[0] else at.switch_page(str(ROOT / page))
+
+
+def widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+# Widget interactions of each page: (name, action) pairs, each followed by a
+# timed rerun. rng is the session's own random generator.
+SCENARIOS = {
+    'Home.py': [
+        ('move slider', lambda at, rng: widget(at.sidebar.slider, 'Predicted Stock Level').set_value(
+            int(rng.integers(0, 201)))),
+        ('update metrics', lambda at, rng: widget(at.sidebar.button, 'Update Metrics').click()),
+    ],
+    'pages/predict.py': [
+        ('change engine', lambda at, rng: widget(at.selectbox, 'Forecasting engine:').select(
+            str(rng.choice(FAST_ENGINES)))),
+        ('forecast hierarchy', lambda at, rng: (
+            widget(at.selectbox, 'Reconciliation method:').select(str(rng.choice(['ols', 'mint_diag', 'bottom_up']))),
+            widget(at.button, 'Forecast Hierarchy').click())),
+    ],
+    'pages/EmergencyStock.py': [
+        ('service level', lambda at, rng: widget(at.slider, 'Service Level').set_value(
+            round(float(rng.choice(np.arange(0.80, 1.0, 0.01))), 2))),
+        ('lead time', lambda at, rng: widget(at.number_input, 'Lead Time (days)').set_value(
+            float(rng.integers(1, 31)))),
+    ],
+    'pages/Track.py': [
+        ('expiry tracking', lambda at, rng: widget(at.button, 'Expiry Tracking').click()),
+        ('compliance section', lambda at, rng: widget(at.button, 'Regulatory Compliance').click()),
+        ('compliance audit', lambda at, rng: widget(at.button, 'Run Compliance Audit').click()),
+        ('check product', lambda at, rng: (
+            widget(at.text_input, 'Enter Product ID:').set_value(f'P{int(rng.integers(0, 100)):07d}'),
+            widget(at.button, 'Check Compliance').click())),
+        ('temperature section', lambda at, rng: widget(at.button, 'Temperature Sensitive ').click()),
+    ],
+    'pages/inventory.py': [
+        ('summary tab', lambda at, rng: widget(at.sidebar.selectbox, 'Choose an action').select('Home')),
+        ('rebuild summary', lambda at, rng: widget(at.button, 'Rebuild Summary').click()),
+        ('stock report tab', lambda at, rng: widget(at.sidebar.selectbox, 'Choose an action').select('Stock Report')),
+        ('view category', lambda at, rng: widget(at.selectbox, 'Select an action').select('View')),
+        ('next page', lambda at, rng: widget(at.button, 'Next').click()),
+    ],
+}
+
+
+# Fixed CPU work of roughly one rerun's size: a pandas aggregation and building
+# and serializing Python objects. Timings of repeat runs, in seconds; the
+# fastest is the one least disturbed by other threads and processes.
+def reference_timings(repeat=7):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'key': rng.integers(0, 1000, 200_000), 'value': rng.random(200_000)})
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        frame.groupby('key')['value'].agg(['sum', 'mean', 'std'])
+        json.dumps([{'id': i, 'name': f'item {i}', 'value': i / 7} for i in range(20_000)])
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def rss_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# One session: load the page, then --iterations rounds of its interactions.
+# Appends (page, kind, action, seconds, error) samples; a session that breaks
+# down in AppTest itself ends with a failed 'session' sample.
+def run_session(app_test, page, iterations, seed, barrier, samples, lock):
+    rng = np.random.default_rng(seed)
+    barrier.wait()
+    results = []
+    try:
+        started = time.perf_counter()
+        at = open_page(app_test, page).run()
+        results.append((page, 'load', 'load', time.perf_counter() - started,
+                        at.exception[0].value if at.exception else None))
+        for _ in range(iterations):
+            for action, interact in SCENARIOS[page]:
+                try:
+                    interact(at, rng)
+                except StopIteration:
+                    results.append((page, 'rerun', action, 0.0, f'widget for {action!r} not found'))
+                    continue
+                except Exception as exc:
+                    results.append((page, 'rerun', action, 0.0, f'{type(exc).__name__}: {exc}'))
+                    continue
+                started = time.perf_counter()
+                at = at.run()
+                results.append((page, 'rerun', action, time.perf_counter() - started,
+                                at.exception[0].value if at.exception else None))
+    except Exception as exc:
+        results.append((page, 'session', 'session', 0.0, f'{type(exc).__name__}: {exc}'))
+    finally:
+        with lock:
+            samples.extend(results)
+
+
+def percentiles(seconds):
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99]) if len(seconds) else (0.0, 0.0, 0.0)
+    return {'p50_ms': round(float(p50), 1), 'p95_ms': round(float(p95), 1), 'p99_ms': round(float(p99), 1)}
+
+
+# Latency and throughput compared in reference units, memory in MB
+def check(results, baseline, settings, tolerance):
+    if baseline.get('settings') != settings or 'reference_ms' not in baseline:
+        print(f'baseline recorded with {baseline.get("settings")}, not compared')
+        return []
+    regressions = [f'{page}: missing from this run' for page in baseline['pages'] if page not in results['pages']]
+    for metric in ('p50_ms', 'p95_ms'):
+        now = results['overall'][metric] / results['reference_ms']
+        then = baseline['overall'][metric] / baseline['reference_ms']
+        if now > then * tolerance:
+            regressions.append(f'overall: {metric} {now:.1f} > {tolerance}x baseline {then:.1f} reference units')
+    now = results['runs_per_second'] * results['reference_ms'] / 1000
+    then = baseline['runs_per_second'] * baseline['reference_ms'] / 1000
+    if now < then / tolerance:
+        regressions.append(f'throughput {now:.3f} runs per reference unit < baseline {then:.3f} / {tolerance}')
+    if results['mb_per_session'] > baseline['mb_per_session'] * tolerance:
+        regressions.append(f"memory {results['mb_per_session']:.1f} MB/session > {tolerance}x baseline "
+                           f"{baseline['mb_per_session']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--iterations', type=int, default=3, help='rounds of interactions per session')
+    parser.add_argument('--pages', nargs='+', default=PAGES, choices=PAGES)
+    parser.add_argument('--products', type=int, default=5_000, help='rows of daily.csv and MongoDB products')
+    parser.add_argument('--items', type=int, default=200, help='items in processed_inventory.csv')
+    parser.add_argument('--periods', type=int, default=36, help='months of ledger history per item')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=2.0)
+    parser.add_argument('--update', action='store_true', help='write this run as the baseline')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    logging.disable(logging.WARNING)
+    work_dir = tempfile.mkdtemp(prefix='demandcast-load-')
+    os.environ['DEMANDCAST_OUTPUT_DIR'] = os.path.join(work_dir, 'outputs')
+    os.environ['DEMANDCAST_MODEL_CACHE'] = os.path.join(work_dir, 'models')
+    os.environ['DEMANDCAST_ORDER_MEMO'] = os.path.join(work_dir, 'orders')
+    os.chdir(work_dir)
+    rng = np.random.default_rng(args.seed)
+    make_daily('daily.csv', args.products, rng)
+    make_ledger('processed_inventory.csv', args.items, args.periods, rng)
+    mongo_stand_in('daily.csv')
+    share_runtime()
+    from streamlit.testing.v1 import AppTest
+
+    from demandcast.live import stop_watchers
+
+    for page in args.pages:
+        at = open_page(AppTest, page).run()
+        if at.exception:
+            raise SystemExit(f'{page} raised on its warm-up run: {at.exception[0].value}')
+    baseline_mb = rss_mb('VmRSS')
+    reference = reference_timings()
+
+    session_pages = [args.pages[i % len(args.pages)] for i in range(args.sessions)]
+    samples, lock = [], threading.Lock()
+    barrier = threading.Barrier(args.sessions + 1)
+    threads = [threading.Thread(target=run_session, args=(AppTest, page, args.iterations, args.seed + i, barrier,
+                                                         samples, lock))
+               for i, page in enumerate(session_pages)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    stop_watchers()
+    reference_ms = min(reference + reference_timings()) * 1000
+
+    frame = pd.DataFrame(samples, columns=['page', 'kind', 'action', 'seconds', 'error'])
+    reruns = frame[frame['kind'] == 'rerun']
+    results = {
+        'reference_ms': round(reference_ms, 2),
+        'overall': percentiles(reruns['seconds']),
+        'pages': {page: percentiles(group['seconds']) for page, group in reruns.groupby('page')},
+        'runs_per_second': round(len(frame) / wall, 2),
+        'mb_per_session': round(max(rss_mb('VmHWM') - baseline_mb, 0.0) / args.sessions, 1),
+    }
+
+    print(f'{args.sessions} sessions x {args.iterations} rounds over {len(args.pages)} pages; '
+          f'{args.products:,} products, {args.items:,} items x {args.periods} months')
+    print(f'reference workload {reference_ms:.1f} ms')
+    print(f"{'page':<26} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'load p50':>9}")
+    for page in args.pages:
+        stats = results['pages'].get(page, percentiles([]))
+        loads = frame[(frame['page'] == page) & (frame['kind'] == 'load')]['seconds']
+        print(f"{page:<26} {int((reruns['page'] == page).sum()):>7} {stats['p50_ms']:>8.0f} {stats['p95_ms']:>8.0f} "
+              f"{stats['p99_ms']:>8.0f} {loads.median() * 1000 if len(loads) else 0:>9.0f}")
+    overall = results['overall']
+    print(f"{'all reruns':<26} {len(reruns):>7} {overall['p50_ms']:>8.0f} {overall['p95_ms']:>8.0f} "
+          f"{overall['p99_ms']:>8.0f}")
+    print(f"{results['runs_per_second']:.1f} runs/s over {wall:.1f} s; peak RSS "
+          f"+{results['mb_per_session'] * args.sessions:.0f} MB, {results['mb_per_session']:.1f} MB per session")
+
+    failures = frame[frame['error'].notna()]
+    for row in failures.head(10).itertuples():
+        print(f'  {row.page} {row.action}: {row.error}')
+
+    settings = {name: getattr(args, name) for name in ('sessions', 'iterations', 'pages', 'products', 'items',
+                                                       'periods', 'seed')}
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(dict(results, settings=settings), indent=2) + '\n')
+        print(f'baseline written to {BASELINE_PATH.name}')
+    regressions = [f'{len(failures)} runs failed'] if len(failures) else []
+    if not args.update and BASELINE_PATH.exists():
+        regressions += check(results, json.loads(BASELINE_PATH.read_text()), settings, args.tolerance)
+    if regressions:
+        print('Load test failed:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
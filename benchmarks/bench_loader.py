@@ -0,0 +1,85 @@
+# Cold parse, cache hit and append-only reparse of a daily.csv-style export
+# through demandcast.loader, checked against a full parse. The repo's own
+# exports are loaded first: new.csv lacks Expiry_Date and must still load.
+#
+#   python benchmarks/bench_loader.py --rows 1000000 --append 10000
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from demandcast.loader import DAILY_SCHEMA, FrameCache, load_csv
+
+
+# Synthetic daily snapshot with every DAILY_SCHEMA column
+def make_daily(n_rows, seed=42, start=0):
+    rng = np.random.default_rng(seed)
+    max_capacity = rng.integers(50, 500, size=n_rows)
+    return pd.DataFrame({
+        'Product_ID': [f'P{i:08d}' for i in range(start, start + n_rows)],
+        'Product_Name': [f'Product {i % 1000}' for i in range(start, start + n_rows)],
+        'Category': rng.choice(['Medicine', 'Medical Supplies', 'Medical Equipment'], size=n_rows),
+        'Stock_Level': (max_capacity * rng.uniform(0, 1.1, size=n_rows)).astype(np.int64),
+        'Max_Capacity': max_capacity,
+        'Date_Updated': pd.Timestamp('2024-07-15').strftime('%Y-%m-%d'),
+        'Expiry_Date': (pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 730, size=n_rows), unit='D'))
+        .strftime('%Y-%m-%d'),
+        'Forecasted_Demand': rng.integers(0, 100, size=n_rows),
+        'Emergency_Stock_Level': rng.integers(0, 50, size=n_rows),
+        'Temperature_Requirement': rng.choice(['Room Temperature', 'Cool Storage'], size=n_rows),
+        'Compliance_Status': 'Compliant',
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def check_exports():
+    for name in ['daily.csv', 'new.csv']:
+        frame = load_csv(str(ROOT / name), DAILY_SCHEMA, cache=FrameCache())
+        header = list(pd.read_csv(ROOT / name, nrows=0).columns)
+        if list(frame.columns) != header:
+            raise SystemExit(f'{name}: loaded columns {list(frame.columns)} != header {header}')
+        for column in DAILY_SCHEMA['parse_dates']:
+            if column in frame and not pd.api.types.is_datetime64_any_dtype(frame[column]):
+                raise SystemExit(f'{name}: {column} was not parsed as a date')
+        print(f'{name}: {len(frame):,} rows, {len(frame.columns)} columns')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--append', type=int, default=10_000)
+    args = parser.parse_args()
+
+    check_exports()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'daily.csv')
+        make_daily(args.rows).to_csv(path, index=False)
+        cache = FrameCache()
+        cold, _ = timed(lambda: load_csv(path, DAILY_SCHEMA, cache=cache))
+        hit, _ = timed(lambda: load_csv(path, DAILY_SCHEMA, cache=cache))
+        make_daily(args.append, seed=7, start=args.rows).to_csv(path, mode='a', header=False, index=False)
+        append, appended = timed(lambda: load_csv(path, DAILY_SCHEMA, cache=cache))
+        full = load_csv(path, DAILY_SCHEMA, cache=FrameCache())
+        if cache.appends != 1:
+            raise SystemExit(f'expected one append-only reparse, got {cache.appends}')
+        pd.testing.assert_frame_equal(appended, full, check_categorical=False)
+
+    print(f"{'rows':>12} {'cold s':>9} {'hit ms':>9} {'append s':>10}")
+    print(f'{args.rows:>12,} {cold:>9.3f} {hit * 1000:>9.2f} {append:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Latency of the predict page with a cold and a warm forecast model cache.
+# The page is run headless through Streamlit's AppTest against a throwaway cache
+# directory; the first run only warms imports and is not reported.
+#
+#   python benchmarks/bench_model_cache.py --runs 5
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def run_page(app_test, path):
+    started = time.perf_counter()
+    at = app_test.from_file(str(path), default_timeout=300).run()
+    if at.exception:
+        raise SystemExit(f'{path.name} raised: {at.exception[0].value}')
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    warnings.simplefilter('ignore')
+    os.environ['DEMANDCAST_MODEL_CACHE'] = tempfile.mkdtemp(prefix='demandcast-models-')
+    from streamlit.testing.v1 import AppTest
+    from demandcast.model_cache import default_cache
+
+    page = ROOT / 'pages' / 'predict.py'
+    run_page(AppTest, page)
+
+    cold, warm = [], []
+    for _ in range(args.runs):
+        default_cache.clear()
+        cold.append(run_page(AppTest, page))
+        warm.append(run_page(AppTest, page))
+
+    print(f"{'cache':<6} {'p50 ms':>8} {'min ms':>8} {'max ms':>8}")
+    for name, samples in [('cold', cold), ('warm', warm)]:
+        print(f'{name:<6} {statistics.median(samples) * 1000:>8.1f} {min(samples) * 1000:>8.1f} '
+              f'{max(samples) * 1000:>8.1f}')
+    print(f'hits={default_cache.hits} misses={default_cache.misses} extends={default_cache.extends} '
+          f'speedup={statistics.median(cold) / statistics.median(warm):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Payload size and build + serialize time of the stock-level chart, drawn the
+# old way (every point in an SVG Scatter, the prediction as an N-point trace)
+# and through demandcast.plotting (downsampled Scattergl, prediction as a
+# shape). Serialization time stands in for render time: browser rendering is
+# not measurable headless, and it grows with the points shipped.
+#
+#   python benchmarks/bench_plotting.py --sizes 10000 100000 1000000 --width 1200
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demandcast.plotting import add_reference_line, line_trace, max_points_for_width
+
+
+def full_figure(x, y, predicted):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=y, mode='lines+markers', name='Actual Stock Level'))
+    fig.add_trace(go.Scatter(x=x, y=[predicted] * len(x), mode='lines', name='Predicted Stock Level'))
+    return fig
+
+
+def downsampled_figure(x, y, predicted, max_points, method):
+    fig = go.Figure()
+    fig.add_trace(line_trace(x, y, name='Actual Stock Level', max_points=max_points, method=method, markers=True))
+    add_reference_line(fig, predicted, name='Predicted Stock Level', dash='dash')
+    return fig
+
+
+def measure(build, repeat):
+    best, payload = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = build().to_json()
+        best = min(best, time.perf_counter() - started)
+    return len(payload.encode()), best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--width', type=int, default=1200, help='chart width in pixels')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    max_points = max_points_for_width(args.width)
+    print(f'downsampling to {max_points:,} points ({args.width}px)')
+    print(f"{'points':>10} {'variant':<10} {'payload MB':>11} {'seconds':>9}")
+    for n in args.sizes:
+        x = np.arange(n)
+        y = 100 + np.cumsum(rng.normal(0, 1, n))
+        variants = [
+            ('full', lambda: full_figure(x, y, 70)),
+            ('lttb', lambda: downsampled_figure(x, y, 70, max_points, 'lttb')),
+            ('minmax', lambda: downsampled_figure(x, y, 70, max_points, 'minmax')),
+        ]
+        for name, build in variants:
+            size, seconds = measure(build, args.repeat)
+            print(f'{n:>10,} {name:<10} {size / 1e6:>11.2f} {seconds:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Reconciliation time and peak traced memory of a synthetic Total -> Category
+# -> Item hierarchy (plus a Supplier grouping with --suppliers) as it grows to
+# --leaves items, --steps horizons of random base forecasts per node:
+#   build        summing matrix from the item table
+#   <method>     reconcile() with each method
+#   loop         bottom-up by a Python loop summing the leaves under each node
+# Up to --dense-check nodes, the MinT methods are checked against the dense
+# textbook formula S (S' W^-1 S)^-1 S' W^-1 y^, timed as 'dense'.
+#
+#   python benchmarks/bench_reconcile.py --leaves 1000 10000 100000
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def make_items(n_leaves, leaves_per_category, suppliers, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Item ID': np.arange(n_leaves),
+        'Category': [f'C{code:05d}' for code in rng.integers(0, max(1, n_leaves // leaves_per_category), n_leaves)],
+        'Supplier': [f'S{code:03d}' for code in rng.integers(0, suppliers, n_leaves)],
+    })
+
+
+# Time of one run, and the peak traced memory of a second run (tracing slows
+# pandas down too much to time the same run)
+def measure(function):
+    started = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def loop_bottom_up(hierarchy, base):
+    summing = hierarchy.summing.tocsr()
+    leaves = base[hierarchy.n_aggregates:]
+    forecasts = np.empty_like(base)
+    for node in range(summing.shape[0]):
+        forecasts[node] = leaves[summing.indices[summing.indptr[node]:summing.indptr[node + 1]]].sum(axis=0)
+    return forecasts
+
+
+def dense_reference(hierarchy, base, weights):
+    summing = hierarchy.summing.toarray()
+    inverse = np.linalg.inv(weights if weights.ndim == 2 else np.diag(weights))
+    return summing @ np.linalg.solve(summing.T @ inverse @ summing, summing.T @ inverse @ base)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--leaves', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--leaves-per-category', type=int, default=100)
+    parser.add_argument('--suppliers', type=int, default=0, help='also group the items by this many suppliers')
+    parser.add_argument('--steps', type=int, default=12)
+    parser.add_argument('--observations', type=int, default=36, help='residual observations per node (MinT)')
+    parser.add_argument('--dense-check', type=int, default=2000)
+    args = parser.parse_args()
+
+    # scipy is imported up front, not inside the first timing
+    import scipy.sparse.linalg
+
+    from demandcast.reconcile import MAX_DENSE_NODES, build_hierarchy, reconcile, shrunk_covariance
+
+    levels = [[], ['Category']] + ([['Supplier']] if args.suppliers else [])
+    rng = np.random.default_rng(0)
+    for n_leaves in args.leaves:
+        items = make_items(n_leaves, args.leaves_per_category, args.suppliers or 1)
+        hierarchy, seconds, peak_mb = measure(lambda: build_hierarchy(items, levels=levels))
+        n_nodes = hierarchy.summing.shape[0]
+        print(f'{n_leaves:,} leaves, {n_nodes:,} nodes, {args.steps} steps')
+        print(f'  {"build":<12} {seconds * 1000:9.1f} ms  peak {peak_mb:8.1f} MB')
+
+        base = rng.gamma(2.0, 50.0, size=(n_nodes, args.steps))
+        residuals = rng.normal(0.0, 10.0, size=(n_nodes, args.observations))
+        leaf_history = rng.gamma(2.0, 50.0, size=(n_leaves, args.observations))
+        methods = ['bottom_up', 'top_down', 'ols', 'wls_struct', 'mint_diag']
+        if n_nodes <= MAX_DENSE_NODES:
+            methods.append('mint_shrink')
+        for method in methods:
+            result, seconds, peak_mb = measure(lambda: reconcile(hierarchy, base, method, residuals=residuals,
+                                                                  leaf_history=leaf_history))
+            line = (f'  {method:<12} {seconds * 1000:9.1f} ms  peak {peak_mb:8.1f} MB  '
+                    f'incoherence {result.incoherence:.1e}')
+            if n_nodes <= args.dense_check and method not in ('bottom_up', 'top_down'):
+                weights = {'ols': np.ones(n_nodes),
+                           'wls_struct': np.asarray(hierarchy.summing.sum(axis=1)).ravel(),
+                           'mint_diag': (residuals ** 2).mean(axis=1)}.get(method)
+                weights = weights if weights is not None else shrunk_covariance(residuals)
+                started = time.perf_counter()
+                reference = dense_reference(hierarchy, base, weights)
+                line += (f'  dense {(time.perf_counter() - started) * 1000:7.1f} ms, '
+                         f'max diff {np.abs(result.forecasts - reference).max():.1e}')
+            print(line)
+
+        forecasts, seconds, peak_mb = measure(lambda: loop_bottom_up(hierarchy, base))
+        same = np.allclose(forecasts, reconcile(hierarchy, base, 'bottom_up').forecasts)
+        print(f'  {"loop":<12} {seconds * 1000:9.1f} ms  peak {peak_mb:8.1f} MB  same as bottom_up: {same}')
+
+
+if __name__ == '__main__':
+    main()
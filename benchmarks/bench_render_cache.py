@@ -0,0 +1,91 @@
+# Simulate Home.py reruns: draw the status pie and the inventory pyramid for
+# a handful of recurring inputs
+#   leaking  new figures every rerun, never closed, as st.pyplot left them
+#            (capped at --leak-reruns: it grows by several MB per rerun)
+#   closed   new figures every rerun, closed after rendering
+#   cached   through the render cache
+# Reports the cache hit ratio, time per rerun and process RSS as the reruns
+# accumulate. Each mode runs in its own interpreter so RSS starts from the
+# same baseline.
+#
+#   python benchmarks/bench_render_cache.py --reruns 1000 --distinct 4
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# Status counts of the i-th distinct dataset
+def inputs(i):
+    low, arriving, out = 5 + i, 12 + 2 * i, 3 + i
+    total = low + arriving + out
+    return (low * 100 / total, arriving * 100 / total, out * 100 / total), (low, arriving, out)
+
+
+def child(mode, reruns, distinct, every):
+    import matplotlib.pyplot as plt
+
+    from demandcast.charts import RenderCache, render, status_pie, stock_pyramid
+
+    cache = RenderCache()
+    samples = []
+    started = time.perf_counter()
+    for rerun in range(1, reruns + 1):
+        sizes, counts = inputs(rerun % distinct)
+        if mode == 'cached':
+            render(status_pie, sizes, dpi=200, cache=cache)
+            render(stock_pyramid, *counts, dpi=200, cache=cache)
+        else:
+            for fig in [status_pie(sizes), stock_pyramid(*counts)]:
+                fig.savefig(io.BytesIO(), format='png', dpi=200, bbox_inches='tight')
+                if mode == 'closed':
+                    plt.close(fig)
+        if rerun % every == 0:
+            samples.append((rerun, rss_mb()))
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        'hit_ratio': cache.hit_ratio if mode == 'cached' else None,
+        'samples': samples,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reruns', type=int, default=1000)
+    parser.add_argument('--distinct', type=int, default=4, help='distinct input sets cycled through')
+    parser.add_argument('--every', type=int, default=200, help='reruns between RSS samples')
+    parser.add_argument('--leak-reruns', type=int, default=100, help='reruns of the leaking mode')
+    parser.add_argument('--child', nargs=4, metavar=('MODE', 'RERUNS', 'DISTINCT', 'EVERY'))
+    args = parser.parse_args()
+
+    if args.child:
+        mode, reruns, distinct, every = args.child
+        child(mode, int(reruns), int(distinct), int(every))
+        return
+
+    for mode in ['leaking', 'closed', 'cached']:
+        reruns = min(args.reruns, args.leak_reruns) if mode == 'leaking' else args.reruns
+        every = min(args.every, max(reruns // 4, 1))
+        out = subprocess.run([sys.executable, '-W', 'ignore', __file__, '--child', mode, str(reruns),
+                              str(args.distinct), str(every)], check=True, capture_output=True, text=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        ratio = f", hit ratio {result['hit_ratio']:.3f}" if result['hit_ratio'] is not None else ''
+        print(f"{mode}: {reruns} reruns, {result['seconds'] * 1000 / reruns:.2f} ms/rerun{ratio}")
+        print('  RSS MB by rerun: ' + ', '.join(f'{rerun}: {mb:.0f}' for rerun, mb in result['samples']))
+
+
+if __name__ == '__main__':
+    main()
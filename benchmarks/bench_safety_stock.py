@@ -0,0 +1,135 @@
+# Safety stock and reorder points for a synthetic ledger of --items items with
+# --days of daily Units Used history (100k items x 3 years, about 70M rows by
+# default). Times the vectorized safety_stock_table against a per-item loop,
+# which is run on --loop-items items and extrapolated, and checks that both
+# agree on those items, and that splitting every row of those items in two (a
+# ledger with several rows per item and date) gives the same table. Each run is
+# a fresh interpreter so the reported peak RSS is the computation's own.
+#
+#   python benchmarks/bench_safety_stock.py --items 100000 --days 1095
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+# Daily rows of every item from its (random) first day on, item-major like a
+# ledger sorted by item. Days without demand have no row, as in a sparse ledger.
+def synthetic_ledger(items, days, seed=0):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, days // 2, size=items)
+    lengths = days - start
+    item_ids = np.repeat(np.arange(1, items + 1, dtype=np.int32), lengths)
+    offsets = np.arange(len(item_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(start, lengths)
+    rates = rng.gamma(0.8, 10.0, size=items)
+    used = rng.poisson(np.repeat(rates, lengths)).astype(np.int32)
+    del lengths, start
+    dates = np.datetime64('2021-01-01', 'D') + offsets.astype('timedelta64[D]')
+    del offsets
+    keep = used > 0
+    return pd.DataFrame({'Date': dates[keep].astype('datetime64[ns]'), 'Item ID': item_ids[keep],
+                         'Units Used': used[keep]})
+
+
+# The same statistics one item at a time, as a Python loop over groups
+def loop_table(ledger, lead_time_days, service_level):
+    from statistics import NormalDist
+
+    import numpy as np
+    import pandas as pd
+
+    all_dates = pd.DatetimeIndex(np.sort(ledger['Date'].unique()))
+    z = NormalDist().inv_cdf(service_level)
+    rows = {}
+    for item, group in ledger.groupby('Item ID'):
+        series = group.set_index('Date')['Units Used'].reindex(all_dates[all_dates >= group['Date'].min()],
+                                                              fill_value=0)
+        mean, std = series.mean(), series.std()
+        safety = np.ceil(z * np.sqrt(lead_time_days * std ** 2))
+        rows[item] = (mean, std, safety, np.ceil(mean * lead_time_days + safety))
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['mean_demand', 'std_demand', 'safety_stock',
+                                                                 'reorder_point'])
+
+
+def child(items, days, loop_items):
+    import numpy as np
+    import pandas as pd
+
+    from demandcast.safety_stock import safety_stock_table
+
+    started = time.perf_counter()
+    ledger = synthetic_ledger(items, days)
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table = safety_stock_table(ledger, lead_time_days=14, service_level=0.95)
+    vectorized = time.perf_counter() - started
+    rows = len(ledger)
+
+    sample = ledger[ledger['Item ID'] <= loop_items]
+    started = time.perf_counter()
+    reference = loop_table(sample, 14, 0.95)
+    looped = time.perf_counter() - started
+    expected = table.loc[reference.index, reference.columns].to_numpy(dtype=np.float64)
+    agree = bool(np.allclose(expected, reference.to_numpy(), rtol=1e-9, atol=1e-9))
+
+    half = sample.assign(**{'Units Used': sample['Units Used'] // 2})
+    split = pd.concat([half, sample.assign(**{'Units Used': sample['Units Used'] - half['Units Used']})])
+    split_agree = safety_stock_table(split, lead_time_days=14, service_level=0.95).equals(
+        safety_stock_table(sample, lead_time_days=14, service_level=0.95))
+    print(json.dumps({
+        'rows': rows,
+        'build_seconds': built,
+        'vectorized_seconds': vectorized,
+        'loop_seconds_per_item': looped / loop_items,
+        'agree': agree,
+        'split_agree': split_agree,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--loop-items', type=int, default=200, help='items run through the per-item loop')
+    parser.add_argument('--child', nargs=3, type=int, metavar=('ITEMS', 'DAYS', 'LOOP_ITEMS'))
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    loop_items = min(args.loop_items, args.items)
+    out = subprocess.run([sys.executable, __file__, '--child', str(args.items), str(args.days), str(loop_items)],
+                         check=True, capture_output=True, text=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    extrapolated = result['loop_seconds_per_item'] * args.items
+    print(f"{args.items:,} items x {args.days} days: {result['rows']:,} ledger rows "
+          f"(built in {result['build_seconds']:.1f}s)")
+    print(f"  vectorized     {result['vectorized_seconds']:8.2f} s "
+          f"({result['rows'] / result['vectorized_seconds'] / 1e6:.1f}M rows/s)")
+    print(f"  per-item loop  {extrapolated:8.2f} s (extrapolated from {loop_items} items, "
+          f"{extrapolated / result['vectorized_seconds']:.0f}x slower)")
+    print(f"  results agree on the looped items: {result['agree']}")
+    print(f"  same results with every row split in two: {result['split_agree']}")
+    print(f"  peak RSS {result['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
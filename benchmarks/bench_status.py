@@ -0,0 +1,67 @@
+# Compare the row-wise stock-status classification with the vectorized one.
+#
+#   python benchmarks/bench_status.py --sizes 10000 1000000 10000000
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demandcast.status import calculate_status, classify_inventory
+
+
+# Synthetic daily snapshot with the same columns Home.py uses
+def make_inventory(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    max_capacity = rng.integers(50, 500, size=n_rows)
+    stock_level = (max_capacity * rng.uniform(0, 1.1, size=n_rows)).astype(np.int64)
+    stock_level[rng.random(n_rows) < 0.05] = 0
+    return pd.DataFrame({
+        'Product_Name': pd.Categorical.from_codes(rng.integers(0, 1000, size=n_rows), [f'P{i:04d}' for i in range(1000)]),
+        'Stock_Level': stock_level,
+        'Max_Capacity': max_capacity,
+    })
+
+
+def rowwise(df):
+    df['status'] = df.apply(calculate_status, axis=1)
+    return {status: int((df['status'] == status).sum()) for status in ['out_of_stock', 'low_stock', 'arriving', 'in_stock']}
+
+
+def vectorized(df):
+    _, summary = classify_inventory(df)
+    return summary['counts']
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    result = fn(df.copy())
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--rowwise-max', type=int, default=10_000_000,
+                        help='skip the row-wise path above this many rows')
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'row-wise s':>12} {'vectorized s':>14} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = make_inventory(n_rows)
+        vec_time, vec_counts = timed(vectorized, df)
+        if n_rows <= args.rowwise_max:
+            row_time, row_counts = timed(rowwise, df)
+            if row_counts != vec_counts:
+                raise SystemExit(f'status counts differ at {n_rows} rows: {row_counts} != {vec_counts}')
+            print(f'{n_rows:>12,} {row_time:>12.3f} {vec_time:>14.4f} {row_time / vec_time:>8.0f}x')
+        else:
+            print(f"{n_rows:>12,} {'skipped':>12} {vec_time:>14.4f} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
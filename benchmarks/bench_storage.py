@@ -0,0 +1,118 @@
+# Compare cold-load time and peak RSS of pd.read_csv against the Parquet ledger.
+# Every measurement runs in a fresh interpreter so RSS and imports start cold
+# (the OS page cache is left warm, it cannot be dropped without root).
+#
+#   python benchmarks/bench_storage.py --items 2000 --days 1095
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+CATEGORIES = ['Medical Supply', 'Pharmaceutical', 'Equipment']
+SUPPLIERS = ['Supplier A', 'Supplier B', 'Supplier C', 'Supplier D', 'Supplier E', 'Supplier F']
+
+
+# Synthetic ledger in the layout of processed_inventory.csv
+def make_ledger(path, n_items, n_days, seed=42):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=n_days, freq='D')
+    item_ids = np.arange(100, 100 + n_items)
+    item_category = rng.integers(0, len(CATEGORIES), size=n_items)
+    item_supplier = rng.integers(0, len(SUPPLIERS), size=n_items)
+    with open(path, 'w') as f:
+        f.write('Date,Item ID,Item Name,Category,Units Received,Units Used,Units in Stock,Supplier\n')
+        for date in dates:
+            received = rng.integers(0, 1000, size=n_items)
+            used = rng.integers(0, 800, size=n_items)
+            day = pd.DataFrame({
+                'Date': date.strftime('%Y-%m-%d'),
+                'Item ID': item_ids,
+                'Item Name': [f'Item {i}' for i in item_ids],
+                'Category': np.asarray(CATEGORIES)[item_category],
+                'Units Received': received,
+                'Units Used': used,
+                'Units in Stock': np.maximum(received - used, 0),
+                'Supplier': np.asarray(SUPPLIERS)[item_supplier],
+            })
+            day.to_csv(f, header=False, index=False)
+
+
+# Peak resident set size of this process in MB. ru_maxrss would include the
+# parent's RSS at fork time, VmHWM starts fresh with the exec'd interpreter.
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(mode, csv_path, dataset_dir, start, end):
+    from demandcast.loader import LEDGER_SCHEMA
+    from demandcast.storage import query_ledger
+
+    # Peak RSS is reported above the post-import baseline, so both paths pay the same imports
+    baseline_mb = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == 'read_csv':
+        frame = pd.read_csv(csv_path, dtype=LEDGER_SCHEMA['dtype'], parse_dates=LEDGER_SCHEMA['parse_dates'])
+    elif mode == 'parquet_full':
+        frame = query_ledger(dataset_dir)
+    else:
+        frame = query_ledger(dataset_dir, columns=['Date', 'Item ID', 'Units Used'],
+                             start=start, end=end, categories=['Pharmaceutical'])
+    elapsed = time.perf_counter() - started
+    peak_mb = peak_rss_mb() - baseline_mb
+    print(json.dumps({'rows': len(frame), 'seconds': elapsed, 'peak_rss_mb': peak_mb}))
+
+
+def run_child(*args):
+    out = subprocess.run([sys.executable, __file__, '--child', *args], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=1095)
+    parser.add_argument('--start', default='2021-06-01')
+    parser.add_argument('--end', default='2021-08-31')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'CSV', 'DATASET'))
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.start, args.end)
+        return
+
+    from demandcast.storage import ingest_ledger
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = str(Path(tmp) / 'ledger.csv')
+        dataset_dir = str(Path(tmp) / 'ledger')
+        make_ledger(csv_path, args.items, args.days)
+
+        started = time.perf_counter()
+        ingest_ledger(csv_path, dataset_dir)
+        ingest_seconds = time.perf_counter() - started
+        csv_mb = Path(csv_path).stat().st_size / 1e6
+        parquet_mb = sum(p.stat().st_size for p in Path(dataset_dir).rglob('*.parquet')) / 1e6
+        print(f'{args.items * args.days:,} rows: CSV {csv_mb:.1f} MB, Parquet {parquet_mb:.1f} MB, '
+              f'ingest {ingest_seconds:.2f} s')
+
+        print(f"{'mode':<16} {'rows':>12} {'seconds':>9} {'peak RSS +MB':>12}")
+        for mode in ['read_csv', 'parquet_full', 'parquet_query']:
+            result = run_child(mode, csv_path, dataset_dir)
+            print(f"{mode:<16} {result['rows']:>12,} {result['seconds']:>9.3f} {result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Core computations shared by the Streamlit pages
@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+VALUE_COLUMNS = ['Units Received', 'Units Used', 'Units in Stock']
+STATS = ['count', 'sum', 'min', 'max', 'mean', 'var']
+STATE = ['count', 'sum', 'min', 'max', 'm2']
+CHUNK_ROWS = 500_000
+# Partial states are merged this many at a time
+MERGE_EVERY = 8
+
+# Rollups computed by default: name -> (group-by columns, period frequency or None).
+# With a frequency, the Date column's period ('W' weeks ending Sunday, 'M'
+# months) is added to the keys.
+DEFAULT_ROLLUPS = {
+    'item': (['Item ID'], None),
+    'supplier': (['Supplier'], None),
+    'category': (['Category'], None),
+    'category_weekly': (['Category'], 'W'),
+    'category_monthly': (['Category'], 'M'),
+}
+
+
+def _group_keys(frame, by, freq):
+    keys = [frame[column] for column in by]
+    if freq is not None:
+        keys.append(frame['Date'].dt.to_period(freq))
+    return keys
+
+
+# Mergeable state of rows grouped by (by, period of freq): per value column,
+# the STATE columns, m2 being the sum of squared deviations from the group
+# mean. States of disjoint chunks merge exactly, whatever the order.
+def partial_state(frame, by, freq=None, values=VALUE_COLUMNS):
+    groups = frame[values].astype(np.float64).groupby(_group_keys(frame, by, freq), observed=True, sort=False)
+    count = groups.count()
+    state = pd.concat({
+        'count': count,
+        'sum': groups.sum(),
+        'min': groups.min(),
+        'max': groups.max(),
+        'm2': (groups.var(ddof=0) * count).fillna(0.0),
+    }, axis=1).swaplevel(axis=1)
+    return state[[(value, stat) for value in values for stat in STATE]]
+
+
+# Combine the states of several chunks group by group. Counts, sums, minima and
+# maxima add up directly; m2 follows Chan et al.'s pairwise update, summing each
+# part's m2 and count * (part mean - combined mean)^2.
+def merge_states(states):
+    if len(states) == 1:
+        return states[0]
+    stacked = pd.concat(states)
+    levels = list(range(stacked.index.nlevels))
+    groups = stacked.groupby(level=levels, sort=False)
+    merged, minima, maxima = groups.sum(), groups.min(), groups.max()
+    for value in dict.fromkeys(stacked.columns.get_level_values(0)):
+        count = stacked[(value, 'count')]
+        part_mean = stacked[(value, 'sum')] / count.where(count > 0)
+        total_mean = merged[(value, 'sum')] / merged[(value, 'count')].where(merged[(value, 'count')] > 0)
+        spread = (count * (part_mean - total_mean.reindex(stacked.index).to_numpy()) ** 2).fillna(0.0)
+        merged[(value, 'm2')] += spread.groupby(level=levels, sort=False).sum()
+        merged[(value, 'min')] = minima[(value, 'min')]
+        merged[(value, 'max')] = maxima[(value, 'max')]
+    return merged
+
+
+# count, sum, min, max, mean and sample variance per value column, in the
+# layout of groupby(...).agg(STATS), sorted by the group keys
+def finalize_state(state):
+    columns = {}
+    for value in dict.fromkeys(state.columns.get_level_values(0)):
+        count = state[(value, 'count')]
+        columns[(value, 'count')] = count.astype(np.int64)
+        columns[(value, 'sum')] = state[(value, 'sum')]
+        columns[(value, 'min')] = state[(value, 'min')]
+        columns[(value, 'max')] = state[(value, 'max')]
+        columns[(value, 'mean')] = state[(value, 'sum')] / count.where(count > 0)
+        columns[(value, 'var')] = state[(value, 'm2')] / (count - 1).where(count > 1)
+    return pd.DataFrame(columns, index=state.index).sort_index()
+
+
+# The same rollup of a frame held in memory
+def rollup_frame(frame, by, freq=None, values=VALUE_COLUMNS):
+    return finalize_state(partial_state(frame, by, freq, values))
+
+
+def _chunk_states(chunk, rollups, values):
+    return {name: partial_state(chunk, by, freq, values) for name, (by, freq) in rollups.items()}
+
+
+# Rollups of a ledger CSV (processed_inventory.csv layout) read chunk_rows at
+# a time, so memory is bounded by the chunk size and the number of groups, not
+# the file. Chunk states are merged MERGE_EVERY at a time. With max_workers > 1,
+# chunks are aggregated in a process pool with at most two chunks per worker in
+# flight. Returns {name: frame} in the layout of rollup_frame, which gives the
+# same result on the whole file in memory.
+def ledger_rollups(source, rollups=None, values=VALUE_COLUMNS, chunk_rows=CHUNK_ROWS, max_workers=1):
+    rollups = rollups if rollups is not None else DEFAULT_ROLLUPS
+    keys = list(dict.fromkeys(column for by, _ in rollups.values() for column in by))
+    with_dates = any(freq is not None for _, freq in rollups.values())
+    reader = pd.read_csv(source, usecols=keys + values + (['Date'] if with_dates else []),
+                         parse_dates=['Date'] if with_dates else False, chunksize=chunk_rows)
+
+    states = {name: [] for name in rollups}
+
+    def fold(chunk_states):
+        for name, state in chunk_states.items():
+            states[name].append(state)
+            if len(states[name]) >= MERGE_EVERY:
+                states[name] = [merge_states(states[name])]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        for chunk in reader:
+            fold(_chunk_states(chunk, rollups, values))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for chunk in reader:
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        fold(future.result())
+                pending.add(executor.submit(_chunk_states, chunk, rollups, values))
+            for future in pending:
+                fold(future.result())
+
+    empty = pd.DataFrame(columns=pd.MultiIndex.from_product([values, STATS]))
+    return {name: finalize_state(merge_states(parts)) if parts else empty for name, parts in states.items()}
+
+
+# 'Units Used_sum'-style column names, for writing a rollup to CSV or Parquet
+def flatten_columns(rollup):
+    flat = rollup.copy()
+    flat.columns = [f'{value}_{stat}' for value, stat in rollup.columns]
+    flat = flat.reset_index()
+    for column in flat.columns:
+        if isinstance(flat[column].dtype, pd.PeriodDtype):
+            flat[column] = flat[column].dt.start_time
+    return flat
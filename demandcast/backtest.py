@@ -0,0 +1,121 @@
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from demandcast.baselines import get_forecaster, ledger_matrix
+
+METRICS = ['mape', 'smape', 'mase', 'bias']
+
+# Series matrix attached by each worker process
+_shared = {}
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    _shared['values'] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+# Forecast origins: the first fold trains on min_train observations and every
+# following fold moves the origin by step, as long as a full horizon remains
+def rolling_origins(n_obs, horizon, min_train, step=1):
+    return list(range(min_train, n_obs - horizon + 1, step))
+
+
+# Per-series forecast errors over one horizon. MASE is scaled by the in-sample
+# mean absolute error of the one-step naive forecast on the training window;
+# MAPE skips zero actuals.
+def forecast_errors(train, actual, forecast):
+    error = forecast - actual
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        ape = np.where(actual != 0, np.abs(error) / np.abs(actual), np.nan)
+        denominator = np.abs(actual) + np.abs(forecast)
+        sape = np.where(denominator > 0, 2 * np.abs(error) / denominator, 0.0)
+        scale = np.abs(np.diff(train, axis=1)).mean(axis=1)
+        mase = np.abs(error).mean(axis=1) / np.where(scale > 0, scale, np.nan)
+        mape = np.nanmean(ape, axis=1) * 100
+    return {
+        'mape': mape,
+        'smape': sape.mean(axis=1) * 100,
+        'mase': mase,
+        'bias': error.mean(axis=1),
+    }
+
+
+# Runs in a worker process: one engine, one origin, every series at once
+def _run_fold(engine, params, origin, horizon):
+    values = _shared['values']
+    train, actual = values[:, :origin], values[:, origin:origin + horizon]
+    started = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        forecast = get_forecaster(engine, **params).forecast(train, horizon)
+    seconds = time.perf_counter() - started
+    return engine, origin, forecast_errors(train, actual, forecast), seconds
+
+
+# Rolling-origin evaluation of each engine over every series of values (one
+# row per series). engines maps engine names to their parameters. Folds run in
+# a process pool and read the series from one shared-memory block instead of
+# receiving a pickled copy each. Returns one row per engine, series and origin.
+def backtest(values, engines, horizon=6, min_train=12, step=1, series_ids=None, max_workers=None):
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    series_ids = np.asarray(series_ids if series_ids is not None else np.arange(len(values)))
+    origins = rolling_origins(values.shape[1], horizon, min_train, step)
+    if not origins:
+        raise ValueError(f'{values.shape[1]} observations leave no fold for min_train={min_train}, horizon={horizon}')
+    tasks = [(engine, params or {}, origin, horizon) for engine, params in engines.items() for origin in origins]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        _shared['values'] = values
+        try:
+            results = [_run_fold(*task) for task in tasks]
+        finally:
+            _shared.clear()
+    else:
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+            attach_args = (block.name, values.shape, values.dtype.str)
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach, initargs=attach_args) as executor:
+                results = list(executor.map(_run_fold, *zip(*tasks)))
+        finally:
+            block.close()
+            block.unlink()
+
+    frames = []
+    for engine, origin, errors, seconds in results:
+        frame = pd.DataFrame({name: errors[name].astype(np.float32) for name in METRICS})
+        frame.insert(0, 'series', series_ids)
+        frame.insert(0, 'origin', np.int32(origin))
+        frame.insert(0, 'engine', engine)
+        frame['seconds'] = np.float32(seconds / len(values))
+        frames.append(frame)
+    report = pd.concat(frames, ignore_index=True)
+    report['engine'] = report['engine'].astype('category')
+    return report
+
+
+# Backtest every item of the long-format ledger
+def backtest_ledger(ledger, engines, value_col='Units Used', **kwargs):
+    item_ids, _, values = ledger_matrix(ledger, value_col)
+    report = backtest(values, engines, series_ids=item_ids.to_numpy(), **kwargs)
+    return report.rename(columns={'series': 'Item ID'})
+
+
+# Mean error metrics and total fit time per engine
+def summarize(report):
+    summary = report.groupby('engine', observed=True)[METRICS].mean()
+    summary['seconds'] = report.groupby('engine', observed=True)['seconds'].sum()
+    return summary
+
+
+def write_report(report, path):
+    report.to_parquet(path, compression='zstd', index=False)
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+
+# Forecasters take a 2-D array of equally long series (one per row, oldest
+# observation first) and return a (n_series, steps) array of forecasts.
+# Recursions run over time with each step vectorized across all series.
+class Forecaster:
+    name = None
+
+    def forecast(self, values, steps):
+        raise NotImplementedError
+
+    def __repr__(self):
+        params = ', '.join(f'{k}={v!r}' for k, v in vars(self).items())
+        return f'{type(self).__name__}({params})'
+
+
+def _as_matrix(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+
+# Repeat the last observed season
+class SeasonalNaive(Forecaster):
+    name = 'seasonal_naive'
+
+    def __init__(self, season_length=12):
+        self.season_length = season_length
+
+    def forecast(self, values, steps):
+        values = _as_matrix(values)
+        season_length = min(self.season_length, values.shape[1])
+        last_season = values[:, -season_length:]
+        return last_season[:, np.arange(steps) % season_length]
+
+
+# Mean of the last window observations, held flat
+class MovingAverage(Forecaster):
+    name = 'moving_average'
+
+    def __init__(self, window=3):
+        self.window = window
+
+    def forecast(self, values, steps):
+        values = _as_matrix(values)
+        level = values[:, -self.window:].mean(axis=1)
+        return np.repeat(level[:, np.newaxis], steps, axis=1)
+
+
+# Simple exponential smoothing, initialized on the first observation.
+# The final level is a fixed weighted sum of the history, so it is computed in
+# closed form as one matrix-vector product instead of a recursion.
+class SimpleExponentialSmoothing(Forecaster):
+    name = 'ses'
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+
+    def forecast(self, values, steps):
+        values = _as_matrix(values)
+        n_obs = values.shape[1]
+        weights = self.alpha * (1 - self.alpha) ** np.arange(n_obs - 1, -1, -1, dtype=np.float64)
+        weights[0] = (1 - self.alpha) ** (n_obs - 1)
+        level = values @ weights
+        return np.repeat(level[:, np.newaxis], steps, axis=1)
+
+
+# Holt's linear trend method
+class Holt(Forecaster):
+    name = 'holt'
+
+    def __init__(self, alpha=0.3, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+
+    def forecast(self, values, steps):
+        values = _as_matrix(values)
+        if values.shape[1] < 2:
+            return SimpleExponentialSmoothing(self.alpha).forecast(values, steps)
+        level = values[:, 0].copy()
+        trend = values[:, 1] - values[:, 0]
+        for t in range(1, values.shape[1]):
+            previous = level
+            level = self.alpha * values[:, t] + (1 - self.alpha) * (level + trend)
+            trend = self.beta * (level - previous) + (1 - self.beta) * trend
+        return level[:, np.newaxis] + trend[:, np.newaxis] * np.arange(1, steps + 1)
+
+
+# Croston's method for intermittent demand: smooths the non-zero demand sizes
+# and the intervals between them separately and forecasts their ratio
+class Croston(Forecaster):
+    name = 'croston'
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+
+    def forecast(self, values, steps):
+        values = _as_matrix(values)
+        n_series = values.shape[0]
+        size = np.zeros(n_series)
+        interval = np.ones(n_series)
+        periods_since = np.zeros(n_series)
+        started = np.zeros(n_series, dtype=bool)
+        for t in range(values.shape[1]):
+            periods_since += 1
+            demand = values[:, t] > 0
+            first = demand & ~started
+            update = demand & started
+            size = np.where(first, values[:, t], size)
+            interval = np.where(first, periods_since, interval)
+            size = np.where(update, size + self.alpha * (values[:, t] - size), size)
+            interval = np.where(update, interval + self.alpha * (periods_since - interval), interval)
+            periods_since = np.where(demand, 0, periods_since)
+            started |= demand
+        rate = np.where(started, size / interval, 0.0)
+        return np.repeat(rate[:, np.newaxis], steps, axis=1)
+
+
+# statsmodels ARIMA fitted series by series, for comparison with the baselines
+class Arima(Forecaster):
+    name = 'arima'
+
+    def __init__(self, order=(1, 1, 1)):
+        self.order = order
+
+    def forecast(self, values, steps):
+        from demandcast.forecast import fit_arima
+
+        values = _as_matrix(values)
+        return np.vstack([fit_arima(row, self.order, steps) for row in values])
+
+
+ENGINES = {cls.name: cls for cls in [Arima, SeasonalNaive, MovingAverage, SimpleExponentialSmoothing, Holt, Croston]}
+
+
+def get_forecaster(engine, **params):
+    try:
+        return ENGINES[engine](**params)
+    except KeyError:
+        raise ValueError(f"Unknown forecasting engine {engine!r}, expected one of {sorted(ENGINES)}") from None
+
+
+# Pivot the long-format ledger into an (items x dates) matrix; dates an item
+# has no row for count as fill_value (no units used)
+def ledger_matrix(ledger, value_col='Units Used', item_col='Item ID', date_col='Date', fill_value=0.0):
+    wide = ledger.pivot_table(index=item_col, columns=date_col, values=value_col, aggfunc='sum', observed=True)
+    wide = wide.sort_index(axis=1).fillna(fill_value)
+    return wide.index, pd.DatetimeIndex(pd.to_datetime(wide.columns)), wide.to_numpy(dtype=np.float64)
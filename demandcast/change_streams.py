@@ -0,0 +1,187 @@
+import bisect
+import threading
+from datetime import timedelta
+
+import pandas as pd
+from pymongo.errors import PyMongoError
+
+from demandcast.inventory_db import (ensure_indexes, expired_filter, format_expiry_date, list_categories,
+                                     product_collection, to_expiry_date)
+from demandcast.live import POLL_SECONDS, Versioned, shared_watcher
+
+COLLECTION_SUFFIX = '_collection'
+# Products expiring within this many days are read along with the expired ones
+LOOKAHEAD_DAYS = 7
+# Longest pause between attempts while the stream keeps failing
+MAX_RETRY_SECONDS = 60.0
+
+
+# Expiry dates of the product documents expiring before horizon, ordered by
+# date so the expired ones are a prefix. Entries are keyed by (collection,
+# _id), which is all a change stream's delete event carries.
+class ExpiryIndex:
+    def __init__(self, horizon=None):
+        self.horizon = horizon
+        self._entries = {}
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            del self._sorted[bisect.bisect_left(self._sorted, entry)]
+
+    def upsert(self, key, category, product_id, expiry_value):
+        self.remove(key)
+        if expiry_value is None:
+            return
+        try:
+            expiry = to_expiry_date(expiry_value)
+        except ValueError:
+            return
+        if self.horizon is not None and expiry >= self.horizon:
+            return
+        entry = (expiry, category, str(product_id), key[1], product_id)
+        self._entries[key] = entry
+        bisect.insort(self._sorted, entry)
+
+    def clear(self):
+        self._entries.clear()
+        self._sorted.clear()
+
+    # Same rows and order as inventory_db.find_expired_products
+    def expired(self, now):
+        stop = bisect.bisect_left(self._sorted, (now,))
+        expired = [(category, product_id, format_expiry_date(expiry))
+                   for expiry, category, _, _, product_id in self._sorted[:stop]]
+        return sorted(expired, key=lambda row: (row[0], row[2], str(row[1])))
+
+
+class _Reload(Exception):
+    pass
+
+
+# Expired products of every category collection, kept current from a MongoDB
+# change stream (replica sets and sharded clusters only). The products expired
+# or expiring within LOOKAHEAD_DAYS are read with the indexed expired_filter
+# query; after that every insert, update, replace or delete is applied to the
+# ExpiryIndex as it arrives, so a rerun reads memory instead of querying every
+# collection. The read is repeated once that window has passed. The stream is
+# opened before the read, so changes made during it are replayed rather than
+# lost; a dropped database or an interrupted stream triggers a fresh read.
+class MongoExpiryWatcher(Versioned):
+    def __init__(self, db, retry_seconds=POLL_SECONDS):
+        super().__init__()
+        self.db = db
+        self.retry_seconds = retry_seconds
+        self.reloads = 0
+        self._index = ExpiryIndex()
+        self._lock = threading.Lock()
+
+    def expired(self, now=None):
+        now = now or pd.Timestamp.now().to_pydatetime()
+        if now >= self._index.horizon:
+            self._load(now)
+        with self._lock:
+            return self._index.expired(now)
+
+    def _stream(self):
+        pipeline = [{'$match': {'$or': [
+            {'ns.coll': {'$regex': f'{COLLECTION_SUFFIX}$'}},
+            {'operationType': {'$in': ['dropDatabase', 'invalidate']}},
+        ]}}]
+        return self.db.watch(pipeline, full_document='updateLookup')
+
+    # The horizon is a midnight, so the filter's string comparison on legacy
+    # dates cuts at the same point as the datetime one
+    def _load(self, now=None):
+        today = pd.Timestamp(now or pd.Timestamp.now()).normalize().to_pydatetime()
+        horizon = today + timedelta(days=LOOKAHEAD_DAYS + 1)
+        index = ExpiryIndex(horizon)
+        categories = list_categories(self.db['categories'])
+        ensure_indexes(self.db, categories)
+        for category in categories:
+            collection = product_collection(self.db, category)
+            for document in collection.find(expired_filter(horizon), {'Product_ID': 1, 'Expiry_Date': 1}):
+                index.upsert((collection.name, document['_id']), category, document.get('Product_ID'),
+                             document.get('Expiry_Date'))
+        with self._lock:
+            self._index = index
+            self.reloads += 1
+        self._bump(len(index))
+
+    def apply_change(self, change):
+        operation = change['operationType']
+        if operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+            raise _Reload(operation)
+        name = change['ns']['coll']
+        key = (name, change['documentKey']['_id'])
+        document = change.get('fullDocument')
+        with self._lock:
+            if operation == 'delete' or document is None:
+                self._index.remove(key)
+            else:
+                self._index.upsert(key, name[:-len(COLLECTION_SUFFIX)], document.get('Product_ID'),
+                                   document.get('Expiry_Date'))
+        self._bump(1)
+
+    # Re-read the given products, e.g. right after this session changed them,
+    # without waiting for their change events
+    def refresh(self, category, product_ids):
+        collection = product_collection(self.db, category)
+        documents = list(collection.find({'Product_ID': {'$in': list(product_ids)}}, {'Product_ID': 1,
+                                                                                       'Expiry_Date': 1}))
+        with self._lock:
+            for document in documents:
+                self._index.upsert((collection.name, document['_id']), category, document.get('Product_ID'),
+                                   document.get('Expiry_Date'))
+        self._bump(len(documents))
+
+    # Any failure (a reload, a server error, a document the index cannot take)
+    # is recorded in error and followed by a fresh stream and read, after a
+    # pause that doubles with every failure in a row up to MAX_RETRY_SECONDS.
+    # The thread only ends on stop(), so the shared watcher never serves a
+    # frozen list.
+    def _run(self, stream):
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                if stream is None:
+                    stream = self._stream()
+                    self._load()
+                    self.error = None
+                    failures = 0
+                while not self._stop.is_set() and stream.alive:
+                    change = stream.try_next()
+                    if change is not None:
+                        self.apply_change(change)
+            except Exception as exc:
+                self.error = f'{type(exc).__name__}: {exc}'
+                failures += 1
+                self._stop.wait(min(self.retry_seconds * 2 ** (failures - 1), MAX_RETRY_SECONDS))
+            if stream is not None:
+                stream.close()
+                stream = None
+
+    # Open the stream and read the collections; raises when the server (or a
+    # stand-in) has no change streams
+    def start(self):
+        stream = self._stream()
+        self._load()
+        self._start_thread(lambda: self._run(stream), f'watch-{self.db.name}')
+        return self
+
+
+# The process-wide expiry watcher of a database, or None when the server has
+# no change streams (a standalone mongod, or a stand-in without watch()); the
+# caller then queries as before. Either outcome is remembered.
+def watch_expiry(db):
+    def create():
+        try:
+            return MongoExpiryWatcher(db).start()
+        except (PyMongoError, NotImplementedError, TypeError):
+            return None
+
+    return shared_watcher(('mongo', id(db.client), db.name), create)
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_RENDER_CACHE_BYTES = int(os.environ.get('DEMANDCAST_RENDER_CACHE_MB', 64)) * 1024 * 1024
+FORMATS = ('png', 'svg')
+
+
+# Rendered chart images keyed on the chart and its inputs, LRU-evicted past max_bytes
+class RenderCache:
+    def __init__(self, max_bytes=DEFAULT_RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous)
+            if len(image) > self.max_bytes:
+                return
+            self._entries[key] = image
+            self.nbytes += len(image)
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= len(self._entries.popitem(last=False)[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+default_render_cache = RenderCache()
+
+
+# matplotlib is imported on the first cache miss, not with the page, and set to
+# the headless Agg backend: the Streamlit server never opens a window
+def _pyplot():
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def render_key(name, inputs, fmt, dpi):
+    return hashlib.sha256(repr((name, inputs, fmt, dpi)).encode()).hexdigest()
+
+
+# Image bytes of draw(*inputs), which returns a new matplotlib figure. The
+# figure is rendered once per distinct input and always closed afterwards, so
+# reruns with unchanged inputs neither redraw nor leak figures. inputs must be
+# plain values (numbers, strings, tuples, lists) whose repr identifies them.
+def render(draw, *inputs, fmt='png', dpi=100, cache=None):
+    if fmt not in FORMATS:
+        raise ValueError(f'fmt must be one of {FORMATS}, got {fmt!r}')
+    cache = cache if cache is not None else default_render_cache
+    key = render_key(draw.__qualname__, inputs, fmt, dpi)
+    image = cache.get(key)
+    if image is None:
+        fig = draw(*inputs)
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+            image = buffer.getvalue()
+        finally:
+            _pyplot().close(fig)
+        cache.put(key, image)
+    return image
+
+
+# Share of low, arriving and out-of-stock products (Home)
+def status_pie(sizes):
+    labels = ['Low Stock', 'Arriving Stock', 'Out of Stock']
+    colors = ['#61a4b2', '#a3e3c3', '#f9a6a6']
+    fig, ax = _pyplot().subplots()
+    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+    return fig
+
+
+# Stacked low / arriving / out-of-stock product counts (Home)
+def stock_pyramid(low_stock, arriving, out_of_stock):
+    fig, ax = _pyplot().subplots()
+    ax.barh(['Products on Low Stock'], [low_stock], color='#e74c3c', label='Low Stock')
+    ax.barh(['Products Arriving Soon'], [arriving], color='#f39c12', left=[low_stock], label='Arriving Soon')
+    ax.barh(['Products Out of Stock'], [out_of_stock], color='#3498db', left=[low_stock + arriving],
+            label='Out of Stock')
+    ax.set_xlabel('Number of Products')
+    ax.set_title('Inventory Pyramid')
+    ax.legend()
+    return fig
+
+
+# Historical against forecasted demand per product (EmergencyStock)
+def demand_comparison(product_names, historical, forecasted):
+    fig, ax = _pyplot().subplots(figsize=(12, 6))
+    ax.bar(product_names, historical, alpha=0.6, label='Historical Demand')
+    ax.bar(product_names, forecasted, alpha=0.6, label='Forecasted Demand')
+    ax.set_xlabel('Product Name')
+    ax.set_ylabel('Demand')
+    ax.set_title('Historical vs Forecasted Demand')
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.legend()
+    return fig
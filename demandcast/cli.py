@@ -0,0 +1,323 @@
+# Batch entry point for the dashboards' computations, for cron jobs and
+# workers that run without Streamlit:
+#
+#   python -m demandcast metrics  --input daily.csv
+#   python -m demandcast forecast --input processed_inventory.csv --order auto --workers 8
+#   python -m demandcast expiry   --input mongodb://host:27017/
+#   python -m demandcast migrate-expiry --input mongodb://host:27017/
+#   python -m demandcast buffer   --input processed_inventory.csv --service-level 0.95 --lead-time 14
+#   python -m demandcast rollup   --input processed_inventory.csv --by Category --freq M --workers 4
+#   python -m demandcast audit    --input mongodb://host:27017/ --rules rules.json
+#   python -m demandcast reconcile --input processed_inventory.csv --levels Category,Supplier --method mint_diag
+#
+# Outputs default to DEMANDCAST_OUTPUT_DIR (outputs/), where the pages pick
+# them up. Heavy modules are imported inside each command, so a cold start
+# loads only what that command needs and never Streamlit or plotting.
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from demandcast.outputs import (BUFFER_OUTPUT, COMPLIANCE_COUNTS_OUTPUT, COMPLIANCE_OUTPUT, EXPIRY_OUTPUT,
+                                FORECAST_OUTPUT, METRICS_OUTPUT, RECONCILE_OUTPUT, ROLLUP_OUTPUT, output_path,
+                                write_json, write_table, write_table_metadata)
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+# Stock status counts of a daily.csv-style export, read chunk_rows at a time.
+# With --statuses, every product's status is written there as well.
+def run_metrics(args):
+    import numpy as np
+    import pandas as pd
+
+    from demandcast.loader import DAILY_SCHEMA
+    from demandcast.status import STATUSES, classify_status_codes, summarize_counts
+
+    started = time.perf_counter()
+    counts = np.zeros(len(STATUSES), dtype=np.int64)
+    statuses = []
+    reader = pd.read_csv(args.input, usecols=lambda column: column in ('Product_ID', 'Category', 'Stock_Level',
+                                                                       'Max_Capacity'),
+                         dtype={k: v for k, v in DAILY_SCHEMA['dtype'].items() if k in ('Stock_Level', 'Max_Capacity')},
+                         chunksize=args.chunk_rows)
+    for chunk in reader:
+        codes = classify_status_codes(chunk['Stock_Level'].to_numpy(), chunk['Max_Capacity'].to_numpy())
+        counts += np.bincount(codes, minlength=len(STATUSES))
+        if args.statuses:
+            statuses.append(chunk.drop(columns=['Stock_Level', 'Max_Capacity']).assign(
+                status=np.asarray(STATUSES)[codes]))
+    summary = summarize_counts(counts)
+    summary.update(source=args.input, generated_at=datetime.now().isoformat(timespec='seconds'))
+    write_json(summary, args.output)
+    if args.statuses:
+        write_table(pd.concat(statuses, ignore_index=True), args.statuses)
+    _log(f"{summary['total']:,} products classified in {time.perf_counter() - started:.2f}s -> {args.output}")
+
+
+def _parse_order(value):
+    if value == 'auto':
+        return 'auto'
+    return tuple(int(part) for part in value.split(','))
+
+
+# Forecast every item of the ledger (a CSV, or a Parquet dataset directory
+# written by demandcast.storage). ARIMA runs in a process pool; the baseline
+# engines forecast all items at once.
+def run_forecast(args):
+    import os
+
+    import pandas as pd
+
+    from demandcast.baselines import get_forecaster, ledger_matrix
+    from demandcast.forecast import batch_forecast, future_dates
+
+    started = time.perf_counter()
+    if os.path.isdir(args.input):
+        from demandcast.storage import query_ledger
+
+        ledger = query_ledger(args.input, columns=['Date', 'Item ID', args.value_col])
+    else:
+        from demandcast.loader import LEDGER_SCHEMA, load_csv
+
+        ledger = load_csv(args.input, LEDGER_SCHEMA)
+
+    if args.engine == 'arima':
+        batch = batch_forecast(ledger, args.value_col, steps=args.steps, order=_parse_order(args.order),
+                               max_workers=args.workers)
+        forecasts = batch.forecasts
+        if not batch.failures.empty:
+            _log(f'{len(batch.failures)} items could not be forecast')
+            if args.failures:
+                write_table(batch.failures, args.failures)
+    else:
+        item_ids, dates, values = ledger_matrix(ledger, args.value_col)
+        predicted = get_forecaster(args.engine).forecast(values, args.steps)
+        horizon = future_dates(dates, args.steps)
+        forecasts = pd.DataFrame({
+            'Item ID': item_ids.repeat(args.steps),
+            'Date': list(horizon) * len(item_ids),
+            'Forecast': predicted.ravel(),
+        })
+    write_table(forecasts, args.output)
+    write_table_metadata(args.output, args.input, engine=args.engine, value_col=args.value_col, steps=args.steps,
+                         order=args.order if args.engine == 'arima' else None)
+    _log(f"{forecasts['Item ID'].nunique():,} items forecast with {args.engine} "
+         f'in {time.perf_counter() - started:.2f}s -> {args.output}')
+
+
+# Products past their expiry date, from MongoDB (a mongodb:// or mongodb+srv://
+# URI) or from a CSV with Category, Product_ID and Expiry_Date columns
+def run_expiry(args):
+    import pandas as pd
+
+    from demandcast.inventory_db import DATE_FORMAT
+
+    started = time.perf_counter()
+    as_of = datetime.strptime(args.as_of, DATE_FORMAT) if args.as_of else datetime.now()
+    if args.input.startswith(('mongodb://', 'mongodb+srv://')):
+        from demandcast.inventory_db import ensure_indexes, find_expired_products, list_categories
+        from demandcast.mongo_client import get_client
+
+        db = get_client(args.input)[args.database]
+        categories = list_categories(db['categories'])
+        ensure_indexes(db, categories)
+        expired = pd.DataFrame(find_expired_products(db, categories, as_of),
+                               columns=['Category', 'Product_ID', 'Expiry_Date'])
+    else:
+        frame = pd.read_csv(args.input, usecols=['Category', 'Product_ID', 'Expiry_Date'], dtype=str)
+        expiry_dates = pd.to_datetime(frame['Expiry_Date'], format=DATE_FORMAT, errors='coerce')
+        expired = frame.loc[expiry_dates < as_of, ['Category', 'Product_ID', 'Expiry_Date']].assign(Expiry_Date=expiry_dates.dt.strftime(DATE_FORMAT))
+        expired = expired.sort_values(['Category', 'Expiry_Date', 'Product_ID'], ignore_index=True)
+    write_table(expired, args.output)
+    _log(f'{len(expired):,} expired products in {time.perf_counter() - started:.2f}s -> {args.output}')
+
+
+# One-off rewrite of the string expiry dates left by older dashboards as BSON
+# dates, so the expiry queries match them through the Expiry_Date index
+def run_migrate_expiry(args):
+    from demandcast.inventory_db import ensure_indexes, list_categories, migrate_expiry_dates
+    from demandcast.mongo_client import get_client
+
+    started = time.perf_counter()
+    db = get_client(args.input)[args.database]
+    categories = list_categories(db['categories'])
+    ensure_indexes(db, categories)
+    migrated = migrate_expiry_dates(db, categories, args.batch_size)
+    _log(f'{migrated:,} expiry dates migrated in {len(categories):,} categories in '
+         f'{time.perf_counter() - started:.2f}s')
+
+
+# Emergency buffer stock: safety stock and reorder point of every item of the
+# ledger (a CSV, or a Parquet dataset directory) from its demand history
+def run_buffer(args):
+    import os
+
+    from demandcast.safety_stock import safety_stock_table
+
+    started = time.perf_counter()
+    columns = ['Date', 'Item ID', args.value_col] + ([args.stock_col] if args.stock_col else [])
+    if os.path.isdir(args.input):
+        from demandcast.storage import query_ledger
+
+        ledger = query_ledger(args.input, columns=columns)
+    else:
+        from demandcast.loader import LEDGER_SCHEMA, load_csv
+
+        ledger = load_csv(args.input, LEDGER_SCHEMA)
+    table = safety_stock_table(ledger, value_col=args.value_col, service_level=args.service_level,
+                               lead_time_days=args.lead_time, lead_time_std_days=args.lead_time_std,
+                               stock_col=args.stock_col or None)
+    write_table(table.reset_index(), args.output)
+    _log(f'{len(table):,} items in {time.perf_counter() - started:.2f}s -> {args.output}')
+
+
+# Totals, extremes, means and variances of the ledger's unit columns per
+# --by group (and --freq period), streamed in chunks so the ledger need not fit
+# in memory
+def run_rollup(args):
+    from demandcast.aggregate import flatten_columns, ledger_rollups
+
+    started = time.perf_counter()
+    by = [column.strip() for column in args.by.split(',')]
+    rollup = ledger_rollups(args.input, {'rollup': (by, args.freq)}, chunk_rows=args.chunk_rows,
+                            max_workers=args.workers)['rollup']
+    write_table(flatten_columns(rollup), args.output)
+    _log(f'{len(rollup):,} groups in {time.perf_counter() - started:.2f}s -> {args.output}')
+
+
+# Compliance of every product in the historical database (a MongoDB URI),
+# against the default rule set or the JSON rule list given with --rules
+def run_audit(args):
+    from demandcast.compliance import COMPLIANCE_RULES, audit_catalogue, load_rules
+    from demandcast.inventory_db import DATE_FORMAT
+    from demandcast.mongo_client import get_client
+
+    as_of = datetime.strptime(args.as_of, DATE_FORMAT) if args.as_of else datetime.now()
+    rules = load_rules(args.rules) if args.rules else COMPLIANCE_RULES
+    categories = [category.strip() for category in args.categories.split(',')] if args.categories else None
+    audit = audit_catalogue(get_client(args.input)[args.database], categories, rules, as_of)
+    write_table(audit.report, args.output)
+    summary = audit.summary()
+    summary.update(source=args.input, database=args.database, generated_at=datetime.now().isoformat(timespec='seconds'))
+    write_json(summary, args.counts)
+    _log(f"{audit.products:,} products audited, {summary['compliant']:,} compliant, in {audit.seconds:.2f}s "
+         f'-> {args.output}, {args.counts}')
+
+
+# Coherent forecasts of the Total -> --levels -> Item ID hierarchy of the
+# ledger (a CSV, or a Parquet dataset directory): every node forecast with a
+# baseline engine, then reconciled in one sparse step
+def run_reconcile(args):
+    import os
+
+    from demandcast.reconcile import hierarchical_forecast
+
+    started = time.perf_counter()
+    levels = [[]] + [[column.strip()] for column in args.levels.split(',') if column.strip()]
+    columns = ['Date', 'Item ID', args.value_col] + [level[0] for level in levels[1:]]
+    if os.path.isdir(args.input):
+        from demandcast.storage import query_ledger
+
+        ledger = query_ledger(args.input, columns=columns)
+    else:
+        from demandcast.loader import LEDGER_SCHEMA, load_csv
+
+        ledger = load_csv(args.input, LEDGER_SCHEMA)
+    result, dates = hierarchical_forecast(ledger, args.value_col, args.engine, args.steps, args.method, levels)
+    write_table(result.to_frame(dates), args.output)
+    _log(f'{len(result.hierarchy.nodes):,} nodes ({result.hierarchy.n_leaves:,} items) reconciled with '
+         f'{args.method} in {result.seconds:.3f}s, {time.perf_counter() - started:.2f}s in all -> {args.output}')
+
+
+def build_parser():
+    from demandcast.aggregate import CHUNK_ROWS
+    from demandcast.baselines import ENGINES
+    from demandcast.reconcile import METHODS
+    from demandcast.safety_stock import DEFAULT_LEAD_TIME_DAYS, DEFAULT_SERVICE_LEVEL
+
+    parser = argparse.ArgumentParser(prog='demandcast', description='Run the dashboard computations as batch jobs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    metrics = commands.add_parser('metrics', help='stock status counts of an inventory export')
+    metrics.add_argument('--input', default='daily.csv')
+    metrics.add_argument('--output', default=output_path(METRICS_OUTPUT))
+    metrics.add_argument('--statuses', help='also write every product\'s status to this .csv/.parquet file')
+    metrics.add_argument('--chunk-rows', type=int, default=1_000_000)
+    metrics.set_defaults(run=run_metrics)
+
+    forecast = commands.add_parser('forecast', help='forecast every item of the inventory ledger')
+    forecast.add_argument('--input', default='processed_inventory.csv')
+    forecast.add_argument('--output', default=output_path(FORECAST_OUTPUT))
+    forecast.add_argument('--engine', choices=sorted(ENGINES), default='arima')
+    forecast.add_argument('--order', default='1,1,1', help="ARIMA order as p,d,q, or 'auto'")
+    forecast.add_argument('--value-col', default='Units Used')
+    forecast.add_argument('--steps', type=int, default=12)
+    forecast.add_argument('--workers', type=int)
+    forecast.add_argument('--failures', help='write items that could not be forecast to this file')
+    forecast.set_defaults(run=run_forecast)
+
+    expiry = commands.add_parser('expiry', help='list expired products')
+    expiry.add_argument('--input', required=True, help='MongoDB URI or CSV file')
+    expiry.add_argument('--database', default='inventory_database')
+    expiry.add_argument('--as-of', help='YYYY-MM-DD, defaults to now')
+    expiry.add_argument('--output', default=output_path(EXPIRY_OUTPUT))
+    expiry.set_defaults(run=run_expiry)
+
+    migrate_expiry = commands.add_parser('migrate-expiry', help='rewrite string expiry dates as dates')
+    migrate_expiry.add_argument('--input', required=True, help='MongoDB URI')
+    migrate_expiry.add_argument('--database', default='inventory_database')
+    migrate_expiry.add_argument('--batch-size', type=int, default=1000)
+    migrate_expiry.set_defaults(run=run_migrate_expiry)
+
+    buffer = commands.add_parser('buffer', help='safety stock and reorder point of every item')
+    buffer.add_argument('--input', default='processed_inventory.csv')
+    buffer.add_argument('--value-col', default='Units Used')
+    buffer.add_argument('--stock-col', default='Units in Stock', help="compared to the reorder point; '' to skip")
+    buffer.add_argument('--service-level', type=float, default=DEFAULT_SERVICE_LEVEL)
+    buffer.add_argument('--lead-time', type=float, default=DEFAULT_LEAD_TIME_DAYS, help='days')
+    buffer.add_argument('--lead-time-std', type=float, default=0.0, help='days')
+    buffer.add_argument('--output', default=output_path(BUFFER_OUTPUT))
+    buffer.set_defaults(run=run_buffer)
+
+    rollup = commands.add_parser('rollup', help='aggregate the ledger per item, supplier or category')
+    rollup.add_argument('--input', default='processed_inventory.csv')
+    rollup.add_argument('--by', default='Category', help='comma-separated group-by columns')
+    rollup.add_argument('--freq', choices=['W', 'M'], help='also group by week or month')
+    rollup.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    rollup.add_argument('--workers', type=int, default=1)
+    rollup.add_argument('--output', default=output_path(ROLLUP_OUTPUT))
+    rollup.set_defaults(run=run_rollup)
+
+    audit = commands.add_parser('audit', help='compliance audit of the whole historical catalogue')
+    audit.add_argument('--input', required=True, help='MongoDB URI')
+    audit.add_argument('--database', default='historical_inventory_database')
+    audit.add_argument('--categories', help='comma-separated category collections, defaults to all')
+    audit.add_argument('--rules', help='JSON list of compliance rules, defaults to the built-in set')
+    audit.add_argument('--as-of', help='YYYY-MM-DD, defaults to now')
+    audit.add_argument('--output', default=output_path(COMPLIANCE_OUTPUT))
+    audit.add_argument('--counts', default=output_path(COMPLIANCE_COUNTS_OUTPUT), help='per-rule counts (JSON)')
+    audit.set_defaults(run=run_audit)
+
+    reconcile = commands.add_parser('reconcile', help='coherent forecasts at every level of the item hierarchy')
+    reconcile.add_argument('--input', default='processed_inventory.csv')
+    reconcile.add_argument('--levels', default='Category', help='comma-separated columns, each a level under the total')
+    reconcile.add_argument('--engine', choices=sorted(ENGINES), default='ses')
+    reconcile.add_argument('--method', choices=METHODS, default='mint_diag')
+    reconcile.add_argument('--value-col', default='Units Used')
+    reconcile.add_argument('--steps', type=int, default=12)
+    reconcile.add_argument('--output', default=output_path(RECONCILE_OUTPUT))
+    reconcile.set_defaults(run=run_reconcile)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError) as exc:
+        _log(f'demandcast {args.command}: {exc}')
+        return 1
+    return 0
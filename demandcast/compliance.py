@@ -0,0 +1,187 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from demandcast.inventory_db import DATE_FORMAT
+
+COMPLIANT = 'Compliant'
+NON_COMPLIANT = 'Non-Compliant'
+
+# The compliance rule set. Each rule names the report column it produces, the
+# product field it reads and one of RULE_CHECKS with its parameters; a product
+# missing the field fails the rule. Rules can also be loaded from a JSON list
+# of the same shape with load_rules.
+COMPLIANCE_RULES = [
+    {'name': 'Expiry Date', 'field': 'Expiry_Date', 'check': 'date_after_as_of'},
+    {'name': 'Storage Temperature', 'field': 'Temperature_Requirement', 'check': 'one_of',
+     'values': ['Room Temperature', 'Cool Storage']},
+]
+
+AUDIT_FIELDS = ['Product_ID', 'Product_Name', 'Date_Updated']
+BATCH_SIZE = 10_000
+
+
+# Dates stored as BSON dates or 'YYYY-MM-DD' strings, parsed in one pass like
+# inventory_db.to_expiry_date. Only values that fail the exact format (strings
+# with a time part) are parsed again from their first ten characters; anything
+# else becomes NaT.
+def to_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    dates = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry].astype('string').str.slice(0, 10), format=DATE_FORMAT,
+                                      errors='coerce')
+    return dates
+
+
+# Vectorized rule checks: (field values, rule, as_of) -> boolean Series
+RULE_CHECKS = {
+    # Compliant while the date is later than the audit date
+    'date_after_as_of': lambda values, rule, as_of: to_dates(values).dt.normalize() > as_of.normalize(),
+    'one_of': lambda values, rule, as_of: values.isin(rule['values']),
+    'present': lambda values, rule, as_of: values.notna(),
+    'between': lambda values, rule, as_of: pd.to_numeric(values, errors='coerce').between(rule['min'],
+                                                                                          rule['max']),
+}
+
+
+def validate_rules(rules):
+    if not rules:
+        raise ValueError('The compliance rule set is empty')
+    names = set()
+    for rule in rules:
+        missing = [key for key in ('name', 'field', 'check') if key not in rule]
+        if missing:
+            raise ValueError(f"Compliance rule {rule!r} is missing {', '.join(missing)}")
+        if rule['check'] not in RULE_CHECKS:
+            raise ValueError(f"Unknown compliance check {rule['check']!r} (expected one of {sorted(RULE_CHECKS)})")
+        if rule['name'] in names:
+            raise ValueError(f"Duplicate compliance rule {rule['name']!r}")
+        names.add(rule['name'])
+    return rules
+
+
+def load_rules(path):
+    with open(path) as f:
+        return validate_rules(json.load(f))
+
+
+# Evaluate every rule on every row of products at once. Adds a
+# Compliant/Non-Compliant column per rule, and Compliant (all rules pass) and
+# Violations (names of the failed rules) columns. Violations is looked up from
+# the bit pattern of failed rules, so only distinct patterns are joined.
+def audit_frame(products, rules=None, as_of=None):
+    rules = validate_rules(rules if rules is not None else COMPLIANCE_RULES)
+    as_of = pd.Timestamp(as_of or datetime.now())
+    report = products.copy()
+    names = [rule['name'] for rule in rules]
+    passed = np.empty((len(report), len(rules)), dtype=bool)
+    for i, rule in enumerate(rules):
+        values = report[rule['field']] if rule['field'] in report else pd.Series(np.nan, index=report.index)
+        passed[:, i] = RULE_CHECKS[rule['check']](values, rule, as_of).fillna(False).to_numpy(dtype=bool)
+        report[rule['name']] = pd.Categorical.from_codes(passed[:, i].astype(np.int8), [NON_COMPLIANT, COMPLIANT])
+    report['Compliant'] = passed.all(axis=1)
+    patterns, inverse = np.unique((~passed) @ (1 << np.arange(len(rules), dtype=np.int64)), return_inverse=True)
+    labels = np.array(['; '.join(name for bit, name in enumerate(names) if pattern >> bit & 1)
+                       for pattern in patterns], dtype=object)
+    report['Violations'] = labels[inverse.ravel()] if len(report) else pd.Series(dtype=object)
+    return report
+
+
+# Result of a catalogue-wide audit: the per-product report, and compliant /
+# non-compliant counts per category and rule
+class ComplianceAudit:
+    def __init__(self, report, rules, as_of, seconds):
+        self.report = report
+        self.rules = rules
+        self.as_of = as_of
+        self.seconds = seconds
+
+    @property
+    def products(self):
+        return len(self.report)
+
+    @property
+    def products_per_second(self):
+        return self.products / self.seconds if self.seconds > 0 else float('inf')
+
+    # One row per category and rule, plus an 'All' row per rule and for the
+    # overall Compliant column
+    @property
+    def counts(self):
+        names = [rule['name'] for rule in self.rules]
+        failed = self.report[names].eq(NON_COMPLIANT).assign(**{'All Rules': ~self.report['Compliant']})
+        failed['Category'] = self.report['Category']
+        by_category = failed.groupby('Category', sort=True).agg(['sum', 'size'])
+        total = failed.drop(columns='Category').agg(['sum', 'size']).unstack().to_frame().T
+        total.index = pd.Index(['All'], name='Category')
+        counts = pd.concat([by_category, total]).stack(level=0, future_stack=True)
+        counts.index.names = ['Category', 'Rule']
+        counts = counts.rename(columns={'sum': NON_COMPLIANT, 'size': 'Products'}).reset_index()
+        counts[COMPLIANT] = counts['Products'] - counts[NON_COMPLIANT]
+        return counts[['Category', 'Rule', 'Products', COMPLIANT, NON_COMPLIANT]].astype(
+            {'Products': 'int64', COMPLIANT: 'int64', NON_COMPLIANT: 'int64'})
+
+    def summary(self):
+        return {
+            'as_of': self.as_of.strftime(DATE_FORMAT),
+            'products': self.products,
+            'compliant': int(self.report['Compliant'].sum()),
+            'seconds': round(self.seconds, 3),
+            'rules': self.rules,
+            'counts': self.counts.to_dict(orient='records'),
+        }
+
+
+def _fields(rules):
+    return list(dict.fromkeys(AUDIT_FIELDS + [rule['field'] for rule in rules]))
+
+
+# Latest record of every product in one historical category collection, read
+# with a projection batch_size documents at a time. Documents without a
+# Product_ID belong to no product and are skipped.
+def _read_category(history_db, category, fields, batch_size):
+    projection = dict({'_id': 0}, **{field: 1 for field in fields})
+    frames, batch = [], []
+    for document in history_db[category].find({'Product_ID': {'$ne': None}}, projection, batch_size=batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            frames.append(pd.DataFrame.from_records(batch))
+            batch = []
+    if batch or not frames:
+        frames.append(pd.DataFrame.from_records(batch, columns=fields))
+    products = pd.concat(frames, ignore_index=True).reindex(columns=fields)
+    if products['Date_Updated'].notna().any():
+        products = products.assign(_updated=to_dates(products['Date_Updated'])).sort_values(
+            '_updated', kind='stable', na_position='first').drop(columns='_updated')
+    products = products.drop_duplicates('Product_ID', keep='last')
+    products.insert(0, 'Category', category)
+    return products
+
+
+# Audit the latest record of every product in every category collection of the
+# historical database (all of them unless categories is given). Collections are
+# read concurrently; the rules run once over the whole catalogue.
+def audit_catalogue(history_db, categories=None, rules=None, as_of=None, batch_size=BATCH_SIZE, max_workers=4):
+    started = time.perf_counter()
+    rules = validate_rules(rules if rules is not None else COMPLIANCE_RULES)
+    as_of = pd.Timestamp(as_of or datetime.now())
+    if categories is None:
+        categories = [name for name in history_db.list_collection_names() if not name.startswith('system.')]
+    categories = sorted(categories)
+    fields = _fields(rules)
+    if categories:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(categories))) as executor:
+            frames = list(executor.map(lambda category: _read_category(history_db, category, fields, batch_size),
+                                       categories))
+        products = pd.concat(frames, ignore_index=True)
+    else:
+        products = pd.DataFrame(columns=['Category'] + fields)
+    report = audit_frame(products, rules, as_of).sort_values(['Category', 'Product_ID'], ignore_index=True)
+    return ComplianceAudit(report, rules, as_of, time.perf_counter() - started)
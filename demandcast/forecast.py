@@ -0,0 +1,140 @@
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ORDER = (1, 1, 1)
+
+
+# Split the long-format ledger into one (item, dates, values) tuple per Item ID
+def ledger_series(ledger, value_col='Units Used', item_col='Item ID', date_col='Date'):
+    ledger = ledger[[item_col, date_col, value_col]].sort_values([item_col, date_col], kind='stable')
+    item_ids = ledger[item_col].to_numpy()
+    dates = pd.DatetimeIndex(pd.to_datetime(ledger[date_col]))
+    values = ledger[value_col].to_numpy(dtype=np.float64)
+    bounds = np.flatnonzero(np.diff(item_ids)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(item_ids)]])
+    return [(item_ids[s].item(), dates[s:e], values[s:e]) for s, e in zip(starts, ends)]
+
+
+# Dates following the end of a series, at the series' own frequency.
+# Ledgers with gaps (e.g. missing months) fall back to the frequency of the tail.
+def future_dates(dates, steps):
+    for window in (len(dates), 4):
+        freq = pd.infer_freq(dates[-window:]) if len(dates) >= 3 else None
+        if freq is not None:
+            return pd.date_range(dates[-1], periods=steps + 1, freq=freq)[1:]
+    step = dates[-1] - dates[-2] if len(dates) >= 2 else pd.Timedelta(days=1)
+    return pd.DatetimeIndex([dates[-1] + step * (i + 1) for i in range(steps)])
+
+
+def fit_arima(values, order=DEFAULT_ORDER, steps=12):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results = ARIMA(np.asarray(values, dtype=np.float64), order=order).fit()
+    return np.asarray(results.forecast(steps=steps))
+
+
+# Runs in a worker process: forecast every series of one chunk.
+# Failures are returned, not raised, so one bad series does not sink its chunk.
+# With order='auto' each series first gets its own order search.
+def _forecast_chunk(chunk, order, steps, criterion='aic'):
+    from demandcast.order_search import search_arima_order
+
+    results = []
+    for item_id, values in chunk:
+        started = time.perf_counter()
+        search = None
+        try:
+            if order == 'auto':
+                search = search_arima_order(values, criterion=criterion)
+            forecast, error = fit_arima(values, search.order if search else order, steps), None
+        except Exception as exc:
+            forecast, error = None, f'{type(exc).__name__}: {exc}'
+        results.append((item_id, forecast, error, time.perf_counter() - started, search))
+    return results
+
+
+# Forecasts, failures and timings of one batch run
+class BatchForecast:
+    def __init__(self, forecasts, failures, timings, wall_seconds, workers):
+        self.forecasts = forecasts
+        self.failures = failures
+        self.timings = timings
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+
+    @property
+    def series_per_second(self):
+        return len(self.timings) / self.wall_seconds if self.wall_seconds > 0 else float('inf')
+
+    @property
+    def search_seconds(self):
+        return float(self.timings['Search Seconds'].sum())
+
+    @property
+    def candidates_pruned(self):
+        return int(self.timings['Pruned'].sum())
+
+
+# Forecast every item of the ledger with ARIMA, at a fixed order or, with
+# order='auto', at the order chosen per series by the information criterion.
+# Series are submitted to a process pool in chunks of chunk_size to amortize
+# pickling and scheduling; max_workers=1 fits in this process instead.
+# Returns a BatchForecast whose forecasts frame is tidy: Item ID, Date, Forecast.
+def batch_forecast(ledger, value_col='Units Used', steps=12, order=DEFAULT_ORDER,
+                   max_workers=None, chunk_size=None, min_length=None, criterion='aic'):
+    started = time.perf_counter()
+    series = ledger_series(ledger, value_col)
+    min_length = min_length if min_length is not None else sum(DEFAULT_ORDER if order == 'auto' else order) + 2
+    dates_by_item = {item_id: dates for item_id, dates, _ in series}
+
+    too_short = [(item_id, f'series has {len(values)} observations, needs {min_length}')
+                 for item_id, _, values in series if len(values) < min_length]
+    tasks = [(item_id, values) for item_id, _, values in series if len(values) >= min_length]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, len(tasks) // (max_workers * 4))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    results = []
+    if max_workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            results.extend(_forecast_chunk(chunk, order, steps, criterion))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_forecast_chunk, chunk, order, steps, criterion) for chunk in chunks]
+            for future in as_completed(futures):
+                results.extend(future.result())
+
+    frames, failures, timings = [], list(too_short), []
+    for item_id, forecast, error, seconds, search in results:
+        timings.append((item_id, seconds, error is None,
+                        search.order if search else order,
+                        search.seconds if search else 0.0,
+                        search.pruned if search else 0))
+        if error is not None:
+            failures.append((item_id, error))
+            continue
+        frames.append(pd.DataFrame({
+            'Item ID': item_id,
+            'Date': future_dates(dates_by_item[item_id], steps),
+            'Forecast': forecast,
+        }))
+
+    forecasts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Item ID', 'Date', 'Forecast'])
+    forecasts = forecasts.sort_values(['Item ID', 'Date'], ignore_index=True)
+    return BatchForecast(
+        forecasts,
+        pd.DataFrame(failures, columns=['Item ID', 'Error']),
+        pd.DataFrame(timings, columns=['Item ID', 'Seconds', 'Succeeded', 'Order', 'Search Seconds', 'Pruned']).sort_values('Item ID', ignore_index=True),
+        time.perf_counter() - started,
+        max_workers,
+    )
@@ -0,0 +1,166 @@
+import queue
+import threading
+import time
+
+import pandas as pd
+from pymongo import ASCENDING, ReplaceOne
+
+from demandcast.inventory_db import DATE_FORMAT
+
+# Columns of a historical inventory export (the layout of daily.csv). Only the
+# required ones must be present; other known columns are coerced when they are,
+# unknown columns are stored as they were read.
+REQUIRED_COLUMNS = ['Product_ID', 'Category', 'Date_Updated']
+TEXT_COLUMNS = ['Product_ID', 'Product_Name', 'Category', 'Temperature_Requirement', 'Compliance_Status']
+NUMERIC_COLUMNS = ['Stock_Level', 'Max_Capacity', 'Forecasted_Demand', 'Emergency_Stock_Level']
+DATE_COLUMNS = ['Date_Updated', 'Expiry_Date']
+
+CHUNK_ROWS = 50_000
+BATCH_SIZE = 1000
+# Parsed chunks allowed to wait for the writer before the reader blocks
+MAX_PENDING_CHUNKS = 2
+
+_indexed = set()
+
+
+# Counters of one ingestion run, updated as chunks are read and written
+class IngestProgress:
+    def __init__(self, total_bytes=None):
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.chunks = 0
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows_written / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def fraction(self):
+        if not self.total_bytes:
+            return None
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+
+# Validate and coerce one chunk in place of a row loop: text columns are
+# stripped, numbers and dates parsed with errors='coerce' (whole numbers kept
+# as integers). A row is rejected when a required column is empty or a present
+# value fails to parse.
+# Returns (valid rows, number of rejected rows).
+def coerce_chunk(chunk):
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Upload is missing columns: {', '.join(missing)}")
+    chunk = chunk.copy()
+    invalid = pd.Series(False, index=chunk.index)
+    for column in chunk.columns.intersection(TEXT_COLUMNS):
+        text = chunk[column].astype('string').str.strip()
+        chunk[column] = text.mask(text == '')
+    for column in chunk.columns.intersection(NUMERIC_COLUMNS):
+        parsed = pd.to_numeric(chunk[column], errors='coerce')
+        invalid |= parsed.isna() & chunk[column].notna()
+        if parsed.notna().any() and (parsed.dropna() % 1 == 0).all():
+            parsed = parsed.astype('Int64')
+        chunk[column] = parsed
+    for column in chunk.columns.intersection(DATE_COLUMNS):
+        parsed = pd.to_datetime(chunk[column], format=DATE_FORMAT, errors='coerce')
+        invalid |= parsed.isna() & chunk[column].notna()
+        chunk[column] = parsed
+    invalid |= chunk[REQUIRED_COLUMNS].isna().any(axis=1)
+    return chunk[~invalid], int(invalid.sum())
+
+
+# Stream a CSV through coerce_chunk into write(frame), chunk_rows rows at a time.
+# Reading and writing overlap: a writer thread drains a queue of at most
+# max_pending parsed chunks, and the reader blocks when it is full, so memory
+# stays bounded by a few chunks whatever the file size. progress_callback is
+# called on the calling thread after every chunk and once at the end.
+def ingest_csv(source, write, chunk_rows=CHUNK_ROWS, max_pending=MAX_PENDING_CHUNKS, progress_callback=None,
+               total_bytes=None):
+    progress = IngestProgress(total_bytes)
+    chunks = queue.Queue(maxsize=max_pending)
+    errors = []
+
+    def writer():
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if errors:
+                continue
+            try:
+                write(chunk)
+                progress.rows_written += len(chunk)
+            except Exception as exc:
+                errors.append(exc)
+
+    thread = threading.Thread(target=writer, name='ingest-writer', daemon=True)
+    thread.start()
+    try:
+        reader = pd.read_csv(source, dtype=str, keep_default_na=False, na_values=[''], chunksize=chunk_rows)
+        for chunk in reader:
+            valid, rejected = coerce_chunk(chunk)
+            progress.chunks += 1
+            progress.rows_read += len(chunk)
+            progress.rows_rejected += rejected
+            if hasattr(source, 'tell'):
+                progress.bytes_read = source.tell()
+            if errors:
+                break
+            if len(valid):
+                chunks.put(valid)
+            if progress_callback:
+                progress_callback(progress)
+    finally:
+        chunks.put(None)
+        thread.join()
+    if errors:
+        raise errors[0]
+    progress.finished = time.perf_counter()
+    if progress.total_bytes:
+        progress.bytes_read = progress.total_bytes
+    if progress_callback:
+        progress_callback(progress)
+    return progress
+
+
+def _ensure_history_index(history_db, category):
+    key = (history_db.name, category)
+    if key not in _indexed:
+        history_db[category].create_index([('Product_ID', ASCENDING), ('Date_Updated', ASCENDING)],
+                                          name='product_date')
+        _indexed.add(key)
+
+
+# Sink for ingest_csv: upserts every row into its category's collection of the
+# historical database, keyed on (Product_ID, Date_Updated) so re-uploading an
+# export does not duplicate it, in unordered bulk_writes of batch_size rows.
+# Categories not seen before are added to categories_collection.
+def history_writer(history_db, categories_collection=None, batch_size=BATCH_SIZE):
+    known = set(categories_collection.distinct('Category')) if categories_collection is not None else None
+
+    def write(frame):
+        for category, rows in frame.groupby('Category', sort=False):
+            _ensure_history_index(history_db, category)
+            records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+            collection = history_db[category]
+            for start in range(0, len(records), batch_size):
+                operations = []
+                for record in records[start:start + batch_size]:
+                    record = {k: v for k, v in record.items() if v is not None}
+                    key = {'Product_ID': record['Product_ID'], 'Date_Updated': record['Date_Updated']}
+                    operations.append(ReplaceOne(key, record, upsert=True))
+                collection.bulk_write(operations, ordered=False)
+            if known is not None and category not in known:
+                categories_collection.update_one({'Category': category}, {'$set': {'Category': category}}, upsert=True)
+                known.add(category)
+
+    return write
@@ -0,0 +1,312 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from demandcast.outputs import _replace
+
+# Spans are recorded only when DEMANDCAST_INSTRUMENT is set; otherwise span()
+# returns a shared no-op and timed() leaves functions undecorated.
+ENABLED = os.environ.get('DEMANDCAST_INSTRUMENT', '') not in ('', '0')
+# Per-rerun capture: 'cpu' (cProfile), 'memory' (tracemalloc) or both, comma separated
+PROFILE = {flag.strip() for flag in os.environ.get('DEMANDCAST_PROFILE', '').split(',') if flag.strip()}
+# Every finished rerun is appended to this file as a JSON line, or, for a
+# .prom file, the span totals are rewritten in Prometheus text format
+METRICS_FILE = os.environ.get('DEMANDCAST_METRICS_FILE', '')
+
+PHASES = ['load', 'compute', 'query', 'render']
+PROFILE_LINES = 25
+MEMORY_LINES = 10
+
+
+class _Local(threading.local):
+    rerun = None
+
+
+# Span totals per (page, span, phase) since the process started, and the last
+# finished rerun of every page. Each Streamlit session reruns on its own
+# thread, so the rerun being recorded is thread-local.
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = _Local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.totals = {}
+            self.reruns = {}
+            self.last = {}
+
+    @property
+    def current(self):
+        return self._local.rerun
+
+    def add(self, name, phase, seconds, depth):
+        rerun = self.current
+        page = rerun['page'] if rerun is not None else ''
+        if rerun is not None:
+            rerun['spans'].append({'name': name, 'phase': phase, 'depth': depth, 'seconds': seconds})
+        with self._lock:
+            total = self.totals.setdefault((page, name, phase), [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            total[2] = max(total[2], seconds)
+
+    def start(self, page):
+        self._local.rerun = {'page': page, 'time': datetime.now().isoformat(timespec='seconds'), 'spans': [],
+                             'depth': 0, 'started': time.perf_counter()}
+
+    def finish(self):
+        rerun, self._local.rerun = self.current, None
+        if rerun is None:
+            return None
+        rerun['seconds'] = time.perf_counter() - rerun.pop('started')
+        del rerun['depth']
+        with self._lock:
+            total = self.reruns.setdefault(rerun['page'], [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += rerun['seconds']
+            total[2] = max(total[2], rerun['seconds'])
+            self.last[rerun['page']] = rerun
+        return rerun
+
+    # Span totals as rows: page, span, phase, count, total and max seconds
+    def snapshot(self):
+        with self._lock:
+            return [{'page': page, 'span': name, 'phase': phase, 'count': count, 'seconds': seconds,
+                     'max_seconds': longest}
+                    for (page, name, phase), (count, seconds, longest) in sorted(self.totals.items())]
+
+
+recorder = Recorder()
+
+
+class _Span:
+    def __init__(self, name, phase):
+        self.name = name
+        self.phase = phase
+
+    def __enter__(self):
+        rerun = recorder.current
+        self._depth = rerun['depth'] if rerun is not None else 0
+        if rerun is not None:
+            rerun['depth'] += 1
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._started
+        rerun = recorder.current
+        if rerun is not None:
+            rerun['depth'] = self._depth
+        recorder.add(self.name, self.phase, seconds, self._depth)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+# Time the enclosed block as one of PHASES
+def span(name, phase='compute'):
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(name, phase)
+
+
+# Decorator timing every call of a function as a span named after it. Whether
+# instrumentation is on is decided when the function is decorated.
+def timed(name=None, phase='compute'):
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or function.__name__
+
+        def wrapper(*args, **kwargs):
+            with _Span(label, phase):
+                return function(*args, **kwargs)
+
+        wrapper.__name__ = function.__name__
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    return decorate
+
+
+def set_enabled(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def _start_profiles():
+    profiler = None
+    if 'cpu' in PROFILE:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if 'memory' in PROFILE:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    return profiler
+
+
+# Top PROFILE_LINES functions by cumulative time, and the traced memory with
+# the top MEMORY_LINES allocation sites. tracemalloc traces every thread, so
+# with concurrent sessions the memory figures cover all of them.
+def _finish_profiles(profiler, rerun):
+    if profiler is not None:
+        import io
+        import pstats
+
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        rerun['profile'] = out.getvalue()
+    if 'memory' in PROFILE:
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:MEMORY_LINES]
+        rerun['memory'] = {'current_kb': current / 1024, 'peak_kb': peak / 1024,
+                           'top': [str(stat) for stat in top]}
+
+
+# Mark the start of a page's rerun. An unfinished rerun on this thread (the
+# script was stopped or rerun early) is discarded.
+def start_rerun(page):
+    if not ENABLED:
+        return
+    unfinished = recorder.current
+    if unfinished is not None and unfinished['profiler'] is not None:
+        unfinished['profiler'].disable()
+    recorder.start(page)
+    recorder.current['profiler'] = _start_profiles()
+
+
+# Record the rerun started on this thread, export it and return it (None when
+# instrumentation is off)
+def finish_rerun():
+    if not ENABLED or recorder.current is None:
+        return None
+    profiler = recorder.current.pop('profiler')
+    rerun = recorder.finish()
+    _finish_profiles(profiler, rerun)
+    if METRICS_FILE:
+        export(METRICS_FILE, rerun)
+    return rerun
+
+
+# Record the enclosed block as one rerun of page, however it exits
+@contextmanager
+def rerun(page):
+    start_rerun(page)
+    try:
+        yield
+    finally:
+        finish_rerun()
+
+
+_export_lock = threading.Lock()
+
+
+def export(path, rerun):
+    with _export_lock:
+        if path.endswith('.prom'):
+            write_prometheus(path)
+        else:
+            append_jsonl(path, rerun)
+
+
+def append_jsonl(path, rerun):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(rerun) + '\n')
+
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+# Span and rerun totals in the Prometheus text exposition format
+def prometheus_text():
+    lines = ['# HELP demandcast_span_seconds Time spent in instrumented spans',
+             '# TYPE demandcast_span_seconds summary']
+    rows = recorder.snapshot()
+    for row in rows:
+        labels = _labels(page=row['page'], span=row['span'], phase=row['phase'])
+        lines.append(f"demandcast_span_seconds_count{labels} {row['count']}")
+        lines.append(f"demandcast_span_seconds_sum{labels} {row['seconds']:.6f}")
+    lines += ['# HELP demandcast_span_seconds_max Longest single span',
+              '# TYPE demandcast_span_seconds_max gauge']
+    for row in rows:
+        labels = _labels(page=row['page'], span=row['span'], phase=row['phase'])
+        lines.append(f"demandcast_span_seconds_max{labels} {row['max_seconds']:.6f}")
+    lines += ['# HELP demandcast_rerun_seconds Time spent in page reruns',
+              '# TYPE demandcast_rerun_seconds summary']
+    with recorder._lock:
+        reruns = sorted(recorder.reruns.items())
+    for page, (count, seconds, _) in reruns:
+        lines.append(f'demandcast_rerun_seconds_count{_labels(page=page)} {count}')
+        lines.append(f'demandcast_rerun_seconds_sum{_labels(page=page)} {seconds:.6f}')
+    return '\n'.join(lines) + '\n'
+
+
+# Rewritten whole on every export, for a node exporter's textfile collector
+def write_prometheus(path):
+    text = prometheus_text()
+
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            f.write(text)
+
+    _replace(path, write)
+
+
+# "Performance" panel for container (st.sidebar): the page's last rerun by
+# span, the span totals and any profile captured. Nothing is drawn while
+# instrumentation is off.
+def performance_panel(container, page):
+    if not ENABLED:
+        return
+    import pandas as pd
+
+    rerun = recorder.last.get(page)
+    panel = container.expander('Performance')
+    if rerun is None:
+        panel.caption('No rerun recorded yet.')
+        return
+    panel.caption(f"Last rerun {rerun['seconds'] * 1000:.1f} ms at {rerun['time']}")
+    spans = pd.DataFrame(rerun['spans'], columns=['name', 'phase', 'depth', 'seconds'])
+    spans['name'] = ['  ' * depth + name for depth, name in zip(spans['depth'], spans['name'])]
+    spans['ms'] = spans.pop('seconds') * 1000
+    panel.dataframe(spans.drop(columns='depth'), hide_index=True, width='stretch')
+    totals = pd.DataFrame(row for row in recorder.snapshot() if row['page'] in (page, ''))
+    if not totals.empty:
+        totals['mean_ms'] = totals['seconds'] * 1000 / totals['count']
+        totals['max_ms'] = totals['max_seconds'] * 1000
+        panel.dataframe(totals[['span', 'phase', 'count', 'mean_ms', 'max_ms']], hide_index=True,
+                        width='stretch')
+    if 'memory' in rerun:
+        panel.caption(f"Traced memory {rerun['memory']['current_kb']:,.0f} KB, "
+                      f"peak {rerun['memory']['peak_kb']:,.0f} KB")
+        panel.code('\n'.join(rerun['memory']['top']))
+    if 'profile' in rerun:
+        panel.code(rerun['profile'])
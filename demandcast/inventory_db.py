@@ -0,0 +1,313 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+from demandcast.summary import apply_stock_change
+
+DATE_FORMAT = '%Y-%m-%d'
+EXPIRY_PROJECTION = {'_id': 0, 'Product_ID': 1, 'Expiry_Date': 1}
+STOCK_PROJECTION = {'_id': 0, 'Product_ID': 1, 'Product_Name': 1, 'Stock_Level': 1, 'Max_Capacity': 1,
+                    'Date_Updated': 1, 'Expiry_Date': 1}
+
+# Databases whose indexes were already ensured by this process
+_indexed = set()
+# Databases whose server rejected $unionWith
+_no_union = set()
+
+
+def product_collection(db, category):
+    return db[f'{category}_collection']
+
+
+def list_categories(categories_collection):
+    return sorted(categories_collection.distinct('Category'))
+
+
+# Expiry dates are stored as BSON dates; older documents hold 'YYYY-MM-DD' strings
+def to_expiry_date(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:10], DATE_FORMAT)
+
+
+def format_expiry_date(value):
+    return value.strftime(DATE_FORMAT) if isinstance(value, datetime) else str(value)[:10]
+
+
+# Create the Product_ID and Expiry_Date indexes on every category collection,
+# once per process and database
+def ensure_indexes(db, categories):
+    for category in categories:
+        key = (db.name, category)
+        if key in _indexed:
+            continue
+        collection = product_collection(db, category)
+        collection.create_index([('Product_ID', ASCENDING)], name='product_id')
+        collection.create_index([('Expiry_Date', ASCENDING)], name='expiry_date', sparse=True)
+        _indexed.add(key)
+
+
+# Rewrite string expiry dates as BSON dates, batch_size documents per bulk_write
+def migrate_expiry_dates(db, categories, batch_size=1000):
+    migrated = 0
+    for category in categories:
+        collection = product_collection(db, category)
+        cursor = collection.find({'Expiry_Date': {'$type': 'string'}}, {'_id': 1, 'Expiry_Date': 1})
+        batch = []
+        for document in cursor:
+            try:
+                expiry_date = to_expiry_date(document['Expiry_Date'])
+            except ValueError:
+                continue
+            batch.append(UpdateOne({'_id': document['_id']}, {'$set': {'Expiry_Date': expiry_date}}))
+            if len(batch) >= batch_size:
+                migrated += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            migrated += collection.bulk_write(batch, ordered=False).modified_count
+    return migrated
+
+
+# Documents expired before now. Both operands are compared on the server: the
+# date bound matches migrated documents, the ISO string bound legacy ones, and
+# each uses the Expiry_Date index. A legacy 'YYYY-MM-DD' stands for midnight of
+# that day, so it includes today's date once now is past midnight, as the date
+# bound does.
+def expired_filter(now):
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {'$or': [
+        {'Expiry_Date': {'$lt': now}},
+        {'Expiry_Date': {'$lte' if now > midnight else '$lt': now.strftime(DATE_FORMAT)}},
+    ]}
+
+
+def _category_pipeline(category, now):
+    return [
+        {'$match': expired_filter(now)},
+        {'$project': dict(EXPIRY_PROJECTION)},
+        {'$addFields': {'Category': category}},
+    ]
+
+
+# All categories in one aggregation: the first collection's pipeline with every
+# other collection merged in by $unionWith (MongoDB 4.4+)
+def _expired_union(db, categories, now):
+    pipeline = _category_pipeline(categories[0], now)
+    for category in categories[1:]:
+        pipeline.append({'$unionWith': {
+            'coll': product_collection(db, category).name,
+            'pipeline': _category_pipeline(category, now),
+        }})
+    return list(product_collection(db, categories[0]).aggregate(pipeline))
+
+
+# One projected query per category, issued concurrently
+def _expired_concurrent(db, categories, now, max_workers=8):
+    # A copy of the projection per query: mongomock edits the one it is given in
+    # place, which breaks queries running at the same time
+    def query(category):
+        documents = product_collection(db, category).find(expired_filter(now), dict(EXPIRY_PROJECTION))
+        return [dict(document, Category=category) for document in documents]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(categories))) as executor:
+        return [document for documents in executor.map(query, categories) for document in documents]
+
+
+# (category, product ID, expiry date) of every expired product, across all
+# category collections. method='union' falls back to concurrent queries on
+# servers (or stand-ins) without $unionWith.
+def find_expired_products(db, categories, now=None, method='union'):
+    categories = list(categories)
+    if not categories:
+        return []
+    now = now or datetime.now()
+    documents = None
+    if method == 'union' and db.name not in _no_union:
+        try:
+            documents = _expired_union(db, categories, now)
+        except (OperationFailure, NotImplementedError):
+            _no_union.add(db.name)
+    if documents is None:
+        documents = _expired_concurrent(db, categories, now)
+    expired = [(d['Category'], d['Product_ID'], format_expiry_date(d['Expiry_Date'])) for d in documents]
+    return sorted(expired, key=lambda row: (row[0], row[2], str(row[1])))
+
+
+# Latency and throughput of every bulk_write batch of one bulk update
+class BulkReport:
+    def __init__(self):
+        self.batches = []
+        self.rejected = []
+
+    def add_batch(self, category, operations, seconds, result):
+        self.batches.append({
+            'Category': category,
+            'Operations': operations,
+            'Matched': result.matched_count,
+            'Upserted': result.upserted_count,
+            'Seconds': seconds,
+            'Ops/s': operations / seconds if seconds > 0 else float('inf'),
+        })
+
+    @property
+    def operations(self):
+        return sum(batch['Operations'] for batch in self.batches)
+
+    @property
+    def seconds(self):
+        return sum(batch['Seconds'] for batch in self.batches)
+
+    @property
+    def throughput(self):
+        return self.operations / self.seconds if self.seconds > 0 else float('inf')
+
+
+# Upsert field values keyed on Product_ID, one unordered bulk_write of at most
+# batch_size UpdateOne operations at a time per category collection.
+# frame needs Category and Product_ID columns plus every column in fields.
+def bulk_upsert(db, frame, fields, batch_size=1000, report=None):
+    report = report if report is not None else BulkReport()
+    for category, rows in frame.groupby('Category', sort=True, observed=True):
+        collection = product_collection(db, category)
+        product_ids = rows['Product_ID'].tolist()
+        updates = rows[list(fields)].to_dict('records')
+        for start in range(0, len(rows), batch_size):
+            operations = [
+                UpdateOne({'Product_ID': product_id}, {'$set': update}, upsert=True)
+                for product_id, update in zip(product_ids[start:start + batch_size], updates[start:start + batch_size])
+            ]
+            started = time.perf_counter()
+            result = collection.bulk_write(operations, ordered=False)
+            report.add_batch(category, len(operations), time.perf_counter() - started, result)
+    return report
+
+
+def _clean_feed(frame, required):
+    missing = [column for column in required if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Feed is missing columns: {', '.join(missing)}")
+    frame = frame[required].copy()
+    frame['Category'] = frame['Category'].astype(str).str.strip()
+    frame['Product_ID'] = frame['Product_ID'].astype(str).str.strip()
+    return frame
+
+
+# Apply a supplier expiry feed (Category, Product_ID, Expiry_Date). Dates are
+# parsed in one vectorized pass; unparseable rows are skipped and reported.
+def bulk_update_expiry(db, frame, batch_size=1000):
+    frame = _clean_feed(frame, ['Category', 'Product_ID', 'Expiry_Date'])
+    frame['Expiry_Date'] = pd.to_datetime(frame['Expiry_Date'], format=DATE_FORMAT, errors='coerce')
+    valid = frame['Expiry_Date'].notna() & (frame['Product_ID'] != '')
+    report = BulkReport()
+    report.rejected = frame.index[~valid].tolist()
+    return bulk_upsert(db, frame[valid], ['Expiry_Date'], batch_size, report)
+
+
+# Apply a storage temperature feed (Category, Product_ID, Storage_Temperature)
+def bulk_update_temperature(db, frame, batch_size=1000):
+    frame = _clean_feed(frame, ['Category', 'Product_ID', 'Storage_Temperature'])
+    valid = frame['Storage_Temperature'].notna() & (frame['Product_ID'] != '')
+    report = BulkReport()
+    report.rejected = frame.index[~valid].tolist()
+    return bulk_upsert(db, frame[valid], ['Storage_Temperature'], batch_size, report)
+
+
+# Clear the expiry date of several (category, product ID) pairs with one
+# update_many per category
+def mark_expiry_done(db, selections):
+    by_category = {}
+    for category, product_id in selections:
+        by_category.setdefault(category, []).append(product_id)
+    cleared = 0
+    for category, product_ids in by_category.items():
+        result = product_collection(db, category).update_many(
+            {'Product_ID': {'$in': product_ids}},
+            {'$unset': {'Expiry_Date': ''}},
+        )
+        cleared += result.modified_count
+    return cleared
+
+
+# Insert or update the stock report of one product, register its category and
+# fold the change into the materialized summary
+def upsert_stock_report(db, category, product_id, fields):
+    before = product_collection(db, category).find_one_and_update(
+        {'Product_ID': product_id}, {'$set': fields}, upsert=True, return_document=ReturnDocument.BEFORE)
+    db['categories'].update_one({'Category': category}, {'$set': {'Category': category}}, upsert=True)
+    apply_stock_change(db, category, before, dict(before or {}, Product_ID=product_id, **fields))
+
+
+def remove_stock_report(db, category, product_id):
+    before = product_collection(db, category).find_one_and_delete({'Product_ID': product_id})
+    if before is None:
+        return 0
+    apply_stock_change(db, category, before, None)
+    return 1
+
+
+def stock_filter(after=None, id_prefix=None):
+    query = {}
+    if after is not None:
+        query.setdefault('Product_ID', {})['$gt'] = after
+    if id_prefix:
+        # An anchored, case-sensitive prefix is answered from the Product_ID index
+        query.setdefault('Product_ID', {})['$regex'] = '^' + re.escape(id_prefix)
+    return query
+
+
+# One page of a category's stock reports in Product_ID order, starting after
+# the Product_ID `after` (keyset pagination: no skip, so every page costs the
+# same however deep it is). Returns (rows, has_next).
+def stock_page(db, category, after=None, page_size=50, id_prefix=None):
+    cursor = product_collection(db, category).find(stock_filter(after, id_prefix), dict(STOCK_PROJECTION))
+    rows = list(cursor.sort('Product_ID', ASCENDING).limit(page_size + 1))
+    return rows[:page_size], len(rows) > page_size
+
+
+# Serves stock pages and fetches the page after each served one in the
+# background, so paging forward usually finds its rows already loaded.
+# Prefetched pages are used once; at most max_pending are kept.
+class PagePrefetcher:
+    def __init__(self, max_workers=2, max_pending=32):
+        self.max_pending = max_pending
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stock-prefetch')
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _submit(self, key, db, category, after, page_size, filters):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = self._executor.submit(stock_page, db, category, after, page_size, **filters)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)[1].cancel()
+
+    def get(self, db, category, after=None, page_size=50, **filters):
+        key = (db.name, category, after, page_size, tuple(sorted(filters.items())))
+        with self._lock:
+            future = self._pending.pop(key, None)
+        if future is not None:
+            try:
+                rows, has_next = future.result()
+                self.hits += 1
+            except Exception:
+                future = None
+        if future is None:
+            self.misses += 1
+            rows, has_next = stock_page(db, category, after, page_size, **filters)
+        if has_next:
+            after = rows[-1]['Product_ID']
+            self._submit(key[:2] + (after,) + key[3:], db, category, after, page_size, filters)
+        return rows, has_next
+
+
+stock_prefetcher = PagePrefetcher()
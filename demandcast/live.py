@@ -0,0 +1,193 @@
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from demandcast.loader import DAILY_SCHEMA
+from demandcast.status import STATUSES, classify_status_codes, summarize_counts
+
+# How often the watchers check for changes, and how often open dashboards redraw
+POLL_SECONDS = float(os.environ.get('DEMANDCAST_LIVE_POLL_SECONDS', 1.0))
+STATUS_COLUMNS = ['Stock_Level', 'Max_Capacity']
+# Bytes before the last read position compared to tell an append from a rewrite
+TAIL_BYTES = 4096
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+# Process-wide watcher for key, created and started by create() on first use.
+# create may return None (nothing to watch), which is remembered as well.
+def shared_watcher(key, create):
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = create()
+        return _watchers[key]
+
+
+# Version counter the watcher threads bump on every applied change, so sessions
+# can tell whether anything moved since they last drew
+class Versioned:
+    def __init__(self):
+        self.version = 0
+        self.changes = 0
+        self.error = None
+        self._version_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _bump(self, changes):
+        with self._version_lock:
+            self.version += 1
+            self.changes += changes
+
+    def _start_thread(self, target, name):
+        self._thread = threading.Thread(target=target, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# Stock status counts of a daily.csv-style file, kept current by a thread that
+# polls the file's size and mtime. Appended rows are the only ones read and
+# classified, so an update costs O(new rows); a file that was rewritten rather
+# than appended to is classified again from scratch. A trailing line without a
+# newline is left for the next poll.
+class CsvStatusWatcher(Versioned):
+    def __init__(self, path, schema=DAILY_SCHEMA, poll_seconds=POLL_SECONDS):
+        super().__init__()
+        self.path = path
+        self.dtype = {k: v for k, v in (schema.get('dtype') or {}).items() if k in STATUS_COLUMNS}
+        self.poll_seconds = poll_seconds
+        self.counts = np.zeros(len(STATUSES), dtype=np.int64)
+        self.rows = 0
+        self.rebuilds = 0
+        self.appends = 0
+        self._columns = None
+        self._offset = 0
+        self._tail = b''
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._polling = threading.Lock()
+
+    def summary(self):
+        with self._lock:
+            summary = summarize_counts(self.counts)
+        summary['version'] = self.version
+        return summary
+
+    # Start from counts computed elsewhere (the metrics batch job's output),
+    # valid for the file as it is now
+    def seed(self, counts):
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            f.seek(max(stat.st_size - TAIL_BYTES, 0))
+            tail = f.read()
+        cut = tail.rfind(b'\n') + 1
+        with self._lock:
+            self._columns = list(pd.read_csv(self.path, nrows=0).columns)
+            self.counts = np.array([counts[status] for status in STATUSES], dtype=np.int64)
+            self.rows = int(self.counts.sum())
+            self._offset = stat.st_size - len(tail) + cut
+            self._tail, self._mtime = tail[:cut], stat.st_mtime_ns
+        self._bump(0)
+
+    def _classify(self, data, header):
+        frame = pd.read_csv(BytesIO(data), header=0 if header else None, names=None if header else self._columns,
+                            usecols=STATUS_COLUMNS, dtype=self.dtype)
+        codes = classify_status_codes(frame['Stock_Level'].to_numpy(), frame['Max_Capacity'].to_numpy())
+        return np.bincount(codes, minlength=len(STATUSES)), len(frame)
+
+    # True when the file only grew since the last read: its last TAIL_BYTES
+    # read bytes are still in place
+    def _is_append(self, f, size):
+        if self._offset == 0 or size < self._offset:
+            return False
+        f.seek(self._offset - len(self._tail))
+        return f.read(len(self._tail)) == self._tail
+
+    def _append(self, data, mtime):
+        end = data.rfind(b'\n') + 1
+        counts, rows = self._classify(data[:end], header=False) if end else (0, 0)
+        with self._lock:
+            self.counts += counts
+            self.rows += rows
+            self._offset += end
+            self._tail = (self._tail + data[:end])[-TAIL_BYTES:]
+            self._mtime = mtime
+            self.appends += bool(rows)
+        return rows
+
+    def _rebuild(self, data, mtime):
+        end = data.rfind(b'\n') + 1
+        columns = list(pd.read_csv(BytesIO(data[:end]), nrows=0).columns) if end else None
+        counts, rows = self._classify(data[:end], header=True) if end else (np.zeros(len(STATUSES), np.int64), 0)
+        with self._lock:
+            self._columns = columns
+            self.counts = counts.astype(np.int64)
+            self.rows = rows
+            self._offset, self._tail, self._mtime = end, data[max(end - TAIL_BYTES, 0):end], mtime
+            self.rebuilds += 1
+        return rows
+
+    # Apply whatever changed since the last poll; returns the rows read. Safe to
+    # call from a session while the watcher thread runs.
+    def poll(self):
+        with self._polling:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if stat.st_size == self._offset and stat.st_mtime_ns == self._mtime:
+                return 0
+            with open(self.path, 'rb') as f:
+                if self._is_append(f, stat.st_size):
+                    rows = self._append(f.read(stat.st_size - self._offset), stat.st_mtime_ns)
+                    changed = rows > 0
+                else:
+                    f.seek(0)
+                    rows = self._rebuild(f.read(stat.st_size), stat.st_mtime_ns)
+                    changed = True
+        if changed:
+            self._bump(rows)
+        return rows
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+                self.error = None
+            except Exception as exc:
+                self.error = f'{type(exc).__name__}: {exc}'
+
+    def start(self):
+        self.poll()
+        self._start_thread(self._run, f'watch-{os.path.basename(self.path)}')
+        return self
+
+
+# The process-wide status watcher of a CSV, started on first use. seed is
+# called once, on first use; when it returns counts (e.g. the metrics batch
+# job's, valid for the file as it is) the file is not classified on startup.
+def watch_csv_status(path, schema=DAILY_SCHEMA, seed=None):
+    def create():
+        watcher = CsvStatusWatcher(path, schema)
+        counts = seed() if seed is not None else None
+        if counts is not None:
+            watcher.seed(counts)
+        return watcher.start()
+
+    return shared_watcher(('csv', os.path.abspath(path)), create)
+
+
+def stop_watchers():
+    with _watchers_lock:
+        for watcher in _watchers.values():
+            if watcher is not None:
+                watcher.stop()
+        _watchers.clear()
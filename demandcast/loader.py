@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+
+# Column types for the daily inventory snapshot read by Home.py
+DAILY_SCHEMA = {
+    'dtype': {
+        'Product_ID': 'string',
+        'Product_Name': 'string',
+        'Category': 'category',
+        'Stock_Level': 'float32',
+        'Max_Capacity': 'float32',
+        'Forecasted_Demand': 'float32',
+        'Emergency_Stock_Level': 'float32',
+        'Temperature_Requirement': 'category',
+        'Compliance_Status': 'category',
+    },
+    'parse_dates': ['Date_Updated', 'Expiry_Date'],
+}
+
+# Column types for the long-format ledger in processed_inventory.csv
+LEDGER_SCHEMA = {
+    'dtype': {
+        'Item ID': 'int32',
+        'Item Name': 'category',
+        'Category': 'category',
+        'Units Received': 'int32',
+        'Units Used': 'int32',
+        'Units in Stock': 'int32',
+        'Supplier': 'category',
+    },
+    'parse_dates': ['Date'],
+}
+
+DEFAULT_CACHE_BYTES = int(os.environ.get('DEMANDCAST_CACHE_MB', 512)) * 1024 * 1024
+
+# Bytes just before the cached end of file, compared to detect in-place edits
+_TAIL_CHECK_BYTES = 4096
+
+
+# One parsed file together with the file state it was parsed from
+class _Entry:
+    def __init__(self, frame, mtime, size, tail):
+        self.frame = frame
+        self.mtime = mtime
+        self.size = size
+        self.tail = tail
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+
+
+# LRU cache of parsed frames, bounded by their in-memory size
+class FrameCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.appends = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            if entry.nbytes > self.max_bytes:
+                return
+            self._entries[key] = entry
+            while self.nbytes > self.max_bytes:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+default_cache = FrameCache()
+
+
+def _cache_key(path, schema):
+    return (os.path.abspath(path), repr(sorted(schema.items())))
+
+
+def _read_tail(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(max(offset - _TAIL_CHECK_BYTES, 0))
+        return f.read(min(offset, _TAIL_CHECK_BYTES))
+
+
+# Parse with the schema's types for the columns the file actually has: an export
+# without some of the schema's columns (new.csv has no Expiry_Date) still loads.
+# The header comes from names= when given, otherwise from the file itself.
+def _parse(source, schema, **kwargs):
+    columns = kwargs.get('names')
+    if columns is None:
+        columns = pd.read_csv(source, nrows=0).columns
+    columns = set(columns)
+    dtype = {column: t for column, t in (schema.get('dtype') or {}).items() if column in columns}
+    parse_dates = [column for column in schema.get('parse_dates') or [] if column in columns]
+    return pd.read_csv(source, dtype=dtype, parse_dates=parse_dates,
+                       date_format=schema.get('date_format', '%Y-%m-%d'), **kwargs)
+
+
+# Re-cast categorical columns after a concat, which drops mismatched categories
+def _restore_categories(frame, schema):
+    for column, dtype in (schema.get('dtype') or {}).items():
+        if dtype == 'category' and column in frame.columns and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+# Parse only the bytes appended after the cached end of file
+def _parse_appended(path, entry, schema, end):
+    with open(path, 'rb') as f:
+        f.seek(entry.size)
+        data = f.read(end - entry.size)
+    # A last line without a newline may have been extended rather than followed
+    if not entry.tail.endswith(b'\n') and not data.startswith((b'\n', b'\r\n')):
+        return None
+    if not data.strip():
+        return entry.frame
+    columns = list(entry.frame.columns)
+    new_rows = _parse(BytesIO(data), schema, header=None, names=columns)
+    frame = pd.concat([entry.frame, new_rows], ignore_index=True)
+    return _restore_categories(frame, schema)
+
+
+# Load a CSV through the cache.
+# The cached frame is reused while the file's mtime and size are unchanged; when
+# the file has only grown and the bytes before the old end are untouched, just the
+# appended rows are parsed. The caller gets a shallow copy it may add columns to.
+def load_csv(path, schema=None, cache=None):
+    schema = schema or {}
+    cache = cache if cache is not None else default_cache
+    key = _cache_key(path, schema)
+    stat = os.stat(path)
+
+    entry = cache.get(key)
+    if entry is not None and entry.mtime == stat.st_mtime_ns and entry.size == stat.st_size:
+        cache.hits += 1
+        return entry.frame.copy(deep=False)
+
+    frame = None
+    if entry is not None and stat.st_size > entry.size and _read_tail(path, entry.size) == entry.tail:
+        frame = _parse_appended(path, entry, schema, stat.st_size)
+        if frame is not None:
+            cache.appends += 1
+    if frame is None:
+        cache.misses += 1
+        frame = _parse(path, schema)
+
+    # Only cache what is known to match the file; a concurrent writer forces a reparse next time
+    if os.stat(path).st_size == stat.st_size:
+        cache.put(key, _Entry(frame, stat.st_mtime_ns, stat.st_size, _read_tail(path, stat.st_size)))
+    return frame.copy(deep=False)
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get('DEMANDCAST_MODEL_CACHE', os.path.join('~', '.cache', 'demandcast', 'models'))
+DEFAULT_CACHE_BYTES = int(os.environ.get('DEMANDCAST_MODEL_CACHE_MB', 256)) * 1024 * 1024
+
+
+# Hash of the series values, index and column names plus the model parameters
+def fingerprint(data, *params):
+    digest = hashlib.sha256()
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    digest.update(repr(list(map(str, frame.columns))).encode())
+    digest.update(np.ascontiguousarray(frame.to_numpy(dtype=np.float64)).tobytes())
+    if isinstance(frame.index, pd.DatetimeIndex):
+        digest.update(frame.index.asi8.tobytes())
+    else:
+        digest.update(repr(frame.index.tolist()).encode())
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+# Identifies a series across appends: same model, columns and starting point
+def _lineage(kind, data, params):
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    head = frame.index[0] if len(frame) else None
+    key = (kind, list(map(str, frame.columns)), str(head), params)
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+# On-disk store of fitted results, evicted least-recently-used once the
+# directory grows past max_bytes. Each entry is a pickle of
+# {'results', 'forecast', 'length'}; a small lineage file per series points at
+# its latest entry so a longer version of the same series can be extended.
+class ModelCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = Path(directory).expanduser()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.extends = 0
+        self._lock = threading.Lock()
+
+    def _path(self, name, suffix):
+        return self.directory / f'{name}{suffix}'
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        os.utime(path)
+        return value
+
+    def _store(self, path, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + f'.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self._entries()) if self.directory.exists() else 0
+
+    def clear(self):
+        if self.directory.exists():
+            for path in self.directory.glob('*.pkl'):
+                path.unlink(missing_ok=True)
+            for path in self.directory.glob('*.lineage'):
+                path.unlink(missing_ok=True)
+
+    # Return the cached forecast for data, extending or fitting as needed.
+    # fit(data) -> (results, forecast) fits from scratch; extend(results, data, new_rows)
+    # -> (results, forecast) reuses a fit on a prefix of data. Either may be
+    # refitted if extend is None or raises.
+    def get_or_fit(self, kind, data, params, fit, extend=None):
+        key = fingerprint(data, kind, params)
+        lineage = _lineage(kind, data, params)
+        entry = self._load(self._path(key, '.pkl'))
+        if entry is not None:
+            self.hits += 1
+            return entry['forecast']
+
+        results = forecast = None
+        pointer = self._load(self._path(lineage, '.lineage')) if extend is not None else None
+        if pointer is not None and pointer['length'] < len(data) and \
+                fingerprint(data.iloc[:pointer['length']], kind, params) == pointer['key']:
+            previous = self._load(self._path(pointer['key'], '.pkl'))
+            if previous is not None:
+                try:
+                    results, forecast = extend(previous['results'], data, data.iloc[pointer['length']:])
+                    self.extends += 1
+                except Exception:
+                    results = forecast = None
+        if results is None:
+            self.misses += 1
+            results, forecast = fit(data)
+
+        with self._lock:
+            self._store(self._path(key, '.pkl'), {'results': results, 'forecast': forecast, 'length': len(data)})
+            self._store(self._path(lineage, '.lineage'), {'key': key, 'length': len(data)})
+            self._evict()
+        return forecast
+
+
+default_cache = ModelCache()
+
+
+# ARIMA forecast of a series, reusing a cached fit when the series is unchanged
+# and appending new observations to the cached state when it has only grown
+def cached_arima_forecast(series, order, steps, cache=None):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    cache = cache if cache is not None else default_cache
+
+    def fit(data):
+        results = ARIMA(data.to_numpy(dtype=np.float64), order=order).fit()
+        return results, np.asarray(results.forecast(steps=steps))
+
+    def extend(results, data, new_rows):
+        results = results.append(new_rows.to_numpy(dtype=np.float64), refit=False)
+        return results, np.asarray(results.forecast(steps=steps))
+
+    return cache.get_or_fit('arima', series, (tuple(order), steps), fit, extend)
+
+
+# VAR forecast of the columns of frame. New observations keep the cached
+# coefficients and only move the conditioning window forward.
+def cached_var_forecast(frame, maxlags, steps, ic='aic', cache=None):
+    from statsmodels.tsa.api import VAR
+
+    cache = cache if cache is not None else default_cache
+
+    def fit(data):
+        results = VAR(data.to_numpy(dtype=np.float64)).fit(maxlags=maxlags, ic=ic)
+        return results, results.forecast(data.to_numpy(dtype=np.float64)[-results.k_ar:], steps=steps)
+
+    def extend(results, data, new_rows):
+        return results, results.forecast(data.to_numpy(dtype=np.float64)[-results.k_ar:], steps=steps)
+
+    return cache.get_or_fit('var', frame, (maxlags, ic, steps), fit, extend)
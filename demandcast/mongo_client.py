@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+
+from pymongo import MongoClient, monitoring
+
+# Environment variable holding the connection string used when the caller names none
+URI_ENV = 'DEMANDCAST_MONGO_URI'
+
+# Client settings read from the environment, with the MongoClient keyword each maps to
+ENV_OPTIONS = {
+    'DEMANDCAST_MONGO_MAX_POOL_SIZE': ('maxPoolSize', int),
+    'DEMANDCAST_MONGO_MIN_POOL_SIZE': ('minPoolSize', int),
+    'DEMANDCAST_MONGO_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int),
+    'DEMANDCAST_MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int),
+    'DEMANDCAST_MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int),
+    'DEMANDCAST_MONGO_SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int),
+    'DEMANDCAST_MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int),
+    'DEMANDCAST_MONGO_READ_PREFERENCE': ('readPreference', str),
+}
+
+DEFAULT_OPTIONS = {
+    'maxPoolSize': 50,
+    'minPoolSize': 0,
+    'serverSelectionTimeoutMS': 10000,
+    'waitQueueTimeoutMS': 5000,
+}
+
+
+# Connection-pool counters fed by pymongo's CMAP events. Wait time is measured
+# from check-out start to check-out on the requesting thread; pool exhaustion
+# is a check-out that timed out waiting for a free connection.
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.checkout_failures = 0
+            self.exhausted = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.pools_cleared = 0
+
+    @property
+    def in_use(self):
+        return self.checkouts - self.checkins
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'in_use': self.in_use,
+                'checkout_failures': self.checkout_failures,
+                'pool_exhausted': self.exhausted,
+                'wait_ms_total': self.wait_seconds * 1000,
+                'wait_ms_mean': self.wait_seconds * 1000 / self.checkouts if self.checkouts else 0.0,
+                'wait_ms_max': self.max_wait_seconds * 1000,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'pools_cleared': self.pools_cleared,
+            }
+
+    def _waited(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.exhausted += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checkins += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
+
+_clients = {}
+_lock = threading.Lock()
+
+
+# Client options: defaults, overridden by the environment, overridden by the caller
+def client_options(**overrides):
+    options = dict(DEFAULT_OPTIONS)
+    for name, (option, cast) in ENV_OPTIONS.items():
+        if os.environ.get(name):
+            options[option] = cast(os.environ[name])
+    options.update(overrides)
+    return options
+
+
+# The process-wide MongoClient for the given URI and options.
+# An explicit uri wins; without one, DEMANDCAST_MONGO_URI must be set. The client
+# is built on the first call, with connect=False so no server is contacted until
+# the first operation, and the same instance is returned to every page and rerun
+# after that.
+def get_client(uri=None, **overrides):
+    uri = uri or os.environ.get(URI_ENV)
+    if not uri:
+        raise ValueError(f'no MongoDB URI configured: set {URI_ENV} or pass a URI')
+    options = client_options(**overrides)
+    key = (uri, tuple(sorted(options.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = MongoClient(uri, connect=False, event_listeners=[pool_metrics], **options)
+                _clients[key] = client
+    return client
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,215 @@
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from demandcast.model_cache import fingerprint
+
+DEFAULT_P = range(0, 4)
+DEFAULT_D = range(0, 3)
+DEFAULT_Q = range(0, 4)
+CRITERIA = ('aic', 'bic', 'hqic')
+
+
+# Outcome of one order search, with the metrics reported by the pages and batch jobs
+class OrderSearch:
+    def __init__(self, order, value, criterion, candidates, evaluated, pruned, seconds, memoized=False):
+        self.order = order
+        self.value = value
+        self.criterion = criterion
+        self.candidates = candidates
+        self.evaluated = evaluated
+        self.pruned = pruned
+        self.seconds = seconds
+        self.memoized = memoized
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+# Chosen orders per series fingerprint. With a directory each entry is also
+# written to its own small JSON file, so worker processes can share the memo
+# without locking a common file.
+class OrderMemo:
+    def __init__(self, directory=None):
+        self.directory = os.path.expanduser(directory) if directory else None
+        self._orders = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        if key not in self._orders and self.directory:
+            try:
+                with open(self._path(key)) as f:
+                    self._orders[key] = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self._orders.get(key)
+
+    def set(self, key, value):
+        self._orders[key] = value
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f'{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp, self._path(key))
+
+
+default_memo = OrderMemo(os.environ.get('DEMANDCAST_ORDER_MEMO', os.path.join('~', '.cache', 'demandcast', 'orders')))
+
+
+def _penalty(criterion, n_params, nobs):
+    if criterion == 'aic':
+        return 2.0 * n_params
+    if criterion == 'bic':
+        return n_params * math.log(nobs)
+    return 2.0 * n_params * math.log(math.log(nobs))
+
+
+# Fit one candidate; runs in worker processes. Returns (criterion value, llf,
+# number of parameters, nobs), with an infinite value when the fit fails.
+def _fit_candidate(values, order, criterion):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = ARIMA(values, order=order).fit()
+        value = getattr(results, criterion)
+        if not np.isfinite(value):
+            raise ValueError('non-finite information criterion')
+        return value, results.llf, len(results.params), results.nobs
+    except Exception:
+        return math.inf, math.nan, 0, len(values)
+
+
+# Search the (p, d, q) grid for the order minimizing the information criterion.
+#
+# For each d the largest model of the grid is fitted first: every other
+# candidate with that d is nested in it, so at its maximum likelihood its llf
+# bounds theirs and -2 * llf_full + penalty(k) bounds their criterion.
+# Remaining candidates are tried smallest first and skipped (or cancelled if
+# already queued) as soon as that bound cannot beat the best value found so
+# far. The pruning is a heuristic, not an exact search: when the full model's
+# fit stops at a local optimum its llf is too low, and a skipped candidate can
+# score slightly better than the order returned.
+# With max_workers > 1 the candidates are fitted in a process pool, or in the
+# given executor; otherwise they are fitted here, in order.
+def search_arima_order(values, p_values=DEFAULT_P, d_values=DEFAULT_D, q_values=DEFAULT_Q, criterion='aic',
+                       max_workers=1, executor=None, memo=None):
+    if criterion not in CRITERIA:
+        raise ValueError(f'criterion must be one of {CRITERIA}, got {criterion!r}')
+    started = time.perf_counter()
+    values = np.asarray(values, dtype=np.float64)
+    p_values, d_values, q_values = list(p_values), list(d_values), list(q_values)
+    grid = list(itertools.product(p_values, d_values, q_values))
+
+    memo = memo if memo is not None else default_memo
+    key = fingerprint(pd.Series(values), 'arima-order', p_values, d_values, q_values, criterion)
+    remembered = memo.get(key)
+    if remembered is not None:
+        return OrderSearch(tuple(remembered['order']), remembered['value'], criterion, len(grid), 0, 0,
+                           time.perf_counter() - started, memoized=True)
+
+    own_executor = None
+    if executor is None and max_workers > 1:
+        executor = own_executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        best_order, best_value, evaluated = None, math.inf, 0
+
+        def record(order, value):
+            nonlocal best_order, best_value
+            if value < best_value:
+                best_order, best_value = order, value
+
+        # Largest model per d first: its fit gives the bound for the rest
+        p_max, q_max = max(p_values), max(q_values)
+        full_orders = [(p_max, d, q_max) for d in d_values]
+        if executor is None:
+            full_fits = [_fit_candidate(values, order, criterion) for order in full_orders]
+        else:
+            full_fits = [f.result() for f in [executor.submit(_fit_candidate, values, order, criterion)
+                                              for order in full_orders]]
+        evaluated += len(full_orders)
+        bounds = {}
+        for order, (value, llf, n_params, nobs) in zip(full_orders, full_fits):
+            record(order, value)
+            d = order[1]
+            for p, q in itertools.product(p_values, q_values):
+                k = n_params - (p_max - p) - (q_max - q)
+                bounds[(p, d, q)] = -2.0 * llf + _penalty(criterion, k, nobs) if np.isfinite(llf) else -math.inf
+
+        remaining = sorted((o for o in grid if o not in full_orders), key=lambda o: (o[0] + o[2], o[1], o))
+        pruned = 0
+        if executor is None:
+            for order in remaining:
+                if bounds[order] >= best_value:
+                    pruned += 1
+                    continue
+                record(order, _fit_candidate(values, order, criterion)[0])
+                evaluated += 1
+        else:
+            pending = {}
+            for order in remaining:
+                if bounds[order] >= best_value:
+                    pruned += 1
+                else:
+                    pending[executor.submit(_fit_candidate, values, order, criterion)] = order
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(pending.pop(future), future.result()[0])
+                    evaluated += 1
+                for future, order in list(pending.items()):
+                    if bounds[order] >= best_value and future.cancel():
+                        del pending[future]
+                        pruned += 1
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(cancel_futures=True)
+
+    if best_order is None:
+        raise ValueError('no ARIMA order in the grid could be fitted')
+    memo.set(key, {'order': list(best_order), 'value': float(best_value)})
+    return OrderSearch(best_order, best_value, criterion, len(grid), evaluated, pruned,
+                       time.perf_counter() - started)
+
+
+# Largest VAR lag order worth fitting to frame: at least five observations per
+# coefficient of each equation, at most cap lags, and never less than one.
+# Shared by the lag search and the forecast, so a searched lag can always be fit.
+def var_maxlags(frame, cap=15):
+    return max(1, min(cap, len(frame) // (5 * frame.shape[1])))
+
+
+# Pick the VAR lag order with the information criterion. statsmodels scores
+# every lag up to maxlags on a common sample in one pass, so nothing is pruned.
+def search_var_lags(frame, maxlags, criterion='aic', memo=None):
+    from statsmodels.tsa.api import VAR
+
+    if criterion not in CRITERIA:
+        raise ValueError(f'criterion must be one of {CRITERIA}, got {criterion!r}')
+    started = time.perf_counter()
+    memo = memo if memo is not None else default_memo
+    key = fingerprint(frame, 'var-lags', maxlags, criterion)
+    remembered = memo.get(key)
+    if remembered is not None:
+        return OrderSearch(remembered['order'], remembered['value'], criterion, maxlags + 1, 0, 0,
+                           time.perf_counter() - started, memoized=True)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        selection = VAR(frame.to_numpy(dtype=np.float64)).select_order(maxlags)
+    lag = int(selection.selected_orders[criterion])
+    value = float(selection.ics[criterion][lag])
+    memo.set(key, {'order': lag, 'value': value})
+    return OrderSearch(lag, value, criterion, maxlags + 1, maxlags + 1, 0, time.perf_counter() - started)
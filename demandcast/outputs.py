@@ -0,0 +1,107 @@
+import json
+import os
+from datetime import datetime
+
+# Where the batch jobs write their results and the pages look for them
+OUTPUT_DIR = os.environ.get('DEMANDCAST_OUTPUT_DIR', 'outputs')
+
+METRICS_OUTPUT = 'metrics.json'
+FORECAST_OUTPUT = 'forecasts.parquet'
+EXPIRY_OUTPUT = 'expired.csv'
+BUFFER_OUTPUT = 'buffer_stock.csv'
+ROLLUP_OUTPUT = 'rollup.parquet'
+COMPLIANCE_OUTPUT = 'compliance.csv'
+COMPLIANCE_COUNTS_OUTPUT = 'compliance.json'
+RECONCILE_OUTPUT = 'reconciled.parquet'
+
+
+def output_path(name):
+    return os.path.join(OUTPUT_DIR, name)
+
+
+# True when path exists and is at least as new as every input that exists
+def is_fresh(path, *inputs):
+    if not os.path.exists(path):
+        return False
+    modified = os.path.getmtime(path)
+    return all(modified >= os.path.getmtime(source) for source in inputs if os.path.exists(source))
+
+
+# Writes go to a temporary file first, so a page never reads a half-written output
+def _replace(path, write):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# Tables are stored as Parquet or CSV, chosen by the file extension
+def write_table(frame, path):
+    if path.endswith('.parquet'):
+        _replace(path, lambda tmp: frame.to_parquet(tmp, compression='zstd', index=False))
+    elif path.endswith('.csv'):
+        _replace(path, lambda tmp: frame.to_csv(tmp, index=False))
+    else:
+        raise ValueError(f'Unsupported table format: {path} (expected .parquet or .csv)')
+
+
+def read_table(path):
+    import pandas as pd
+
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+def write_json(data, path):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+
+    _replace(path, write)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# A batch job's JSON output for source, or None when it is missing, stale or
+# was computed from another file
+def precomputed_json(name, source):
+    path = output_path(name)
+    if not is_fresh(path, source):
+        return None
+    data = read_json(path)
+    if os.path.abspath(data.get('source', '')) != os.path.abspath(source):
+        return None
+    return data
+
+
+# How a table was computed (source file and parameters), kept in a JSON file
+# next to it since Parquet and CSV outputs have nowhere to record their source
+def metadata_path(path):
+    return f'{path}.json'
+
+
+def write_table_metadata(path, source, **parameters):
+    write_json(dict(parameters, source=source, generated_at=datetime.now().isoformat(timespec='seconds')),
+               metadata_path(path))
+
+
+# A batch job's table output for source, with its metadata, or None when it is
+# missing, stale, or was computed from another file or with other parameters
+def precomputed_table(name, source, **parameters):
+    path = output_path(name)
+    if not is_fresh(path, source) or not os.path.exists(metadata_path(path)):
+        return None
+    metadata = read_json(metadata_path(path))
+    if os.path.abspath(metadata.get('source', '')) != os.path.abspath(source):
+        return None
+    if any(metadata.get(key) != value for key, value in parameters.items()):
+        return None
+    return read_table(path), metadata
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Width in CSS pixels a chart is assumed to span, and points kept per pixel.
+# More points than pixels cannot be told apart on screen, so long series are
+# downsampled to about width * POINTS_PER_PIXEL before they reach the browser.
+DEFAULT_WIDTH = int(os.environ.get('DEMANDCAST_PLOT_WIDTH', 1200))
+POINTS_PER_PIXEL = 2
+METHODS = ('lttb', 'minmax')
+
+
+def max_points_for_width(width=None, points_per_pixel=POINTS_PER_PIXEL):
+    return max(int((width or DEFAULT_WIDTH) * points_per_pixel), 3)
+
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    if x.dtype == object:
+        return pd.to_datetime(x).to_numpy().astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+# Largest-Triangle-Three-Buckets: keeps the first and last point and, from each
+# of n_out - 2 equal buckets in between, the point forming the largest triangle
+# with the point kept from the previous bucket and the mean of the next one.
+# Returns the indices of the kept points.
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, next_hi = edges[i], edges[i + 1], edges[i + 2]
+        mean_x, mean_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - mean_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+# Min-max decimation: the lowest and highest point of each of n_out / 2 equal
+# buckets, so spikes and dips survive. One sort, no Python loop.
+def minmax_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    buckets = np.arange(n) * (n_out // 2) // n
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+# x and y reduced to at most max_points points; missing values are dropped first
+def downsample(x, y, max_points=None, method='lttb'):
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}, got {method!r}')
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    max_points = max_points or max_points_for_width()
+    present = ~np.isnan(y)
+    if not present.all():
+        x, y = x[present], y[present]
+    if len(y) <= max_points:
+        return x, y
+    select = lttb_indices if method == 'lttb' else minmax_indices
+    kept = select(_as_numeric(x), y, max_points)
+    return x[kept], y[kept]
+
+
+# WebGL line trace of a downsampled series. Markers are only drawn when few
+# enough points remain to be told apart.
+def line_trace(x, y, name=None, max_points=None, method='lttb', markers=False, **kwargs):
+    import plotly.graph_objects as go
+
+    x, y = downsample(x, y, max_points, method)
+    mode = 'lines+markers' if markers and len(y) <= 200 else 'lines'
+    return go.Scattergl(x=x, y=y, mode=mode, name=name, **kwargs)
+
+
+# A constant value drawn as one horizontal shape instead of an N-point trace
+def add_reference_line(fig, y, name=None, **line):
+    fig.add_hline(y=y, line=line or None, annotation_text=name, annotation_position='top left')
+    return fig
+
+
+# One downsampled WebGL trace per column of a Series or DataFrame, against its
+# index; the replacement for st.line_chart on long histories
+def timeseries_figure(data, title=None, width=None, method='lttb', **layout):
+    import plotly.graph_objects as go
+
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    max_points = max_points_for_width(width)
+    fig = go.Figure()
+    for column in frame.columns:
+        fig.add_trace(line_trace(frame.index.to_numpy(), frame[column].to_numpy(dtype=np.float64), name=str(column),
+                                 max_points=max_points, method=method))
+    fig.update_layout(title=title, **layout)
+    return fig
@@ -0,0 +1,244 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+METHODS = ['bottom_up', 'top_down', 'ols', 'wls_struct', 'mint_diag', 'mint_shrink']
+TOTAL = 'Total'
+# Aggregation levels above the items, each a list of ledger columns; [] is the
+# grand total. Category and Supplier together make a grouped hierarchy.
+DEFAULT_LEVELS = [[], ['Category']]
+# mint_shrink works with the full covariance of every node's residuals
+MAX_DENSE_NODES = 5000
+
+
+# Summing matrix S (nodes x leaves, scipy CSR) of a hierarchy: row i adds up
+# the leaves under node i, so S @ leaf values gives every node's value.
+# Aggregate nodes come first, the leaves (one per item, in order) last.
+# nodes is a frame of each node's level and key.
+class Hierarchy:
+    def __init__(self, summing, nodes, leaves):
+        self.summing = summing
+        self.nodes = nodes
+        self.leaves = leaves
+
+    @property
+    def n_leaves(self):
+        return self.summing.shape[1]
+
+    @property
+    def n_aggregates(self):
+        return self.summing.shape[0] - self.n_leaves
+
+    @property
+    def aggregates(self):
+        return self.summing[:self.n_aggregates]
+
+    def aggregate(self, leaf_values):
+        return np.asarray(self.summing @ leaf_values)
+
+
+def _level_name(columns):
+    return '/'.join(columns) if columns else TOTAL
+
+
+# Hierarchy over the items of leaf_frame (one row per item, with the level
+# columns). Built in one pass per level from factorized keys, so the cost is
+# O(leaves x levels) with no per-node Python loop.
+def build_hierarchy(leaf_frame, item_col='Item ID', levels=DEFAULT_LEVELS):
+    from scipy import sparse
+
+    leaf_frame = leaf_frame.drop_duplicates(item_col, keep='last').sort_values(item_col, ignore_index=True)
+    n_leaves = len(leaf_frame)
+    leaf_positions = np.arange(n_leaves)
+    rows, node_frames, offset = [], [], 0
+    for columns in levels:
+        if columns:
+            groups = leaf_frame.groupby(list(columns), sort=True, observed=True, dropna=False)
+            codes = groups.ngroup().to_numpy()
+            keys = groups.size().index
+            keys = (keys.astype(str) if keys.nlevels == 1 else keys.map(lambda key: ' / '.join(map(str, key))))
+            keys = keys.to_numpy(dtype=object)
+        else:
+            codes, keys = np.zeros(n_leaves, dtype=np.int64), np.array([TOTAL], dtype=object)
+        rows.append(codes + offset)
+        node_frames.append(pd.DataFrame({'level': _level_name(columns), 'key': keys}))
+        offset += len(keys)
+    rows.append(leaf_positions + offset)
+    node_frames.append(pd.DataFrame({'level': item_col, 'key': leaf_frame[item_col].astype(str).to_numpy()}))
+    row_index = np.concatenate(rows)
+    summing = sparse.csr_matrix((np.ones(len(row_index)), (row_index, np.tile(leaf_positions, len(rows)))),
+                                shape=(offset + n_leaves, n_leaves))
+    nodes = pd.concat(node_frames, ignore_index=True)
+    return Hierarchy(summing, nodes, pd.Index(leaf_frame[item_col], name=item_col))
+
+
+# Hierarchy of the ledger's items (processed_inventory.csv layout), each item
+# under the level values of its latest row
+def ledger_hierarchy(ledger, item_col='Item ID', levels=DEFAULT_LEVELS):
+    columns = list(dict.fromkeys(column for level in levels for column in level))
+    missing = [column for column in [item_col] + columns if column not in ledger.columns]
+    if missing:
+        raise ValueError(f"The ledger has no {', '.join(missing)} column")
+    return build_hierarchy(ledger[[item_col] + columns], item_col, levels)
+
+
+# Each leaf's share of the total: mean of its history over the mean of the
+# total's (proportions of the historical averages)
+def historical_proportions(leaf_history):
+    means = np.asarray(leaf_history, dtype=np.float64).mean(axis=1)
+    total = means.sum()
+    return means / total if total > 0 else np.full(len(means), 1.0 / len(means))
+
+
+# Smallest weight a node gets: a millionth of the smallest positive residual
+# variance, so nodes forecast without error keep the system solvable
+def _variance_floor(variances):
+    floor = variances[variances > 0].min() if (variances > 0).any() else 1.0
+    return floor * 1e-6
+
+
+# Shrink the sample covariance of residuals (nodes x observations) towards its
+# diagonal, with the Schafer-Strimmer intensity. The diagonal is raised by the
+# variance floor, since zero or constant residuals (seasonal_naive on a
+# periodic series) would leave it singular.
+def shrunk_covariance(residuals):
+    residuals = residuals - residuals.mean(axis=1, keepdims=True)
+    n_obs = residuals.shape[1]
+    covariance = residuals @ residuals.T / n_obs
+    std = np.sqrt(np.diag(covariance))
+    std[std == 0] = 1.0
+    scaled = residuals / std[:, None]
+    correlation = scaled @ scaled.T / n_obs
+    squares = scaled ** 2
+    variance = (squares @ squares.T / n_obs - correlation ** 2) * n_obs / (n_obs - 1) ** 2
+    off_diagonal = ~np.eye(len(correlation), dtype=bool)
+    denominator = (correlation[off_diagonal] ** 2).sum()
+    intensity = min(max(variance[off_diagonal].sum() / denominator, 0.0), 1.0) if denominator > 0 else 1.0
+    shrunk = covariance * (1 - intensity) + np.diag(np.diag(covariance)) * intensity
+    np.fill_diagonal(shrunk, np.diag(shrunk) + _variance_floor(np.diag(covariance)))
+    return shrunk
+
+
+def _diagonal_weights(hierarchy, method, residuals):
+    if method == 'ols':
+        return np.ones(hierarchy.summing.shape[0])
+    if method == 'wls_struct':
+        return np.asarray(hierarchy.summing.sum(axis=1)).ravel()
+    variances = (np.asarray(residuals, dtype=np.float64) ** 2).mean(axis=1)
+    return np.maximum(variances, _variance_floor(variances))
+
+
+# Coherent leaf forecasts by the MinT projection, y~ = y^ - W C' (C W C')^-1 C y^,
+# with C = [I, -S_agg] the aggregation constraints. C W C' has one row per
+# aggregate node, not per leaf, so with a diagonal W it is a small sparse
+# system solved once for every horizon column.
+def _project(hierarchy, base, weights):
+    from scipy import sparse
+    from scipy.sparse.linalg import splu
+
+    n_aggregates = hierarchy.n_aggregates
+    aggregates = hierarchy.aggregates
+    base_aggregates, base_leaves = base[:n_aggregates], base[n_aggregates:]
+    gap = base_aggregates - aggregates @ base_leaves
+    if weights.ndim == 1:
+        weights_aggregates, weights_leaves = weights[:n_aggregates], weights[n_aggregates:]
+        system = sparse.diags(weights_aggregates) + aggregates @ sparse.diags(weights_leaves) @ aggregates.T
+        multipliers = splu(sparse.csc_matrix(system)).solve(np.asfortranarray(gap))
+        return base_leaves + weights_leaves[:, None] * np.asarray(aggregates.T @ multipliers)
+    constraints = sparse.hstack([sparse.identity(n_aggregates), -aggregates]).tocsr()
+    weighted = np.asarray(constraints @ weights)
+    multipliers = np.linalg.solve(np.asarray(constraints @ weighted.T), gap)
+    return base_leaves - weighted[:, n_aggregates:].T @ multipliers
+
+
+# Reconciliation of one run: coherent forecasts of every node (nodes x steps)
+class Reconciliation:
+    def __init__(self, hierarchy, method, forecasts, seconds):
+        self.hierarchy = hierarchy
+        self.method = method
+        self.forecasts = forecasts
+        self.seconds = seconds
+
+    # Largest absolute gap between a node's forecast and the sum of its leaves
+    @property
+    def incoherence(self):
+        leaves = self.forecasts[self.hierarchy.n_aggregates:]
+        return float(np.abs(self.hierarchy.aggregate(leaves) - self.forecasts).max(initial=0.0))
+
+    # Tidy frame: level, key, step, Forecast
+    def to_frame(self, dates=None):
+        steps = self.forecasts.shape[1]
+        frame = self.hierarchy.nodes.loc[self.hierarchy.nodes.index.repeat(steps)].reset_index(drop=True)
+        if dates is not None:
+            frame['Date'] = np.tile(dates, len(self.hierarchy.nodes))
+        else:
+            frame['step'] = np.tile(np.arange(1, steps + 1), len(self.hierarchy.nodes))
+        frame['Forecast'] = self.forecasts.ravel()
+        return frame
+
+
+# Make base forecasts of every node (nodes x steps, in hierarchy.nodes order)
+# add up, all nodes and horizons at once:
+#   bottom_up    the leaves' forecasts, summed up
+#   top_down     the total's forecast split by proportions (default: historical
+#                proportions of leaf_history)
+#   ols          MinT with W = I
+#   wls_struct   MinT with W = diag(leaves under each node)
+#   mint_diag    MinT with W = diag(residual variances); residuals are nodes x
+#                observations of in-sample or holdout errors
+#   mint_shrink  MinT with the shrunk residual covariance (MAX_DENSE_NODES nodes at most)
+def reconcile(hierarchy, base, method='ols', residuals=None, leaf_history=None, proportions=None):
+    if method not in METHODS:
+        raise ValueError(f'Unknown reconciliation method {method!r}, expected one of {METHODS}')
+    base = np.asarray(base, dtype=np.float64)
+    base = base[:, None] if base.ndim == 1 else base
+    if base.shape[0] != hierarchy.summing.shape[0]:
+        raise ValueError(f'Expected base forecasts for {hierarchy.summing.shape[0]} nodes, got {base.shape[0]}')
+    if method.startswith('mint') and residuals is None:
+        raise ValueError(f'{method} needs the residuals of the base forecasts')
+
+    started = time.perf_counter()
+    if method == 'bottom_up':
+        leaves = base[hierarchy.n_aggregates:]
+    elif method == 'top_down':
+        totals = np.flatnonzero(hierarchy.nodes['level'].to_numpy() == TOTAL)
+        if not len(totals):
+            raise ValueError('top_down needs a hierarchy with a total level')
+        if proportions is None:
+            if leaf_history is None:
+                raise ValueError('top_down needs proportions or the leaf history')
+            proportions = historical_proportions(leaf_history)
+        leaves = np.asarray(proportions, dtype=np.float64)[:, None] * base[totals[0]][None, :]
+    elif method == 'mint_shrink':
+        if hierarchy.summing.shape[0] > MAX_DENSE_NODES:
+            raise ValueError(f'mint_shrink is limited to {MAX_DENSE_NODES} nodes, '
+                             f'this hierarchy has {hierarchy.summing.shape[0]}; use mint_diag')
+        leaves = _project(hierarchy, base, shrunk_covariance(np.asarray(residuals, dtype=np.float64)))
+    else:
+        leaves = _project(hierarchy, base, _diagonal_weights(hierarchy, method, residuals))
+    forecasts = hierarchy.aggregate(leaves)
+    return Reconciliation(hierarchy, method, forecasts, time.perf_counter() - started)
+
+
+# Coherent forecasts of the ledger's Category -> Item ID hierarchy (or the
+# given levels): every node's history is S @ the item histories, every node is
+# forecast at once with a baseline engine, and the forecasts are reconciled.
+# The MinT methods take their residuals from a holdout forecast of the last
+# steps observations. Returns the Reconciliation and the forecast dates.
+def hierarchical_forecast(ledger, value_col='Units Used', engine='ses', steps=12, method='ols',
+                          levels=DEFAULT_LEVELS, item_col='Item ID'):
+    from demandcast.baselines import get_forecaster, ledger_matrix
+    from demandcast.forecast import future_dates
+
+    item_ids, dates, leaf_history = ledger_matrix(ledger, value_col, item_col=item_col)
+    hierarchy = ledger_hierarchy(ledger[ledger[item_col].isin(item_ids)], item_col, levels)
+    history = hierarchy.aggregate(leaf_history)
+    forecaster = get_forecaster(engine)
+    base = forecaster.forecast(history, steps)
+    residuals = None
+    if method.startswith('mint'):
+        holdout = min(steps, history.shape[1] // 2)
+        residuals = history[:, -holdout:] - forecaster.forecast(history[:, :-holdout], holdout)
+    result = reconcile(hierarchy, base, method, residuals=residuals, leaf_history=leaf_history)
+    return result, future_dates(dates, steps)
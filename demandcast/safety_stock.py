@@ -0,0 +1,135 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SERVICE_LEVEL = 0.95
+DEFAULT_LEAD_TIME_DAYS = 14.0
+
+
+# z such that demand over the lead time stays below mean + z * std with the
+# given probability (cycle service level)
+def service_factor(service_level):
+    service_level = np.asarray(service_level, dtype=np.float64)
+    if np.any((service_level <= 0) | (service_level >= 1)):
+        raise ValueError('service_level must be strictly between 0 and 1')
+    return np.vectorize(NormalDist().inv_cdf, otypes=[np.float64])(service_level)
+
+
+# A scalar, or a Series keyed by item ID, as one float per item; items missing
+# from the Series get default
+def _per_item(value, item_ids, default, name):
+    if isinstance(value, pd.Series):
+        values = value.reindex(item_ids).to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.where(np.isnan(values), default, values)
+    if value is None:
+        value = default
+    if not np.isscalar(value):
+        raise ValueError(f'{name} must be a scalar or a Series keyed by item ID')
+    return np.full(len(item_ids), float(value))
+
+
+# Codes of the sorted distinct dates and their median spacing in days
+def _periods(dates, period_days):
+    codes, uniques = pd.factorize(dates, sort=True)
+    if period_days is None:
+        spacing = np.diff(pd.DatetimeIndex(uniques).asi8) / 86_400e9
+        period_days = float(np.median(spacing)) if len(spacing) else 1.0
+    return codes, len(uniques), period_days
+
+
+# Demand per (item, period) cell: rows of the same item and date are summed,
+# so the moments see one value per period. Returns item codes, period codes and
+# demand, the rows themselves when no cell repeats. A ledger sorted by item and
+# date is checked in one pass; an unsorted one is counted per cell when the
+# cells are few enough, and hashed otherwise.
+def _demand_per_period(item_codes, period_codes, n_periods, values):
+    keys = item_codes.astype(np.int64) * n_periods + period_codes
+    if np.all(keys[1:] > keys[:-1]):
+        return item_codes, period_codes, values
+    n_cells = (int(item_codes.max()) + 1) * n_periods
+    if n_cells <= 4 * len(keys):
+        counts = np.bincount(keys, minlength=n_cells)
+        if counts.max() <= 1:
+            return item_codes, period_codes, values
+        cells = np.flatnonzero(counts)
+        demand = np.bincount(keys, weights=values, minlength=n_cells)[cells]
+    else:
+        cell_codes, cells = pd.factorize(keys)
+        if len(cells) == len(keys):
+            return item_codes, period_codes, values
+        cells = np.asarray(cells)
+        demand = np.bincount(cell_codes, weights=values, minlength=len(cells))
+    return cells // n_periods, cells % n_periods, demand
+
+
+# Per-item demand statistics, safety stock and reorder point from a ledger of
+# Units Used per item and date, as in processed_inventory.csv; several rows for
+# one item and date are summed into that period's demand. An item is observed
+# from its first date to the end of the ledger, and periods without a row count
+# as zero demand.
+#
+# Everything runs on integer codes with bincount and ufunc.at, so the cost is a
+# few passes over the rows whatever the number of items:
+#   safety stock  = z * sqrt(L * var(d) + mean(d)^2 * var(L))
+#   reorder point = mean(d) * L + safety stock
+# with demand d per period, lead time L in periods and z = service_factor(level).
+# lead_time_days, lead_time_std_days and service_level are scalars or Series
+# keyed by item ID. With stock_col, the item's latest value of it is returned
+# as 'stock' along with 'below_reorder_point'.
+def safety_stock_table(ledger, value_col='Units Used', item_col='Item ID', date_col='Date',
+                       service_level=DEFAULT_SERVICE_LEVEL, lead_time_days=DEFAULT_LEAD_TIME_DAYS,
+                       lead_time_std_days=0.0, period_days=None, stock_col=None):
+    item_codes, item_ids = pd.factorize(ledger[item_col], sort=True)
+    period_codes, n_periods, period_days = _periods(ledger[date_col], period_days)
+    n_items = len(item_ids)
+    values = ledger[value_col].to_numpy(dtype=np.float64, na_value=0.0)
+    cell_items, cell_periods, demand = _demand_per_period(item_codes, period_codes, n_periods, values)
+
+    first_period = np.full(n_items, n_periods, dtype=np.int64)
+    np.minimum.at(first_period, cell_items, cell_periods)
+    periods = n_periods - first_period
+
+    mean = np.bincount(cell_items, weights=demand, minlength=n_items) / periods
+    # Second pass around the mean; each period without a row adds mean^2
+    observed = np.bincount(cell_items, minlength=n_items)
+    deviation = demand - mean[cell_items]
+    squares = np.bincount(cell_items, weights=np.square(deviation, out=deviation), minlength=n_items)
+    del deviation
+    squares += (periods - observed).clip(min=0) * np.square(mean)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.where(periods > 1, squares / (periods - 1), 0.0)
+    std = np.sqrt(variance)
+
+    lead_time = _per_item(lead_time_days, item_ids, DEFAULT_LEAD_TIME_DAYS, 'lead_time_days')
+    lead_time_std = _per_item(lead_time_std_days, item_ids, 0.0, 'lead_time_std_days')
+    level = _per_item(service_level, item_ids, DEFAULT_SERVICE_LEVEL, 'service_level')
+    if np.any(lead_time < 0) or np.any(lead_time_std < 0):
+        raise ValueError('lead times must not be negative')
+
+    lead_periods = lead_time / period_days
+    lead_std_periods = lead_time_std / period_days
+    safety = service_factor(level) * np.sqrt(lead_periods * variance + np.square(mean * lead_std_periods))
+    safety = np.ceil(safety)
+    reorder = np.ceil(mean * lead_periods + safety)
+
+    table = pd.DataFrame({
+        'periods': periods,
+        'mean_demand': mean,
+        'std_demand': std,
+        'lead_time_days': lead_time,
+        'lead_time_std_days': lead_time_std,
+        'service_level': level,
+        'safety_stock': safety.astype(np.int64),
+        'reorder_point': reorder.astype(np.int64),
+    }, index=pd.Index(item_ids, name=item_col))
+
+    if stock_col is not None:
+        last_period = np.full(n_items, -1, dtype=np.int64)
+        np.maximum.at(last_period, item_codes, period_codes)
+        latest = period_codes == last_period[item_codes]
+        stock = np.zeros(n_items)
+        stock[item_codes[latest]] = ledger[stock_col].to_numpy(dtype=np.float64, na_value=0.0)[latest]
+        table['stock'] = stock
+        table['below_reorder_point'] = stock < table['reorder_point'].to_numpy()
+    return table
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Stock statuses, in the order of their integer codes
+STATUSES = ['out_of_stock', 'low_stock', 'arriving', 'in_stock']
+OUT_OF_STOCK, LOW_STOCK, ARRIVING, IN_STOCK = range(len(STATUSES))
+
+LOW_STOCK_RATIO = 0.2
+
+# Row-wise reference classifier, kept for comparison with the vectorized path
+def calculate_status(row):
+    if row['Stock_Level'] == 0:
+        return 'out_of_stock'
+    elif row['Stock_Level'] < row['Max_Capacity'] * LOW_STOCK_RATIO:
+        return 'low_stock'
+    elif row['Stock_Level'] > row['Max_Capacity'] * LOW_STOCK_RATIO and row['Stock_Level'] < row['Max_Capacity']:
+        return 'arriving'
+    else:
+        return 'in_stock'
+
+# Classify every row at once and return the int8 status codes.
+# Conditions are evaluated in the same order as calculate_status, so a level
+# exactly at the low-stock threshold (or a missing value) falls through to in_stock.
+def classify_status_codes(stock_level, max_capacity):
+    stock_level = np.asarray(stock_level, dtype=np.float64)
+    max_capacity = np.asarray(max_capacity, dtype=np.float64)
+    threshold = max_capacity * LOW_STOCK_RATIO
+
+    conditions = [
+        stock_level == 0,
+        stock_level < threshold,
+        (stock_level > threshold) & (stock_level < max_capacity),
+    ]
+    choices = [OUT_OF_STOCK, LOW_STOCK, ARRIVING]
+    return np.select(conditions, choices, default=IN_STOCK).astype(np.int8)
+
+# Turn status codes into a categorical column with the status names
+def status_labels(codes, index=None):
+    return pd.Series(pd.Categorical.from_codes(codes, categories=STATUSES), index=index, name='status')
+
+# Count every status and compute its percentage share in a single bincount pass
+def summarize_status(codes):
+    return summarize_counts(np.bincount(codes, minlength=len(STATUSES)))
+
+# Summary of per-status counts, e.g. bincounts added up over chunks of a large file
+def summarize_counts(counts):
+    counts = np.asarray(counts)
+    total = int(counts.sum())
+    scores = counts * 100.0 / total if total > 0 else np.zeros(len(STATUSES))
+    return {
+        'total': total,
+        'counts': dict(zip(STATUSES, counts.tolist())),
+        'scores': dict(zip(STATUSES, scores.tolist())),
+    }
+
+# Add the status column to the inventory frame and return it with the summary
+def classify_inventory(df):
+    codes = classify_status_codes(df['Stock_Level'].to_numpy(), df['Max_Capacity'].to_numpy())
+    df['status'] = status_labels(codes, index=df.index)
+    return df, summarize_status(codes)
@@ -0,0 +1,109 @@
+import datetime as dt
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+# Arrow types for the columns of processed_inventory.csv
+LEDGER_TYPES = {
+    'Date': pa.date32(),
+    'Item ID': pa.int32(),
+    'Item Name': pa.string(),
+    'Category': pa.string(),
+    'Units Received': pa.int32(),
+    'Units Used': pa.int32(),
+    'Units in Stock': pa.int32(),
+    'Supplier': pa.string(),
+}
+
+# Low-cardinality string columns, read back as pandas categoricals
+DICTIONARY_COLUMNS = ['Item Name', 'Category', 'Supplier']
+
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8())]), flavor='hive')
+
+ROWS_PER_GROUP = 128 * 1024
+
+
+def _with_partition_columns(batch):
+    dates = batch.column('Date')
+    year = pc.year(dates).cast(pa.int16())
+    month = pc.month(dates).cast(pa.int8())
+    return pa.RecordBatch.from_arrays(batch.columns + [year, month], names=batch.schema.names + ['year', 'month'])
+
+
+# Convert the ledger CSV into a year/month partitioned, zstd-compressed Parquet dataset.
+# The CSV is streamed in blocks, so memory stays bounded by block_size whatever the
+# file size. Partitions present in the CSV are replaced; other partitions are kept.
+def ingest_ledger(csv_path, dataset_dir, block_size=64 * 1024 * 1024, compression_level=3):
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(column_types=LEDGER_TYPES),
+    )
+    schema = pa.schema(list(reader.schema) + [('year', pa.int16()), ('month', pa.int8())])
+    batches = (_with_partition_columns(batch) for batch in reader)
+
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        ds.Scanner.from_batches(batches, schema=schema),
+        dataset_dir,
+        format=file_format,
+        file_options=file_format.make_write_options(compression='zstd', compression_level=compression_level),
+        partitioning=PARTITIONING,
+        max_rows_per_group=ROWS_PER_GROUP,
+        min_rows_per_group=ROWS_PER_GROUP // 4,
+        existing_data_behavior='delete_matching',
+    )
+
+
+def _as_date(value):
+    if value is None or isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        return value
+    return dt.date.fromisoformat(str(value)[:10])
+
+
+# Build the scan filter; the year bounds prune whole partitions and the Date
+# bounds prune row groups through their min/max statistics
+def ledger_filter(start=None, end=None, categories=None, items=None, suppliers=None):
+    start, end = _as_date(start), _as_date(end)
+    terms = []
+    if start is not None:
+        terms += [ds.field('year') >= start.year, ds.field('Date') >= start]
+    if end is not None:
+        terms += [ds.field('year') <= end.year, ds.field('Date') <= end]
+    if categories is not None:
+        terms.append(ds.field('Category').isin(list(categories)))
+    if items is not None:
+        terms.append(ds.field('Item ID').isin(list(items)))
+    if suppliers is not None:
+        terms.append(ds.field('Supplier').isin(list(suppliers)))
+    expr = None
+    for term in terms:
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def open_ledger(dataset_dir):
+    return ds.dataset(
+        dataset_dir,
+        format=ds.ParquetFileFormat(read_options={'dictionary_columns': DICTIONARY_COLUMNS}),
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+# Read only the requested columns and rows of the ledger as an Arrow table.
+# Dates are inclusive and may be date objects or ISO strings.
+def query_ledger_table(dataset_dir, columns=None, start=None, end=None, categories=None, items=None, suppliers=None):
+    dataset = open_ledger(dataset_dir)
+    if columns is not None:
+        columns = list(columns)
+    return dataset.to_table(columns=columns, filter=ledger_filter(start, end, categories, items, suppliers))
+
+
+# Same as query_ledger_table, returned as a pandas frame with datetime dates
+def query_ledger(dataset_dir, columns=None, start=None, end=None, categories=None, items=None, suppliers=None):
+    table = query_ledger_table(dataset_dir, columns, start, end, categories, items, suppliers)
+    return table.to_pandas(date_as_object=False)
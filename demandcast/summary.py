@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from demandcast.status import STATUSES, classify_status_codes
+
+SUMMARY_COLLECTION = 'inventory_summary'
+# Summary columns besides the per-status product counts. revenue and cost are
+# the stock on hand valued at Unit_Price and Unit_Cost.
+TOTALS = ['products', 'stock', 'capacity', 'revenue', 'cost']
+SUMMARY_FIELDS = ['Stock_Level', 'Max_Capacity', 'Unit_Price', 'Unit_Cost']
+
+
+def summary_collection(db):
+    return db[SUMMARY_COLLECTION]
+
+
+# What one stock report adds to its category's summary row. Documents without
+# a stock level (e.g. created by an expiry update) do not count.
+def contribution(document):
+    if not document or document.get('Stock_Level') is None:
+        return {}
+    stock = float(document['Stock_Level'])
+    capacity = float(document.get('Max_Capacity') or 0)
+    status = STATUSES[classify_status_codes([stock], [capacity])[0]]
+    return {
+        'products': 1,
+        'stock': stock,
+        'capacity': capacity,
+        'revenue': stock * float(document.get('Unit_Price') or 0),
+        'cost': stock * float(document.get('Unit_Cost') or 0),
+        f'status.{status}': 1,
+    }
+
+
+# $inc increments turning the contribution of before into that of after
+def summary_delta(before, after):
+    delta = contribution(after)
+    for field, value in contribution(before).items():
+        delta[field] = delta.get(field, 0) - value
+    return {field: value for field, value in delta.items() if value}
+
+
+# Fold one stock report change into the summary. before and after are the
+# document as it was and as it is now (None when absent); concurrent changes
+# commute because each applies an atomic $inc of its own difference.
+def apply_stock_change(db, category, before, after):
+    update = {'$set': {'updated_at': datetime.now()}}
+    delta = summary_delta(before, after)
+    if delta:
+        update['$inc'] = delta
+    summary_collection(db).update_one({'_id': category}, update, upsert=True)
+
+
+# Totals of one batch of stock reports, classified in one vectorized pass
+def _summarize_batch(documents):
+    frame = pd.DataFrame(documents, columns=SUMMARY_FIELDS)
+    frame = frame.apply(pd.to_numeric, errors='coerce')
+    frame = frame[frame['Stock_Level'].notna()].fillna(0)
+    stock = frame['Stock_Level'].to_numpy(dtype=np.float64)
+    codes = classify_status_codes(stock, frame['Max_Capacity'].to_numpy())
+    totals = {
+        'products': len(frame),
+        'stock': stock.sum(),
+        'capacity': frame['Max_Capacity'].sum(),
+        'revenue': (stock * frame['Unit_Price']).sum(),
+        'cost': (stock * frame['Unit_Cost']).sum(),
+    }
+    counts = np.bincount(codes, minlength=len(STATUSES))
+    totals.update({f'status.{status}': int(count) for status, count in zip(STATUSES, counts)})
+    return totals
+
+
+# Rebuild the summary of the given categories (all by default) from the stock
+# reports, reading batch_size projected documents at a time. Use it after
+# writes that bypassed apply_stock_change or to correct drift.
+def refresh_summary(db, categories=None, batch_size=100_000):
+    from demandcast.inventory_db import list_categories, product_collection
+
+    categories = list(categories) if categories is not None else list_categories(db['categories'])
+    refreshed_at = datetime.now()
+    for category in categories:
+        row = {field: 0 for field in TOTALS + [f'status.{status}' for status in STATUSES]}
+        projection = dict.fromkeys(SUMMARY_FIELDS, 1)
+        projection['_id'] = 0
+        cursor = product_collection(db, category).find({'Stock_Level': {'$ne': None}}, projection,
+                                                       batch_size=batch_size)
+        batch = []
+        for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                for field, value in _summarize_batch(batch).items():
+                    row[field] += value
+                batch = []
+        if batch:
+            for field, value in _summarize_batch(batch).items():
+                row[field] += value
+        document = {field: float(value) if field in ('stock', 'capacity', 'revenue', 'cost') else int(value)
+                    for field, value in row.items() if not field.startswith('status.')}
+        document['status'] = {status: int(row[f'status.{status}']) for status in STATUSES}
+        document.update(updated_at=refreshed_at, refreshed_at=refreshed_at)
+        summary_collection(db).replace_one({'_id': category}, document, upsert=True)
+    return refreshed_at
+
+
+# The summary as one row per category, plus the time of its latest change and
+# of its oldest full refresh (None if never refreshed). Reads one document per
+# category, whatever the number of products.
+def read_summary(db):
+    documents = list(summary_collection(db).find())
+    columns = TOTALS + STATUSES
+    if not documents:
+        return pd.DataFrame(columns=columns, dtype=np.float64), None, None
+    rows = {}
+    for document in documents:
+        row = {field: document.get(field, 0) for field in TOTALS}
+        row.update({status: document.get('status', {}).get(status, 0) for status in STATUSES})
+        rows[document['_id']] = row
+    frame = pd.DataFrame.from_dict(rows, orient='index', columns=columns).sort_index()
+    updated_at = max((d['updated_at'] for d in documents if d.get('updated_at')), default=None)
+    refreshed = [d.get('refreshed_at') for d in documents]
+    refreshed_at = min(refreshed) if refreshed and all(refreshed) else None
+    return frame, updated_at, refreshed_at
@@ -1,73 +1,93 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import plotly.express as px
+from demandcast.charts import demand_comparison, render
+from demandcast.instrument import performance_panel, rerun, span
+from demandcast.loader import LEDGER_SCHEMA, load_csv
+from demandcast.plotting import timeseries_figure
+from demandcast.safety_stock import DEFAULT_LEAD_TIME_DAYS, DEFAULT_SERVICE_LEVEL, safety_stock_table
 
-# List of medical categories and products
-categories = ['Cardiology', 'Neurology', 'Oncology', 'Pediatrics']
-products = [
-    'Aspirin', 'Paracetamol', 'Ibuprofen', 'Insulin', 'Amoxicillin',
-    'Ventilator', 'ECG Machine', 'Defibrillator', 'Stethoscope', 'X-Ray Machine',
-    'Ultrasound Machine', 'IV Drip', 'Syringe', 'Blood Pressure Monitor', 'Oxygen Mask'
-]
-
-# Generate random medical data
-np.random.seed(42)
-data = {
-    'Category': np.random.choice(categories, size=100),
-    'Product_Name': np.random.choice(products, size=100),
-    'Historical_Demand': np.random.randint(10, 100, size=100),
-    'Forecasted_Demand': np.random.randint(10, 100, size=100),
-    'Emergency_Buffer_Stock': np.random.randint(5, 30, size=100)
-}
-
-df = pd.DataFrame(data)
-
-# Page layout
-st.title("Emergency Stock Management Dashboard")
-
-
-st.dataframe(df.head())
-
-# Create and display a bar chart for forecasted demand vs historical demand
-st.subheader("Demand Comparison")
-fig = plt.figure(figsize=(12, 6))
-plt.bar(df['Product_Name'], df['Historical_Demand'], alpha=0.6, label='Historical Demand')
-plt.bar(df['Product_Name'], df['Forecasted_Demand'], alpha=0.6, label='Forecasted Demand')
-plt.xlabel('Product Name')
-plt.ylabel('Demand')
-plt.title('Historical vs Forecasted Demand')
-plt.xticks(rotation=90)
-plt.legend()
-st.pyplot(fig)
-
-buffer_stock_counts = df.groupby('Product_Name')['Emergency_Buffer_Stock'].sum().reset_index()
-fig_pie = px.pie(buffer_stock_counts, names='Product_Name', values='Emergency_Buffer_Stock',
-                 title="Emergency Buffer Stock Distribution",
-                 labels={'Product_Name': 'Product', 'Emergency_Buffer_Stock': 'Buffer Stock'},
-                 color_discrete_sequence=px.colors.sequential.Plasma)
-
-# Enhance hover information
-fig_pie.update_traces(
-    hovertemplate="<b>%{label}</b><br>Buffer Stock: %{value}<br>Percentage: %{percent:.2%}<extra></extra>"
-)
-
-# Add customization for better visual appeal
-fig_pie.update_layout(
-    title_font_size=24,
-    legend_title_text='Products',
-    legend_title_font_size=18,
-    legend_font_size=14,
-    margin=dict(l=0, r=0, t=40, b=0)
-)
-
-st.plotly_chart(fig_pie)
-
-# Create a line chart for historical and forecasted demand trends over time
-st.subheader("Demand Trends Over Time")
-df['Date'] = pd.date_range(start='2023-01-01', periods=100)
-df.set_index('Date', inplace=True)
-fig_trend = px.line(df, x=df.index, y=['Historical_Demand', 'Forecasted_Demand'],
-                    title="Historical and Forecasted Demand Trends")
-st.plotly_chart(fig_trend)
+
+with rerun('EmergencyStock'):
+    # List of medical categories and products
+    categories = ['Cardiology', 'Neurology', 'Oncology', 'Pediatrics']
+    products = [
+        'Aspirin', 'Paracetamol', 'Ibuprofen', 'Insulin', 'Amoxicillin',
+        'Ventilator', 'ECG Machine', 'Defibrillator', 'Stethoscope', 'X-Ray Machine',
+        'Ultrasound Machine', 'IV Drip', 'Syringe', 'Blood Pressure Monitor', 'Oxygen Mask'
+    ]
+
+    # Generate random medical data
+    np.random.seed(42)
+    data = {
+        'Category': np.random.choice(categories, size=100),
+        'Product_Name': np.random.choice(products, size=100),
+        'Historical_Demand': np.random.randint(10, 100, size=100),
+        'Forecasted_Demand': np.random.randint(10, 100, size=100),
+    }
+
+    df = pd.DataFrame(data)
+
+    # Page layout
+    st.title("Emergency Stock Management Dashboard")
+
+
+    st.dataframe(df.head())
+
+    # Create and display a bar chart for forecasted demand vs historical demand
+    st.subheader("Demand Comparison")
+    with span('demand_comparison', 'render'):
+        st.image(render(demand_comparison, df['Product_Name'].tolist(), df['Historical_Demand'].tolist(),
+                        df['Forecasted_Demand'].tolist(), dpi=200), width='stretch')
+
+    # Emergency buffer stock: service-level safety stock and reorder points from
+    # the Units Used history of the inventory ledger
+    st.subheader("Emergency Buffer Stock")
+    col1, col2, col3 = st.columns(3)
+    service_level = col1.slider("Service Level", min_value=0.80, max_value=0.99, value=DEFAULT_SERVICE_LEVEL, step=0.01)
+    lead_time = col2.number_input("Lead Time (days)", min_value=0.0, value=DEFAULT_LEAD_TIME_DAYS, step=1.0)
+    lead_time_std = col3.number_input("Lead Time Std. Dev. (days)", min_value=0.0, value=0.0, step=1.0)
+
+    with span('load_ledger', 'load'):
+        ledger = load_csv('processed_inventory.csv', LEDGER_SCHEMA)
+    with span('safety_stock_table'):
+        buffer_stock = safety_stock_table(ledger, service_level=service_level, lead_time_days=lead_time,
+                                          lead_time_std_days=lead_time_std, stock_col='Units in Stock')
+    item_names = ledger.drop_duplicates('Item ID', keep='last').set_index('Item ID')['Item Name'].astype(str)
+    buffer_stock.insert(0, 'Item Name', item_names.reindex(buffer_stock.index))
+    st.dataframe(buffer_stock[['Item Name', 'mean_demand', 'std_demand', 'safety_stock', 'reorder_point', 'stock',
+                               'below_reorder_point']].round(1))
+
+    with span('buffer_stock_pie', 'render'):
+        fig_pie = px.pie(buffer_stock, names='Item Name', values='safety_stock',
+                         title="Emergency Buffer Stock Distribution",
+                         labels={'Item Name': 'Product', 'safety_stock': 'Buffer Stock'},
+                         color_discrete_sequence=px.colors.sequential.Plasma)
+
+        # Enhance hover information
+        fig_pie.update_traces(
+            hovertemplate="<b>%{label}</b><br>Buffer Stock: %{value}<br>Percentage: %{percent:.2%}<extra></extra>"
+        )
+
+        # Add customization for better visual appeal
+        fig_pie.update_layout(
+            title_font_size=24,
+            legend_title_text='Products',
+            legend_title_font_size=18,
+            legend_font_size=14,
+            margin=dict(l=0, r=0, t=40, b=0)
+        )
+
+        st.plotly_chart(fig_pie)
+
+    # Create a line chart for historical and forecasted demand trends over time
+    st.subheader("Demand Trends Over Time")
+    with span('demand_trends', 'render'):
+        df['Date'] = pd.date_range(start='2023-01-01', periods=100)
+        df.set_index('Date', inplace=True)
+        fig_trend = timeseries_figure(df[['Historical_Demand', 'Forecasted_Demand']],
+                                      title="Historical and Forecasted Demand Trends")
+        st.plotly_chart(fig_trend)
+
+performance_panel(st.sidebar, 'EmergencyStock')
@@ -1,239 +1,380 @@
+import time
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
+from demandcast.instrument import performance_panel, rerun, timed
+from demandcast.status import STATUSES
+from demandcast.summary import read_summary, refresh_summary
 
 # Set page configuration
 st.set_page_config(page_title="Healthcare Inventory Dashboard", layout="wide")
 
-# Generate random data for overview
-def generate_random_data():
-    product_sales = {
-        "Product": ["Bandages", "Gloves", "Syringes", "Masks", "Thermometers", "Stethoscopes", "Wheelchairs"],
-        "Revenue": [12000, 8200, 5400, 27000, 1200, 4800, 11000],
-        "Purchase Cost": [6000, 4100, 2700, 13500, 600, 2400, 5500]
-    }
-    df_sales = pd.DataFrame(product_sales)
+# Inventory database on the shared MongoDB client; pymongo and the client are
+# only loaded when a section first needs them
+def inventory_database():
+    from demandcast.mongo_client import get_client
+
+    return get_client()['inventory_database']
 
-    expenses_breakdown = {
-        "Category": ["Cost of Goods Sold (COGS)", "Advertising"],
-        "Amount": [55300, 8300]
+# Functions for Stock Reports
+@timed(phase='query')
+def create_or_update_stock_report(category, product_id, product_name, stock_level, date_updated, max_capacity,
+                                  unit_price="", unit_cost=""):
+    category, product_id = category.strip(), product_id.strip()
+    if not category or not product_id:
+        st.error("Category and Product ID are required.")
+        return False
+    try:
+        stock_level, max_capacity = int(stock_level), int(max_capacity)
+    except ValueError:
+        st.error("Stock Level and Max Capacity must be whole numbers.")
+        return False
+    fields = {
+        "Product_Name": product_name.strip(),
+        "Stock_Level": stock_level,
+        "Max_Capacity": max_capacity,
+        "Date_Updated": datetime.strptime(date_updated, '%Y-%m-%d'),
     }
-    df_expenses = pd.DataFrame(expenses_breakdown)
-
-    return df_sales, df_expenses
-
-
-
-tabs = st.sidebar.selectbox("Choose an action", ["Home", "Stock Report", "Historic Data"])
-
-if tabs == "Home":
-    st.markdown(
-        """
-        <style>
-        .reportview-container {
-            background: #f0f2f6;
-            padding: 20px;
-            border-radius: 10px;
-        }
-        .stButton>button {
-            background-color: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            padding: 10px 20px;
-            text-align: center;
-            display: inline-block;
-            font-size: 16px;
-            margin: 4px 2px;
-            cursor: pointer;
-        }
-        .stTextInput>div>div>input {
-            padding: 10px;
-            border-radius: 4px;
-            border: 1px solid #ccc;
-        }
-        .stDateInput>div>div>input {
-            padding: 10px;
-            border-radius: 4px;
-            border: 1px solid #ccc;
-        }
-        .stMetric>div {
-            padding: 20px;
-            border-radius: 10px;
-            background: #ffffff;
-            box-shadow: 0px 4px 8px rgba(0, 0, 0, 0.1);
-            margin-bottom: 20px;
-        }
-        .metric-box {
-            background-color: #f8f9fa;  /* Light grey background */
-            border: 1px solid #dee2e6;  /* Light grey border */
-            border-radius: 8px;
-            padding: 15px;
-            text-align: center;
-            margin-bottom: 15px;
-            box-shadow: 0px 4px 8px rgba(0, 0, 0, 0.1);
-        }
-        .total-categories { background-color: #d3f9d8; }  /* Pastel green */
-        .total-items { background-color: #d0e9f5; }       /* Pastel blue */
-        .remaining-stock { background-color: #f9d6d5; }   /* Pastel red */
-        .out-of-stock { background-color: #fef6d0; }      /* Pastel yellow */
-        .donut-chart {
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            height: 300px;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    # Prices left blank keep their stored value
+    try:
+        for field, value in [("Unit_Price", unit_price), ("Unit_Cost", unit_cost)]:
+            if value.strip():
+                fields[field] = float(value)
+    except ValueError:
+        st.error("Unit Price and Unit Cost must be numbers.")
+        return False
+
+    from demandcast.inventory_db import upsert_stock_report
+
+    upsert_stock_report(inventory_database(), category, product_id, fields)
+    return True
+
+@timed(phase='query')
+def delete_stock_report(category, product_id):
+    from demandcast.inventory_db import remove_stock_report
+
+    return remove_stock_report(inventory_database(), category.strip(), product_id.strip())
+
+# Browse one category a page at a time. Pages are keyed on the last
+# Product_ID shown, so only the visible rows are ever fetched or held, and the
+# next page is prefetched while this one is read.
+@timed(phase='query')
+def view_data_by_category():
+    from demandcast.inventory_db import ensure_indexes, format_expiry_date, list_categories, stock_prefetcher
+
+    db = inventory_database()
+    categories = list_categories(db['categories'])
+    if not categories:
+        st.info("No stock reports yet.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    category = col1.selectbox("Category", categories)
+    id_prefix = col2.text_input("Product ID starts with").strip()
+    page_size = col3.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    ensure_indexes(db, [category])
+
+    # Start keys of the pages visited so far; the last one is shown
+    view = (category, id_prefix, page_size)
+    if st.session_state.get('stock_view') != view:
+        st.session_state['stock_view'] = view
+        st.session_state['stock_page_starts'] = [None]
+    starts = st.session_state['stock_page_starts']
+
+    started = time.perf_counter()
+    rows, has_next = stock_prefetcher.get(db, category, starts[-1], page_size, id_prefix=id_prefix or None)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if rows:
+        page = pd.DataFrame(rows)
+        for column in ['Date_Updated', 'Expiry_Date']:
+            if column in page:
+                page[column] = page[column].map(format_expiry_date, na_action='ignore')
+        st.dataframe(page)
+    else:
+        st.info("No products match.")
+
+    def previous_page():
+        starts.pop()
+
+    def next_page():
+        starts.append(rows[-1]['Product_ID'])
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    col1.button("Previous", on_click=previous_page, disabled=len(starts) == 1)
+    col2.button("Next", on_click=next_page, disabled=not has_next)
+    col3.caption(f"Page {len(starts)} · {len(rows)} rows · {elapsed_ms:.0f} ms")
+
+# Stream an uploaded historical export into the historical database chunk by
+# chunk, with live progress and throughput
+@timed(phase='load')
+def upload_historical_data(uploaded_file, chunk_rows=50_000):
+    from demandcast.ingest import history_writer, ingest_csv
+    from demandcast.mongo_client import get_client
+
+    client = get_client()
+    write = history_writer(client['historical_inventory_database'], client['inventory_database']['categories'])
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+
+    def report(progress):
+        if progress.fraction is not None:
+            progress_bar.progress(progress.fraction)
+        status.text(f"{progress.rows_read:,} rows read, {progress.rows_written:,} written, "
+                    f"{progress.rows_rejected:,} rejected ({progress.rows_per_second:,.0f} rows/s)")
+
+    try:
+        progress = ingest_csv(uploaded_file, write, chunk_rows=chunk_rows, progress_callback=report,
+                              total_bytes=uploaded_file.size)
+    except ValueError as exc:
+        st.error(str(exc))
+        return
+    st.success(f"Uploaded {progress.rows_written:,} rows in {progress.seconds:.1f} s "
+               f"({progress.rows_per_second:,.0f} rows/s).")
+    if progress.rows_rejected:
+        st.warning(f"{progress.rows_rejected:,} rows were skipped: missing Product_ID, Category or Date_Updated, "
+                   "or values that could not be parsed.")
+
+# Materialized per-category summary: one small document per category
+@timed(phase='query')
+def load_summary():
+    return read_summary(inventory_database())
+
+
+with rerun('inventory'):
+    tabs = st.sidebar.selectbox("Choose an action", ["Home", "Stock Report", "Historic Data"])
+
+    if tabs == "Home":
+        # plotly is only loaded when the charts are drawn
+        import plotly.express as px
+        import plotly.graph_objects as go
+
+        st.markdown(
+            """
+            <style>
+            .reportview-container {
+                background: #f0f2f6;
+                padding: 20px;
+                border-radius: 10px;
+            }
+            .stButton>button {
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 10px 20px;
+                text-align: center;
+                display: inline-block;
+                font-size: 16px;
+                margin: 4px 2px;
+                cursor: pointer;
+            }
+            .stTextInput>div>div>input {
+                padding: 10px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+            }
+            .stDateInput>div>div>input {
+                padding: 10px;
+                border-radius: 4px;
+                border: 1px solid #ccc;
+            }
+            .stMetric>div {
+                padding: 20px;
+                border-radius: 10px;
+                background: #ffffff;
+                box-shadow: 0px 4px 8px rgba(0, 0, 0, 0.1);
+                margin-bottom: 20px;
+            }
+            .metric-box {
+                background-color: #f8f9fa;  /* Light grey background */
+                border: 1px solid #dee2e6;  /* Light grey border */
+                border-radius: 8px;
+                padding: 15px;
+                text-align: center;
+                margin-bottom: 15px;
+                box-shadow: 0px 4px 8px rgba(0, 0, 0, 0.1);
+            }
+            .total-categories { background-color: #d3f9d8; }  /* Pastel green */
+            .total-items { background-color: #d0e9f5; }       /* Pastel blue */
+            .remaining-stock { background-color: #f9d6d5; }   /* Pastel red */
+            .out-of-stock { background-color: #fef6d0; }      /* Pastel yellow */
+            .donut-chart {
+                display: flex;
+                justify-content: center;
+                align-items: center;
+                height: 300px;
+            }
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
 
 
     
-    # Generate random data
-    df_sales, df_expenses = generate_random_data()
+        # Summary figures, maintained incrementally as stock reports change
+        df_summary, updated_at, refreshed_at = load_summary()
+        totals = df_summary.sum()
 
-    # Inventory Summary
-    st.markdown("### Inventory Summary")
-    col1, col2, col3, col4 = st.columns(4)
+        # Inventory Summary
+        st.markdown("### Inventory Summary")
+        col_caption, col_refresh = st.columns([4, 1])
+        if col_refresh.button("Rebuild Summary"):
+            refresh_summary(inventory_database())
+            df_summary, updated_at, refreshed_at = load_summary()
+            totals = df_summary.sum()
+        if updated_at:
+            age_minutes = (datetime.now() - updated_at).total_seconds() / 60
+            rebuilt = refreshed_at.strftime('%Y-%m-%d %H:%M') if refreshed_at else "never"
+            col_caption.caption(f"Summary as of {updated_at:%Y-%m-%d %H:%M} ({age_minutes:.0f} min ago); last full rebuild: {rebuilt}.")
+        else:
+            col_caption.caption("No summary yet: add stock reports or rebuild the summary.")
+        col1, col2, col3, col4 = st.columns(4)
     
-    with col1:
-        st.markdown(f"""
-            <div class="metric-box total-categories">
-                <h3>Total Categories</h3>
-                <p style="font-size: 24px; color: #007bff;">10</p>
-            </div>
-            """, unsafe_allow_html=True)
+        with col1:
+            st.markdown(f"""
+                <div class="metric-box total-categories">
+                    <h3>Total Categories</h3>
+                    <p style="font-size: 24px; color: #007bff;">{int((df_summary["products"] > 0).sum())}</p>
+                </div>
+                """, unsafe_allow_html=True)
     
-    with col2:
-        st.markdown(f"""
-            <div class="metric-box total-items">
-                <h3>Total Items</h3>
-                <p style="font-size: 24px; color: #28a745;">150</p>
-            </div>
-            """, unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+                <div class="metric-box total-items">
+                    <h3>Total Items</h3>
+                    <p style="font-size: 24px; color: #28a745;">{int(totals["products"]):,}</p>
+                </div>
+                """, unsafe_allow_html=True)
     
-    with col3:
-        st.markdown(f"""
-            <div class="metric-box remaining-stock">
-                <h3>Remaining Stock</h3>
-                <p style="font-size: 24px; color: #17a2b8;">120</p>
-            </div>
-            """, unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"""
+                <div class="metric-box remaining-stock">
+                    <h3>Remaining Stock</h3>
+                    <p style="font-size: 24px; color: #17a2b8;">{totals["stock"]:,.0f}</p>
+                </div>
+                """, unsafe_allow_html=True)
     
-    with col4:
-        st.markdown(f"""
-            <div class="metric-box out-of-stock">
-                <h3>Out of Stock Products</h3>
-                <p style="font-size: 24px; color: #dc3545;">5</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-    # Stock Availability Status (Donut Chart)
-    st.markdown("### Stock Availability Status")
-    stock_status_summary = {
-        "Out of Stock": 5,
-        "Low Stock": 10,
-        "Medium Stock": 25,
-        "High Stock": 60
-    }
-    df_stock_status = pd.DataFrame(list(stock_status_summary.items()), columns=['Status', 'Count'])
+        with col4:
+            st.markdown(f"""
+                <div class="metric-box out-of-stock">
+                    <h3>Out of Stock Products</h3>
+                    <p style="font-size: 24px; color: #dc3545;">{int(totals["out_of_stock"]):,}</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+        # Stock Availability Status (Donut Chart)
+        st.markdown("### Stock Availability Status")
+        df_stock_status = pd.DataFrame({
+            'Status': [status.replace('_', ' ').title() for status in STATUSES],
+            'Count': [int(totals[status]) for status in STATUSES],
+        })
     
-    fig_donut = px.pie(df_stock_status, names='Status', values='Count', hole=0.4, title='Stock Availability Status', color_discrete_sequence=px.colors.sequential.Plasma)
-    fig_donut.update_traces(textinfo='percent+label', textfont_size=15)
+        fig_donut = px.pie(df_stock_status, names='Status', values='Count', hole=0.4, title='Stock Availability Status', color_discrete_sequence=px.colors.sequential.Plasma)
+        fig_donut.update_traces(textinfo='percent+label', textfont_size=15)
     
-    st.plotly_chart(fig_donut, use_container_width=True, height=300, config={'displayModeBar': False})
+        st.plotly_chart(fig_donut, width='stretch', height=300, config={'displayModeBar': False})
 
-    # Financial Summary
-    st.markdown("### Financial Summary")
-    col1, col2, col3 = st.columns(3)
-    revenue = 90700.00
-    expenses = 63600.00
-    profit = revenue - expenses
-    col1.metric("Revenue", f"${revenue:,.2f}")
-    col2.metric("Expenses", f"${expenses:,.2f}")
-    col3.metric("Profit", f"${profit:,.2f}")
-
-    # Revenue and Purchase Cost Chart
+        # Financial Summary
+        st.markdown("### Financial Summary")
+        col1, col2, col3 = st.columns(3)
+        revenue = float(totals["revenue"])
+        expenses = float(totals["cost"])
+        profit = revenue - expenses
+        col1.metric("Revenue", f"${revenue:,.2f}")
+        col2.metric("Expenses", f"${expenses:,.2f}")
+        col3.metric("Profit", f"${profit:,.2f}")
+
+        # Revenue and Purchase Cost Chart
   
-    fig = go.Figure()
-    fig.add_trace(go.Bar(x=df_sales["Product"], y=df_sales["Revenue"], name="Revenue", marker_color='royalblue'))
-    fig.add_trace(go.Bar(x=df_sales["Product"], y=df_sales["Purchase Cost"], name="Purchase Cost", marker_color='firebrick'))
-    fig.update_layout(
-        title="Revenue and Purchase Cost",
-        xaxis_title="Product",
-        yaxis_title="Amount ($)",
-        barmode="group",
-        template="plotly_dark"  # Dark mode for better contrast
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Expenses Breakdown
-    fig_pie = px.pie(df_expenses, names='Category', values='Amount', hole=0.3, title='Expenses Breakdown', color_discrete_sequence=px.colors.sequential.Plasma)
-    fig_pie.update_traces(textinfo='percent+label', textfont_size=15)
-    st.plotly_chart(fig_pie, use_container_width=True)
-
-    # Top 3 Highest Sales Products
-    st.markdown("### Top 3 Highest Sales Products")
-    top_3_products = df_sales.nlargest(3, 'Revenue')[["Product", "Revenue"]]
-    st.table(top_3_products)
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=df_summary.index, y=df_summary["revenue"], name="Revenue", marker_color='royalblue'))
+        fig.add_trace(go.Bar(x=df_summary.index, y=df_summary["cost"], name="Purchase Cost", marker_color='firebrick'))
+        fig.update_layout(
+            title="Revenue and Purchase Cost",
+            xaxis_title="Category",
+            yaxis_title="Amount ($)",
+            barmode="group",
+            template="plotly_dark"  # Dark mode for better contrast
+        )
+        st.plotly_chart(fig, width='stretch')
+
+        # Expenses Breakdown
+        df_expenses = df_summary["cost"].rename_axis("Category").reset_index(name="Amount")
+        fig_pie = px.pie(df_expenses, names='Category', values='Amount', hole=0.3, title='Expenses Breakdown', color_discrete_sequence=px.colors.sequential.Plasma)
+        fig_pie.update_traces(textinfo='percent+label', textfont_size=15)
+        st.plotly_chart(fig_pie, width='stretch')
+
+        # Top 3 Highest Sales Categories
+        st.markdown("### Top 3 Highest Sales Categories")
+        top_3_categories = df_summary["revenue"].nlargest(3).rename_axis("Category").reset_index(name="Revenue")
+        st.table(top_3_categories)
 
   
 
-elif tabs == "Stock Report":
-    st.header("Stock Report Management")
-    action = st.selectbox("Select an action", ["Add", "Update", "Delete", "View"])
-
-    if action == "Add":
-        with st.form("stock_report_form"):
-            category = st.text_input("Category")
-            product_id = st.text_input("Product ID")
-            product_name = st.text_input("Product Name")
-            stock_level = st.text_input("Stock Level")
-            date_updated = st.date_input("Date Updated", datetime.today())
-            max_capacity = st.text_input("Max Capacity")
-
-            submit = st.form_submit_button("Submit")
-
-            if submit:
-                create_or_update_stock_report(category, product_id, product_name, stock_level, date_updated.strftime('%Y-%m-%d'), max_capacity)
-                st.success("Stock report added successfully!")
-
-    elif action == "Update":
-        with st.form("update_stock_report_form"):
-            category = st.text_input("Category")
-            product_id = st.text_input("Product ID")
-            product_name = st.text_input("Product Name")
-            stock_level = st.text_input("Stock Level")
-            date_updated = st.date_input("Date Updated", datetime.today())
-            max_capacity = st.text_input("Max Capacity")
-
-            submit = st.form_submit_button("Update")
-
-            if submit:
-                create_or_update_stock_report(category, product_id, product_name, stock_level, date_updated.strftime('%Y-%m-%d'), max_capacity)
-                st.success("Stock report updated successfully!")
-
-    elif action == "Delete":
-        with st.form("delete_stock_report_form"):
-            category = st.text_input("Category")
-            product_id = st.text_input("Product ID")
-
-            submit = st.form_submit_button("Delete")
-
-            if submit:
-                if st.confirm("Are you sure you want to delete this record?"):
-                    delete_stock_report(category, product_id)
-                    st.success("Stock report deleted successfully!")
-
-    elif action == "View":
-        view_data_by_category()
-
-elif tabs == "Historic Data":
-    st.header("Historical Data Upload")
-    uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
-
-    if uploaded_file:
-        upload_historical_data(uploaded_file)
+    elif tabs == "Stock Report":
+        st.header("Stock Report Management")
+        action = st.selectbox("Select an action", ["Add", "Update", "Delete", "View"])
+
+        if action == "Add":
+            with st.form("stock_report_form"):
+                category = st.text_input("Category")
+                product_id = st.text_input("Product ID")
+                product_name = st.text_input("Product Name")
+                stock_level = st.text_input("Stock Level")
+                date_updated = st.date_input("Date Updated", datetime.today())
+                max_capacity = st.text_input("Max Capacity")
+                unit_price = st.text_input("Unit Price (optional)")
+                unit_cost = st.text_input("Unit Cost (optional)")
+
+                submit = st.form_submit_button("Submit")
+
+                if submit:
+                    if create_or_update_stock_report(category, product_id, product_name, stock_level, date_updated.strftime('%Y-%m-%d'), max_capacity, unit_price, unit_cost):
+                        st.success("Stock report added successfully!")
+
+        elif action == "Update":
+            with st.form("update_stock_report_form"):
+                category = st.text_input("Category")
+                product_id = st.text_input("Product ID")
+                product_name = st.text_input("Product Name")
+                stock_level = st.text_input("Stock Level")
+                date_updated = st.date_input("Date Updated", datetime.today())
+                max_capacity = st.text_input("Max Capacity")
+                unit_price = st.text_input("Unit Price (optional)")
+                unit_cost = st.text_input("Unit Cost (optional)")
+
+                submit = st.form_submit_button("Update")
+
+                if submit:
+                    if create_or_update_stock_report(category, product_id, product_name, stock_level, date_updated.strftime('%Y-%m-%d'), max_capacity, unit_price, unit_cost):
+                        st.success("Stock report updated successfully!")
+
+        elif action == "Delete":
+            with st.form("delete_stock_report_form"):
+                category = st.text_input("Category")
+                product_id = st.text_input("Product ID")
+                confirm = st.checkbox("Are you sure you want to delete this record?")
+
+                submit = st.form_submit_button("Delete")
+
+                if submit:
+                    if not confirm:
+                        st.warning("Tick the confirmation box to delete the record.")
+                    elif delete_stock_report(category, product_id):
+                        st.success("Stock report deleted successfully!")
+                    else:
+                        st.warning("No stock report found for that category and product.")
+
+        elif action == "View":
+            view_data_by_category()
+
+    elif tabs == "Historic Data":
+        st.header("Historical Data Upload")
+        uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
+        chunk_rows = st.number_input("Rows per chunk:", min_value=1000, max_value=1_000_000, value=50_000, step=1000)
+
+        if uploaded_file and st.button("Upload Historical Data"):
+            upload_historical_data(uploaded_file, int(chunk_rows))
+
+performance_panel(st.sidebar, 'inventory')
@@ -2,11 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import statsmodels.api as sm
-from statsmodels.tsa.api import VAR
-import matplotlib.pyplot as plt
+from demandcast.baselines import ENGINES, get_forecaster
+from demandcast.forecast import batch_forecast
+from demandcast.instrument import performance_panel, rerun, span, timed
+from demandcast.loader import LEDGER_SCHEMA, load_csv
+from demandcast.model_cache import cached_arima_forecast, cached_var_forecast
+from demandcast.order_search import search_arima_order, search_var_lags, var_maxlags
+from demandcast.outputs import FORECAST_OUTPUT, precomputed_table
+from demandcast.plotting import timeseries_figure
+from demandcast.reconcile import METHODS
+
 
 # Generate synthetic data for demonstration
+@timed(phase='load')
 def generate_synthetic_data():
     np.random.seed(42)
     dates = pd.date_range(start="2020-01-01", periods=24, freq='M')
@@ -23,51 +31,127 @@ def generate_synthetic_data():
     df.set_index('Date', inplace=True)
     return df
 
-# Univariate Forecasting with ARIMA
-def univariate_forecast(df, value_col):
-    model = sm.tsa.ARIMA(df[value_col], order=(1, 1, 1))  # ARIMA model parameters (p,d,q)
-    results = model.fit()
-    forecast = results.forecast(steps=12)  # Forecasting next 12 months
+# Univariate Forecasting with ARIMA (cached until the series changes) or a fast baseline engine
+@timed(phase='compute')
+def univariate_forecast(df, value_col, engine='arima', order=(1, 1, 1)):
+    if engine == 'arima':
+        forecast = cached_arima_forecast(df[value_col], order=order, steps=12)  # ARIMA model parameters (p,d,q), next 12 months
+    else:
+        forecast = get_forecaster(engine).forecast(df[value_col].to_numpy(), steps=12)[0]
     forecast_dates = pd.date_range(start=df.index[-1] + pd.DateOffset(months=1), periods=12, freq='M')
     forecast_df = pd.DataFrame(forecast, index=forecast_dates, columns=['Forecast'])
     return forecast_df
 
-# Multivariate Forecasting with VAR
-def multivariate_forecast(df, target_col, feature_cols):
-    model = VAR(df[feature_cols + [target_col]])
-    
-    # Automatically select the number of lags
-    maxlags = min(15, len(df) // (5 * len(df.columns)))
-    results = model.fit(maxlags=maxlags, ic='aic')
-    
-    forecast = results.forecast(df[feature_cols + [target_col]].values[-results.k_ar:], steps=12)
+# Multivariate Forecasting with VAR (cached until the series change)
+@timed(phase='compute')
+def multivariate_forecast(df, target_col, feature_cols, lags=None):
+    if lags is None:
+        # Automatically select the number of lags
+        series = df[feature_cols + [target_col]]
+        forecast = cached_var_forecast(series, maxlags=var_maxlags(series), steps=12, ic='aic')
+    else:
+        forecast = cached_var_forecast(df[feature_cols + [target_col]], maxlags=max(lags, 1), steps=12, ic=None)
     forecast_df = pd.DataFrame(forecast, index=pd.date_range(start=df.index[-1] + pd.DateOffset(months=1), periods=12, freq='M'), columns=feature_cols + [target_col])
     return forecast_df
 
-# Streamlit UI
-st.title("Inventory Forecasting")
 
-# Generate synthetic data
-df = generate_synthetic_data()
+with rerun('predict'):
+    # Streamlit UI
+    st.title("Inventory Forecasting")
+
+    # Generate synthetic data
+    df = generate_synthetic_data()
+
+    # Univariate Forecasting
+    st.subheader("Univariate Forecasting")
+    engine = st.selectbox("Forecasting engine:", list(ENGINES), index=0)
+    auto_order = st.checkbox("Automatic order selection (AIC)")
+    st.write("Historical Stock Levels:")
+    st.plotly_chart(timeseries_figure(df['Stock_Level']), width='stretch')
+
+    order = (1, 1, 1)
+    if auto_order and engine == 'arima':
+        with span('search_arima_order'):
+            search = search_arima_order(df['Stock_Level'], criterion='aic')
+        order = search.order
+        st.caption(f"Selected ARIMA{order} (AIC {search.value:.1f}) in {search.seconds:.2f}s: "
+                   f"{search.evaluated} of {search.candidates} candidates fitted, "
+                   f"{search.pruned} skipped by the likelihood-bound heuristic"
+                   + (" (memoized)" if search.memoized else ""))
+    forecast_df_univariate = univariate_forecast(df, 'Stock_Level', engine, order)
+    st.write("Forecasted Stock Levels:")
+    st.plotly_chart(timeseries_figure(pd.concat([df['Stock_Level'], forecast_df_univariate], axis=1)), width='stretch')
+    st.write("**Forecasted Data**")
+    st.dataframe(forecast_df_univariate, width='stretch')
+
+    # Multivariate Forecasting
+    st.subheader("Multivariate Forecasting with VAR")
+    st.write("Historical Data (Stock Level, Revenue, Sales Units):")
+    st.plotly_chart(timeseries_figure(df[['Stock_Level', 'Revenue', 'Sales_Units']]), width='stretch')
+
+    lags = None
+    if auto_order:
+        with span('search_var_lags'):
+            series = df[['Revenue', 'Sales_Units', 'Stock_Level']]
+            lag_search = search_var_lags(series, maxlags=var_maxlags(series), criterion='aic')
+        lags = lag_search.order
+        st.caption(f"Selected VAR lag order {lags} (AIC {lag_search.value:.2f}) in {lag_search.seconds:.3f}s"
+                   + (" (memoized)" if lag_search.memoized else ""))
+    forecast_df_multivariate = multivariate_forecast(df, 'Stock_Level', ['Revenue', 'Sales_Units'], lags)
+    st.write("Forecasted Data:")
+    st.plotly_chart(timeseries_figure(forecast_df_multivariate[['Stock_Level']]), width='stretch')
+    st.write("**Forecasted Data**")
+    st.dataframe(forecast_df_multivariate, width='stretch')
 
-# Univariate Forecasting
-st.subheader("Univariate Forecasting with ARIMA")
-st.write("Historical Stock Levels:")
-st.line_chart(df['Stock_Level'], use_container_width=True)
+    # Batch Forecasting for every item in the inventory ledger
+    st.subheader("Batch Forecasting for All Items")
+    st.write("ARIMA forecasts of Units Used for every Item ID in processed_inventory.csv:")
+    # Only a batch run of this page's engine, series and horizon over this ledger is shown
+    precomputed = precomputed_table(FORECAST_OUTPUT, 'processed_inventory.csv', engine='arima',
+                                    value_col='Units Used', steps=12)
+    if precomputed is not None:
+        table, metadata = precomputed
+        st.caption(f"Precomputed by `python -m demandcast forecast` (order {metadata['order']}) "
+                   f"at {datetime.fromisoformat(metadata['generated_at']):%Y-%m-%d %H:%M}:")
+        st.dataframe(table.pivot(index='Date', columns='Item ID', values='Forecast'), width='stretch')
+    if st.button("Forecast All Items"):
+        with span('load_ledger', 'load'):
+            ledger = load_csv('processed_inventory.csv', LEDGER_SCHEMA)
+        with span('batch_forecast'):
+            batch = batch_forecast(ledger, 'Units Used', order='auto' if auto_order else (1, 1, 1))
+        st.write(f"Forecasted {len(batch.timings)} items in {batch.wall_seconds:.1f}s "
+                 f"({batch.series_per_second:.1f} series/s on {batch.workers} workers)")
+        if auto_order:
+            st.caption(f"Order search took {batch.search_seconds:.1f}s of worker time, "
+                       f"{batch.candidates_pruned} candidates skipped by the likelihood-bound heuristic")
+        st.dataframe(batch.forecasts.pivot(index='Date', columns='Item ID', values='Forecast'), width='stretch')
+        if not batch.failures.empty:
+            st.warning(f"{len(batch.failures)} items could not be forecast:")
+            st.dataframe(batch.failures, width='stretch')
 
-forecast_df_univariate = univariate_forecast(df, 'Stock_Level')
-st.write("Forecasted Stock Levels:")
-st.line_chart(pd.concat([df['Stock_Level'], forecast_df_univariate], axis=1), use_container_width=True)
-st.write("**Forecasted Data**")
-st.dataframe(forecast_df_univariate, use_container_width=True)
+    # Coherent forecasts for every level of the Category -> Item ID hierarchy
+    st.subheader("Hierarchical Forecasting")
+    st.write("Forecasts of Units Used for the total, every category and every item that add up at every level:")
+    col1, col2 = st.columns(2)
+    reconcile_method = col1.selectbox("Reconciliation method:", METHODS, index=METHODS.index('mint_diag'))
+    base_engines = [name for name in ENGINES if name != 'arima']
+    base_engine = col2.selectbox("Base forecasting engine:", base_engines, index=base_engines.index('ses'))
+    if st.button("Forecast Hierarchy"):
+        from demandcast.reconcile import hierarchical_forecast
 
-# Multivariate Forecasting
-st.subheader("Multivariate Forecasting with VAR")
-st.write("Historical Data (Stock Level, Revenue, Sales Units):")
-st.line_chart(df[['Stock_Level', 'Revenue', 'Sales_Units']], use_container_width=True)
+        with span('load_ledger', 'load'):
+            ledger = load_csv('processed_inventory.csv', LEDGER_SCHEMA)
+        try:
+            with span('hierarchical_forecast'):
+                reconciled, reconciled_dates = hierarchical_forecast(ledger, 'Units Used', base_engine, 12,
+                                                                     reconcile_method)
+        except (ValueError, np.linalg.LinAlgError) as exc:
+            st.error(f"Could not reconcile the forecasts with {reconcile_method}: {exc}")
+        else:
+            st.caption(f"Reconciled {len(reconciled.hierarchy.nodes)} nodes with {reconcile_method} "
+                       f"in {reconciled.seconds * 1000:.1f} ms.")
+            hierarchy_frame = reconciled.to_frame(reconciled_dates)
+            st.dataframe(hierarchy_frame.pivot_table(index=['level', 'key'], columns='Date', values='Forecast',
+                                                     sort=False), width='stretch')
 
-forecast_df_multivariate = multivariate_forecast(df, 'Stock_Level', ['Revenue', 'Sales_Units'])
-st.write("Forecasted Data:")
-st.line_chart(forecast_df_multivariate[['Stock_Level']], use_container_width=True)
-st.write("**Forecasted Data**")
-st.dataframe(forecast_df_multivariate, use_container_width=True)
+performance_panel(st.sidebar, 'predict')